@@ -13,7 +13,23 @@ from typing import Tuple, Dict, List
 # Add parent directory to path to import normalizer
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from normalizer import normalize_text, unknown_variants, clear_unknown_variants, reload_data
+from normalizer import normalize_batch, reload_data
+from normalizer.search import TYPES, IndexCache
+
+# Queue configuration (overridable through environment variables)
+CONCURRENCY_LIMIT = int(os.environ.get('HASSANIYA_GRADIO_CONCURRENCY', 4))
+MAX_BATCH_SIZE = int(os.environ.get('HASSANIYA_GRADIO_BATCH_SIZE', 16))
+MAX_QUEUE_SIZE = int(os.environ.get('HASSANIYA_GRADIO_QUEUE_SIZE', 256))
+
+# Dictionary search index, rebuilt when a data file changes
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+search_index = IndexCache(
+    os.path.join(DATA_DIR, 'hassaniya_variants.jsonl'),
+    os.path.join(DATA_DIR, 'word_separation.jsonl'),
+    os.path.join(DATA_DIR, 'exception_words_g_q.json'),
+)
+SEARCH_MODES = {"Starts with": "prefix", "Contains": "substring"}
+SEARCH_PAGE_SIZE = 50
 
 
 def load_variants_data() -> List[Dict[str, any]]:
@@ -108,8 +124,8 @@ def check_word_exists(word: str, variants_data: List[Dict[str, any]]) -> Tuple[b
 def clear_normalizer_cache() -> None:
     """Clear the normalizer's variant cache to reload updated data."""
     try:
-        from normalizer.normalizer import _variant_dict
-        _variant_dict.clear()
+        from normalizer.normalizer import reload_data
+        reload_data()
     except ImportError:
         pass
 
@@ -272,6 +288,50 @@ def highlight_changes(original: str, normalized: str) -> str:
     return ' '.join(result_words)
 
 
+def format_unknown_variants(variants: List[str]) -> str:
+    """Format unknown variants for display.
+    
+    Args:
+        variants: Unknown variants found in a text.
+        
+    Returns:
+        Human-readable summary.
+    """
+    if not variants:
+        return "No unknown variants found."
+    
+    variants_info = f"Unknown variants found: {', '.join(variants[:10])}"
+    if len(variants) > 10:
+        variants_info += f" ... and {len(variants) - 10} more"
+    return variants_info
+
+
+def normalize_batch_with_options(texts: List[str], show_diffs: List[str]) -> Tuple[List[str], List[str]]:
+    """Normalize a batch of queued requests in one engine call.
+    
+    Used as a batched Gradio event handler: Gradio collects pending requests
+    from the queue and passes their inputs as parallel lists.
+    
+    Args:
+        texts: Input texts, one per request.
+        show_diffs: "Yes"/"No" diff options, one per request.
+        
+    Returns:
+        Tuple of (outputs, unknown_variants_infos), one entry per request.
+    """
+    pending = [i for i, text in enumerate(texts) if text.strip()]
+    per_text_unknowns: List[List[str]] = []
+    normalized = normalize_batch([texts[i] for i in pending], per_text_unknowns)
+    
+    outputs = [""] * len(texts)
+    infos = ["No text provided."] * len(texts)
+    for i, result, variants in zip(pending, normalized, per_text_unknowns):
+        outputs[i] = highlight_changes(texts[i], result) if show_diffs[i] == "Yes" else result
+        infos[i] = format_unknown_variants(variants)
+    
+    return outputs, infos
+
+
 def normalize_with_options(text: str, show_diff: bool) -> Tuple[str, str]:
     """Normalize text and optionally show differences.
     
@@ -282,33 +342,51 @@ def normalize_with_options(text: str, show_diff: bool) -> Tuple[str, str]:
     Returns:
         Tuple of (normalized_text, unknown_variants_info).
     """
-    if not text.strip():
-        return "", "No text provided."
-    
-    # Reload data to ensure we're using the latest files
-    reload_data()
-    
-    # Clear previous unknown variants
-    clear_unknown_variants()
-    
-    # Normalize the text
-    normalized = normalize_text(text)
-    
-    # Prepare output
-    if show_diff:
-        output = highlight_changes(text, normalized)
-    else:
-        output = normalized
+    outputs, infos = normalize_batch_with_options([text], ["Yes" if show_diff else "No"])
+    return outputs[0], infos[0]
+
+
+def describe_entry(entry: Dict[str, any]) -> str:
+    """Return the details column of a search result."""
+    if entry['type'] == 'canonical':
+        return f"Variants: {', '.join(entry['variants'])}"
+    if entry['type'] == 'variant':
+        return f"→ {entry['canonical']}"
+    if entry['type'] == 'separation':
+        return f"{entry['separated']} → {entry['linked']}"
+    return "Keeps گ/ق"
+
+
+def search_dictionary(
+    query: str, mode: str, types: List[str], cursor: str = None, rows: List[List[str]] = None
+) -> Tuple[List[List[str]], str, str, List[List[str]]]:
+    """Search the dictionary, appending the next page to ``rows`` if a cursor is given.
     
-    # Prepare unknown variants info
-    if unknown_variants:
-        variants_info = f"Unknown variants found: {', '.join(unknown_variants[:10])}"
-        if len(unknown_variants) > 10:
-            variants_info += f" ... and {len(unknown_variants) - 10} more"
+    Args:
+        query: Text to match.
+        mode: A key of ``SEARCH_MODES``.
+        types: Entry types to include.
+        cursor: Cursor of the next page, or None for a new search.
+        rows: Rows already shown.
+        
+    Returns:
+        Tuple of (table rows, status, next cursor, table rows for the state).
+    """
+    rows = list(rows or []) if cursor else []
+    if not types:
+        return rows, "Select at least one entry type.", None, rows
+    try:
+        page = search_index.get().search(
+            query.strip(), SEARCH_MODES[mode], types, SEARCH_PAGE_SIZE, cursor
+        )
+    except ValueError as e:
+        return rows, f"❌ {e}", None, rows
+    rows += [[entry['form'], entry['type'].capitalize(), describe_entry(entry)] for entry in page['results']]
+    if not rows:
+        status = "No matching entries."
     else:
-        variants_info = "No unknown variants found."
-    
-    return output, variants_info
+        status = f"Showing {len(rows)} entries{' (more available)' if page['next_cursor'] else ''}."
+    return rows, status, page['next_cursor'], rows
 
 
 def create_interface() -> gr.Interface:
@@ -378,11 +456,15 @@ def create_interface() -> gr.Interface:
                     cache_examples=False
                 )
                 
-                # Connect the normalize button
+                # Connect the normalize button; concurrent requests are
+                # batched into a single engine call
                 normalize_btn.click(
-                    fn=lambda text, diff: normalize_with_options(text, diff == "Yes"),
+                    fn=normalize_batch_with_options,
                     inputs=[input_text, show_diff],
-                    outputs=[output_text, variants_info]
+                    outputs=[output_text, variants_info],
+                    batch=True,
+                    max_batch_size=MAX_BATCH_SIZE,
+                    concurrency_limit=CONCURRENCY_LIMIT
                 )
             
             with gr.TabItem("Variant Manager"):
@@ -467,6 +549,59 @@ def create_interface() -> gr.Interface:
                     inputs=[separated_input, linked_input],
                     outputs=[separation_status_output]
                 )
+            
+            with gr.TabItem("Dictionary Search"):
+                gr.Markdown(
+                    """
+                    ### Search the Dictionary
+                    
+                    Browse canonical words, variants, word separation pairs and exception words.
+                    Leave the search empty to list everything.
+                    """
+                )
+                
+                with gr.Row():
+                    search_query = gr.Textbox(
+                        label="Search",
+                        placeholder="Enter the beginning or part of a word...",
+                        lines=1
+                    )
+                    search_mode = gr.Radio(
+                        choices=list(SEARCH_MODES),
+                        value="Starts with",
+                        label="Match"
+                    )
+                
+                search_types = gr.CheckboxGroup(
+                    choices=list(TYPES),
+                    value=list(TYPES),
+                    label="Entry types"
+                )
+                
+                search_btn = gr.Button("Search", variant="primary")
+                search_results = gr.Dataframe(
+                    headers=["Word", "Type", "Details"],
+                    interactive=False
+                )
+                search_status = gr.Textbox(label="Status", interactive=False, lines=1)
+                more_btn = gr.Button("Load More")
+                
+                # Pagination state: next cursor and rows shown so far
+                search_cursor = gr.State(None)
+                search_rows = gr.State([])
+                
+                search_outputs = [search_results, search_status, search_cursor, search_rows]
+                search_inputs = [search_query, search_mode, search_types]
+                search_btn.click(fn=search_dictionary, inputs=search_inputs, outputs=search_outputs)
+                search_query.submit(fn=search_dictionary, inputs=search_inputs, outputs=search_outputs)
+                more_btn.click(
+                    fn=lambda query, mode, types, cursor, rows: (
+                        search_dictionary(query, mode, types, cursor, rows) if cursor
+                        else (rows, "No more entries.", None, rows)
+                    ),
+                    inputs=search_inputs + [search_cursor, search_rows],
+                    outputs=search_outputs
+                )
     
     return interface
 
@@ -477,7 +612,13 @@ def main() -> None:
     print("📱 Gradio interface will open automatically in your browser")
     print("Press Ctrl+C to stop the server")
     print()
+    # Load data once; the variant manager refreshes it after each addition
+    reload_data()
     interface = create_interface()
+    interface.queue(
+        default_concurrency_limit=CONCURRENCY_LIMIT,
+        max_size=MAX_QUEUE_SIZE
+    )
     interface.launch(
         server_name="0.0.0.0",
         server_port=7860,
@@ -0,0 +1,249 @@
+"""Patch normalized outputs after a dictionary change.
+
+Usage:
+    python -m cli.apply_delta --index corpus.idx [--dry-run]
+
+Uses the inverted token index built with ``--index`` to find the units
+(lines, records or cues) containing words whose variant mapping or exception status
+changed since they were normalized, and re-normalizes only those units.
+Everything else in the output files is copied unchanged. Each file is brought
+up to date with the morphology setting and dictionary profile it was
+normalized with.
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from itertools import zip_longest
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from normalizer import unknown_variants, clear_unknown_variants, reload_data, set_morphology, use_profile
+from normalizer.morphology import morphology_enabled
+from normalizer.profiles import get_profile
+from cli.batch import normalize_file
+from cli.compression import open_text
+from cli.formats import normalize_delimited, normalize_jsonl, normalize_transcript, split_units
+from cli.transcripts import TRANSCRIPT_FORMATS
+from cli.index import TokenIndex
+from cli.manifest import changed_keys
+
+
+def normalize_unit(raw: str, header: Optional[str], options: Dict[str, Any]) -> str:
+    """Re-normalize a single JSONL line, CSV/TSV record or transcript unit.
+
+    Args:
+        raw: Raw input unit.
+        header: Raw header record for CSV/TSV input.
+        options: ``format``, ``fields`` and ``unknown_field`` settings.
+
+    Returns:
+        The normalized output unit.
+    """
+    if options['format'] in TRANSCRIPT_FORMATS:
+        return ''.join(normalize_transcript(io.StringIO(raw, newline=''), options['format']))
+    if options['format'] == 'jsonl':
+        return next(normalize_jsonl([raw], options['fields'], options['unknown_field']))
+    delimiter = '\t' if options['format'] == 'tsv' else ','
+    chunks = list(normalize_delimited([header, raw], options['fields'], delimiter, options['unknown_field']))
+    return chunks[1]
+
+
+def patch_units(input_path: Path, output_path: Path, options: Dict[str, Any], units: Set[int]) -> None:
+    """Rewrite ``output_path`` with only ``units`` re-normalized from the input.
+
+    Raises:
+        ValueError: If the output no longer lines up with the input.
+    """
+    fmt = options['format']
+    temp_path = output_path.with_name('.tmp-' + output_path.name)
+    try:
+        with open_text(input_path, 'r', newline='') as source, \
+                open_text(output_path, 'r', newline='') as previous, \
+                open_text(temp_path, 'w', newline='') as target:
+            header = None
+            pairs = zip_longest(split_units(source, fmt), split_units(previous, fmt))
+            for unit, (raw_input, raw_output) in enumerate(pairs):
+                if raw_input is None or raw_output is None:
+                    raise ValueError("output does not line up with input")
+                if unit == 0 and fmt in ('csv', 'tsv'):
+                    header = raw_input
+                if unit in units:
+                    target.write(normalize_unit(raw_input, header, options))
+                else:
+                    target.write(raw_output)
+        os.replace(temp_path, output_path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+
+def _apply_entries(index: TokenIndex, entries: List[Dict[str, Any]], dry_run: bool,
+                   report: Dict[str, Any]) -> None:
+    """Bring indexed files normalized with the selected settings up to date."""
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for entry in entries:
+        if entry['data'] != index.fingerprint:
+            groups.setdefault(entry['data'], []).append(entry)
+
+    for fingerprint, entries in groups.items():
+        report['outdated'] += len(entries)
+        previous = index.load_snapshot(fingerprint)
+        keys = changed_keys(previous, index.snapshot) if previous else None
+        file_ids = {entry['id'] for entry in entries}
+        affected = index.lookup(keys, file_ids) if keys is not None else None
+
+        for entry in entries:
+            input_path, output_path = entry['input'], entry['output']
+            try:
+                stat = input_path.stat()
+                stale = (stat.st_size, stat.st_mtime_ns) != (entry['size'], entry['mtime_ns'])
+                units = None if affected is None else affected.get(entry['id'])
+                whole_file = stale or affected is None or not output_path.exists() or (
+                    units and entry['options']['format'] == 'text'
+                )
+
+                if dry_run:
+                    if whole_file:
+                        report['renormalized_files'] += 1
+                    elif units:
+                        report['patched_files'] += 1
+                        report['patched_units'] += len(units)
+                    continue
+
+                if units and not whole_file:
+                    try:
+                        patch_units(input_path, output_path, entry['options'], units)
+                        report['patched_files'] += 1
+                        report['patched_units'] += len(units)
+                    except ValueError:
+                        whole_file = True
+
+                if whole_file:
+                    normalize_file(input_path, output_path, entry['options'])
+                    report['renormalized_files'] += 1
+                    if stale:
+                        index.add_file(input_path, output_path, entry['options'])
+                        continue
+                index.mark_current(entry['id'], stat.st_size, stat.st_mtime_ns)
+            except (OSError, ValueError) as e:
+                report['errors'].append({'file': str(input_path), 'error': f"{type(e).__name__}: {e}"})
+
+
+def apply_delta(index: TokenIndex, dry_run: bool = False, morphology: bool = False,
+                profile: Optional[str] = None) -> Dict[str, Any]:
+    """Bring every indexed output up to date with the currently loaded data.
+
+    Each file is processed with the morphology setting and dictionary profile
+    recorded in its normalization options.
+
+    Args:
+        index: Token index built while normalizing.
+        dry_run: Only report what would be re-normalized.
+        morphology: Morphology setting of files whose options do not record
+            one (indexed by older versions).
+        profile: Dictionary profile of files whose options do not record one.
+
+    Returns:
+        Report with file and unit counts, errors and unknown variants.
+    """
+    start = time.perf_counter()
+    report: Dict[str, Any] = {
+        'files': 0,
+        'outdated': 0,
+        'patched_files': 0,
+        'patched_units': 0,
+        'renormalized_files': 0,
+        'errors': [],
+        'unknown_variants': [],
+    }
+    clear_unknown_variants()
+
+    settings: Dict[Tuple[bool, Optional[str]], List[Dict[str, Any]]] = {}
+    for entry in index.files():
+        report['files'] += 1
+        options = entry['options']
+        key = (options.get('morphology', morphology), options.get('profile', profile))
+        settings.setdefault(key, []).append(entry)
+
+    saved_morphology = morphology_enabled()
+    try:
+        for (entry_morphology, entry_profile), entries in settings.items():
+            try:
+                get_profile(entry_profile)
+            except ValueError as e:
+                for entry in entries:
+                    report['errors'].append({'file': str(entry['input']), 'error': f"{type(e).__name__}: {e}"})
+                continue
+            set_morphology(entry_morphology)
+            with use_profile(entry_profile):
+                _apply_entries(index, entries, dry_run, report)
+    finally:
+        set_morphology(saved_morphology)
+
+    if not dry_run:
+        index.prune_snapshots()
+    report['unknown_variants'] = list(unknown_variants)
+    report['seconds'] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def main() -> None:
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(
+        description='Re-normalize only the parts of indexed outputs affected by dictionary changes.'
+    )
+    parser.add_argument(
+        '--index',
+        required=True,
+        help='Token index built with hassaniya-normalize --index'
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Report affected files and units without writing anything'
+    )
+    parser.add_argument(
+        '--morphology',
+        action='store_true',
+        help='Use clitic-aware lookups for files indexed without a recorded morphology setting '
+             '(other files use the setting they were normalized with)'
+    )
+    parser.add_argument(
+        '--dictionary-profile',
+        metavar='NAME',
+        help='Dictionary profile for files indexed without a recorded profile '
+             '(other files use the profile they were normalized with)'
+    )
+    args = parser.parse_args()
+
+    if not Path(args.index).exists():
+        print(f"Error: Index '{args.index}' does not exist.", file=sys.stderr)
+        sys.exit(1)
+
+    reload_data()
+    with TokenIndex(args.index) as index:
+        report = apply_delta(index, args.dry_run, args.morphology, args.dictionary_profile)
+
+    print("=" * 50)
+    print("DELTA SUMMARY:" if not args.dry_run else "DELTA SUMMARY (dry run):")
+    print("=" * 50)
+    print(f"  Indexed files:   {report['files']} ({report['outdated']} normalized with older data)")
+    print(f"  Patched:         {report['patched_units']} units in {report['patched_files']} files")
+    print(f"  Re-normalized:   {report['renormalized_files']} whole files")
+    print(f"  Time:            {report['seconds']:.2f}s")
+    for error in report['errors']:
+        print(f"  ! {error['file']}: {error['error']}")
+    if report['unknown_variants']:
+        print(f"  Unknown variants: {len(report['unknown_variants'])}")
+
+    if report['errors']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+"""Directory and glob batch mode for the Hassaniya normalization CLI.
+
+All matching files are normalized in one invocation: files are distributed
+over a pool of worker processes that each load the data once, and outputs are
+written to a tree mirroring the input layout. A summary report with file and
+token counts, throughput and errors is produced at the end.
+"""
+
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from normalizer import normalize_text, unknown_variants, clear_unknown_variants, reload_data
+from normalizer.morphology import morphology_enabled, set_morphology
+from normalizer.profiles import current_profile, set_profile
+from cli.compression import open_text
+from cli.formats import normalize_records, token_stats
+from cli.index import TokenIndex, index_units
+from cli.manifest import Manifest, scan_input
+
+GLOB_CHARACTERS = '*?['
+
+# Files handed to a worker per task
+FILES_PER_TASK = 8
+
+
+def is_batch_input(input_arg: str) -> bool:
+    """Return True if ``input_arg`` names a directory or a glob pattern."""
+    return os.path.isdir(input_arg) or any(c in input_arg for c in GLOB_CHARACTERS)
+
+
+def collect_inputs(input_arg: str) -> Tuple[Path, List[Path]]:
+    """Expand a directory or glob pattern into input files.
+
+    Args:
+        input_arg: Directory (walked recursively) or glob pattern (``**``
+            matches nested directories).
+
+    Returns:
+        Tuple of (base directory mirrored in the output tree, sorted files).
+    """
+    if os.path.isdir(input_arg):
+        base = Path(input_arg)
+        files = [path for path in base.rglob('*') if path.is_file()]
+    else:
+        static = []
+        for part in Path(input_arg).parts:
+            if any(c in part for c in GLOB_CHARACTERS):
+                break
+            static.append(part)
+        base = Path(*static)
+        if len(static) == len(Path(input_arg).parts):
+            base = base.parent
+        files = [Path(path) for path in glob.glob(input_arg, recursive=True) if os.path.isfile(path)]
+    return base, sorted(files)
+
+
+def normalize_file(input_path: Path, output_path: Path, options: Dict[str, Any]) -> Dict[str, int]:
+    """Normalize one file according to ``options``.
+
+    Args:
+        input_path: Input file (may be compressed).
+        output_path: Output file (compressed according to its extension).
+        options: ``format``, ``fields`` and ``unknown_field`` settings.
+
+    Returns:
+        Statistics with ``bytes``, ``tokens`` and ``changed_tokens``.
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    stats = {'bytes': input_path.stat().st_size, 'tokens': 0, 'changed_tokens': 0}
+
+    # Write next to the target and rename, so failures leave no partial output
+    temp_path = output_path.with_name('.tmp-' + output_path.name)
+    try:
+        if options['format'] == 'text':
+            with open_text(input_path, 'r') as f:
+                original_text = f.read()
+            normalized_text = normalize_text(original_text)
+            with open_text(temp_path, 'w') as f:
+                f.write(normalized_text)
+            stats['tokens'], stats['changed_tokens'] = token_stats(original_text, normalized_text)
+        else:
+            with open_text(input_path, 'r', newline='') as infile, \
+                    open_text(temp_path, 'w', newline='') as outfile:
+                normalize_records(infile, outfile, options['format'], options['fields'],
+                                  options['unknown_field'], stats)
+        os.replace(temp_path, output_path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+    return stats
+
+
+def _init_worker(morphology: bool = False, profile: Optional[str] = None) -> None:
+    """Load the data files once per worker process."""
+    set_morphology(morphology)
+    reload_data()
+    set_profile(profile)
+
+
+Task = Tuple[Path, Path, Dict[str, Any], bool, bool]
+
+
+def _process_files(tasks: List[Task]) -> List[Dict[str, Any]]:
+    """Normalize several files in a worker, capturing errors per file.
+
+    Each task is (input, output, options, scan for manifest, build index
+    postings).
+    """
+    results = []
+    for input_path, output_path, options, scan, postings in tasks:
+        clear_unknown_variants()
+        result: Dict[str, Any] = {'input': input_path, 'output': output_path}
+        try:
+            result['stats'] = normalize_file(input_path, output_path, options)
+            result['unknown_variants'] = list(unknown_variants)
+            if scan:
+                result['scan'] = scan_input(input_path, options)
+            if postings:
+                result['postings'] = index_units(input_path, options)
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+        results.append(result)
+    return results
+
+
+def _run_tasks(tasks: List[Task], workers: int) -> Iterator[Dict[str, Any]]:
+    """Yield per-file results, using a process pool if ``workers > 1``."""
+    groups = [tasks[i:i + FILES_PER_TASK] for i in range(0, len(tasks), FILES_PER_TASK)]
+    if workers <= 1 or len(groups) <= 1:
+        for group in groups:
+            yield from _process_files(group)
+        return
+
+    profile = current_profile()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(morphology_enabled(), profile.name if profile else None)) as pool:
+        for results in pool.map(_process_files, groups):
+            yield from results
+
+
+def normalize_tree(
+    input_arg: str,
+    output_dir: Path,
+    options: Dict[str, Any],
+    workers: int = 1,
+    manifest: Optional[Manifest] = None,
+    index: Optional[TokenIndex] = None,
+) -> Dict[str, Any]:
+    """Normalize every file of a directory or glob into a mirrored tree.
+
+    Args:
+        input_arg: Input directory or glob pattern.
+        output_dir: Root of the output tree.
+        options: ``format``, ``fields`` and ``unknown_field`` settings.
+        workers: Number of worker processes.
+        manifest: Optional manifest used to skip up-to-date files.
+        index: Optional token index updated with every normalized file.
+
+    Returns:
+        Summary report (see ``format_report``).
+    """
+    start = time.perf_counter()
+    base, files = collect_inputs(input_arg)
+
+    # Never treat the output tree or the manifest itself as input
+    output_root = output_dir.resolve()
+    excluded = set()
+    if manifest:
+        excluded |= {manifest.path.resolve(), manifest.path.with_name(manifest.path.name + '.tmp').resolve()}
+    if index:
+        excluded |= {index.path.resolve(), index.path.with_name(index.path.name + '-journal').resolve()}
+    files = [
+        path for path in files
+        if output_root not in path.resolve().parents and path.resolve() not in excluded
+    ]
+
+    tasks = []
+    skipped = 0
+    for input_path in files:
+        output_path = output_dir / input_path.relative_to(base)
+        if manifest and manifest.is_current(input_path, output_path, options):
+            skipped += 1
+            continue
+        tasks.append((input_path, output_path, options, manifest is not None, index is not None))
+
+    report: Dict[str, Any] = {
+        'files': len(files),
+        'processed': 0,
+        'skipped': skipped,
+        'failed': 0,
+        'bytes': 0,
+        'tokens': 0,
+        'changed_tokens': 0,
+        'unknown_variants': [],
+        'errors': [],
+    }
+    seen_unknowns = set()
+
+    for result in _run_tasks(tasks, workers):
+        if 'error' in result:
+            report['failed'] += 1
+            report['errors'].append({'file': str(result['input']), 'error': result['error']})
+            continue
+        report['processed'] += 1
+        for key in ('bytes', 'tokens', 'changed_tokens'):
+            report[key] += result['stats'][key]
+        for variant in result['unknown_variants']:
+            if variant not in seen_unknowns:
+                seen_unknowns.add(variant)
+                report['unknown_variants'].append(variant)
+        if manifest:
+            manifest.record(result['input'], result['output'], options, result['scan'])
+        if index:
+            index.add_file(result['input'], result['output'], options, result['postings'])
+
+    if manifest:
+        manifest.save()
+
+    elapsed = time.perf_counter() - start
+    report['seconds'] = round(elapsed, 3)
+    report['files_per_second'] = round(report['processed'] / elapsed, 1) if elapsed else 0.0
+    report['tokens_per_second'] = round(report['tokens'] / elapsed, 1) if elapsed else 0.0
+    return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a batch report as a short human-readable summary."""
+    lines = [
+        "=" * 50,
+        "BATCH SUMMARY:",
+        "=" * 50,
+        f"  Files:          {report['files']} found, {report['processed']} normalized, "
+        f"{report['skipped']} up to date, {report['failed']} failed",
+        f"  Tokens:         {report['tokens']} ({report['changed_tokens']} changed)",
+        f"  Input size:     {report['bytes']} bytes",
+        f"  Time:           {report['seconds']:.2f}s "
+        f"({report['files_per_second']} files/s, {report['tokens_per_second']} tokens/s)",
+        f"  Unknown variants: {len(report['unknown_variants'])}",
+    ]
+    for error in report['errors'][:10]:
+        lines.append(f"  ! {error['file']}: {error['error']}")
+    if len(report['errors']) > 10:
+        lines.append(f"  ... and {len(report['errors']) - 10} more errors")
+    return '\n'.join(lines)
@@ -0,0 +1,117 @@
+"""Validate the variant data and report its compiled lookup table.
+
+Usage:
+    python -m cli.check_dictionary [--strict] [--json]
+
+Compiles ``data/hassaniya_variants.jsonl`` the way the normalizer loads it
+and lists every problem found. Conflicting canonical forms and cycles are
+errors; overlaps with the exception list, unmatchable variants, self-mapped
+entries and canonical forms the letter rules would rewrite are warnings.
+Exits with status 1 on errors (or on warnings with ``--strict``), so it can
+guard data changes in CI.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from normalizer.compiler import DictionaryError, compile_variants
+from normalizer.normalizer import PUNCTUATION
+from normalizer.rules import load_exceptions
+
+DEFAULT_VARIANTS = Path(__file__).parent.parent / 'data' / 'hassaniya_variants.jsonl'
+
+
+def check_dictionary(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compile variant entries and summarize the result.
+
+    Args:
+        entries: Entries with ``canonical`` and ``variants`` keys.
+
+    Returns:
+        Report with entry counts, the number of variants whose chain was
+        collapsed, and the lists of errors and warnings.
+    """
+    report: Dict[str, Any] = {
+        'entries': len(entries),
+        'variants': sum(len(entry['variants']) for entry in entries),
+        'compiled': 0,
+        'collapsed': 0,
+        'errors': [],
+        'warnings': [],
+    }
+    try:
+        compiled, report['warnings'] = compile_variants(entries, load_exceptions(), PUNCTUATION)
+    except DictionaryError as e:
+        report['errors'] = e.problems
+        return report
+
+    direct = {variant: entry['canonical'] for entry in entries for variant in entry['variants']}
+    report['compiled'] = len(compiled)
+    report['collapsed'] = sum(
+        1 for variant, canonical in direct.items() if compiled.get(variant, canonical) != canonical
+    )
+    return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a dictionary check as a short human-readable summary."""
+    lines = [
+        "=" * 50,
+        "DICTIONARY CHECK:",
+        "=" * 50,
+        f"  Entries:   {report['entries']} ({report['variants']} variants)",
+        f"  Compiled:  {report['compiled']} lookup keys, {report['collapsed']} chains collapsed",
+        f"  Errors:    {len(report['errors'])}",
+    ]
+    lines += [f"    {problem}" for problem in report['errors']]
+    lines.append(f"  Warnings:  {len(report['warnings'])}")
+    lines += [f"    {problem}" for problem in report['warnings']]
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(
+        description='Validate the variant data: conflicts, cycles, chains and overlaps.'
+    )
+    parser.add_argument(
+        '--variants',
+        default=str(DEFAULT_VARIANTS),
+        help='Variant JSONL file to check (default: the shipped data)'
+    )
+    parser.add_argument(
+        '--strict',
+        action='store_true',
+        help='Exit with an error on warnings as well'
+    )
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Print the report as JSON'
+    )
+    args = parser.parse_args()
+
+    try:
+        with open(args.variants, 'r', encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Error: Cannot read '{args.variants}': {e}", file=sys.stderr)
+        sys.exit(1)
+
+    report = check_dictionary(entries)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(report))
+
+    if report['errors'] or (args.strict and report['warnings']):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
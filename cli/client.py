@@ -0,0 +1,147 @@
+"""Thin command-line client for the normalization daemon.
+
+Usage:
+    hassaniya-normalize --in input.txt --out output.txt [options]
+    python -m cli.client --in input.txt --out output.txt [options]
+
+Takes the same arguments as ``cli.normalize_text``. If a daemon
+(``python -m cli.daemon``) is listening on the socket, the arguments and the
+working directory are sent to it and its output and exit status are
+replayed, so an invocation costs an interpreter start and one round trip
+instead of importing the package and loading the data. Otherwise, or with
+``HASSANIYA_NO_DAEMON=1``, the CLI runs in-process as before.
+
+The client only connects to a socket owned by the current user with no
+group or other permissions, in a directory no one else can write to; any
+other file at the socket path is ignored and the CLI runs in-process.
+
+Only the standard library is imported until it is known that no daemon is
+available.
+"""
+
+import json
+import os
+import socket
+import stat
+import sys
+from typing import Any, Dict, List, Optional
+
+PROTOCOL_VERSION = 1
+
+# Seconds to wait for the daemon to accept a connection
+CONNECT_TIMEOUT = 1.0
+
+
+def default_socket_path() -> str:
+    """Return ``HASSANIYA_SOCKET``, or a per-user socket path.
+
+    Without ``XDG_RUNTIME_DIR``, the socket goes in a per-user directory
+    under ``TMPDIR`` (or /tmp), which the daemon creates with mode 0700.
+    """
+    path = os.environ.get('HASSANIYA_SOCKET')
+    if path:
+        return path
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return os.path.join(runtime_dir, 'hassaniya-normalizer.sock')
+    return os.path.join(os.environ.get('TMPDIR', '/tmp'), f'hassaniya-normalizer-{os.getuid()}', 'normalizer.sock')
+
+
+def _trusted_directory(path: str) -> bool:
+    """Return True if only the current user (or root) can replace files in ``path``."""
+    try:
+        info = os.stat(path)
+    except OSError:
+        return False
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid not in (0, os.getuid()):
+        return False
+    # Others may create files in a sticky directory but not replace ours
+    return not info.st_mode & 0o022 or bool(info.st_mode & stat.S_ISVTX)
+
+
+def trusted_socket(path: str) -> bool:
+    """Return True if ``path`` is a socket that only the current user can use.
+
+    The socket must be owned by the current user, have no group or other
+    permissions and be in a directory others cannot replace it in, so that
+    arguments and file paths are never sent to a process run by someone else.
+    """
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return False
+    return (stat.S_ISSOCK(info.st_mode) and info.st_uid == os.getuid()
+            and not info.st_mode & 0o077
+            and _trusted_directory(os.path.dirname(os.path.abspath(path))))
+
+
+def send_request(request: Dict[str, Any], path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Send one request to the daemon and return its response.
+
+    Args:
+        request: Request object; ``version`` is added.
+        path: Socket path (default: ``default_socket_path()``).
+
+    Returns:
+        The response, or None if no daemon is listening, the socket is not
+        trusted (``trusted_socket``) or the daemon closed the connection
+        without answering.
+    """
+    path = path or default_socket_path()
+    if not hasattr(socket, 'AF_UNIX') or not trusted_socket(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError, socket.timeout):
+            return None
+        # The daemon may take as long as the work itself
+        sock.settimeout(None)
+        sock.sendall(json.dumps(dict(request, version=PROTOCOL_VERSION)).encode('utf-8') + b'\n')
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    except OSError:
+        return None
+    finally:
+        sock.close()
+    try:
+        return json.loads(b''.join(chunks))
+    except ValueError:
+        return None
+
+
+def run_remote(argv: List[str], path: Optional[str] = None) -> Optional[int]:
+    """Run a CLI invocation in the daemon, replaying its output.
+
+    Returns:
+        The exit status, or None if the daemon could not run it.
+    """
+    response = send_request({'op': 'run', 'argv': argv, 'cwd': os.getcwd()}, path)
+    if response is None or response.get('version') != PROTOCOL_VERSION or 'exit' not in response:
+        return None
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+    return response['exit']
+
+
+def main() -> None:
+    """Main CLI function."""
+    if not os.environ.get('HASSANIYA_NO_DAEMON'):
+        status = run_remote(sys.argv[1:])
+        if status is not None:
+            sys.exit(status)
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from cli.normalize_text import main as normalize_main
+    normalize_main()
+
+
+if __name__ == '__main__':
+    main()
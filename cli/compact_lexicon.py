@@ -0,0 +1,148 @@
+"""Report how much the lexicon shrinks with clitic-aware lookups.
+
+Usage:
+    python -m cli.compact_lexicon [--json] [--write-exceptions PATH] [--write-variants PATH]
+
+Lists every exception word and variant entry that is already covered by a
+shorter listed stem plus proclitics/enclitics, and estimates the memory the
+lookup tables would save. The compacted lists can be written out; they give
+the same results only when normalizing with ``--morphology``.
+"""
+
+import argparse
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, Union
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from normalizer import reload_data
+from normalizer.morphology import compact_exceptions, compact_variants
+from normalizer.normalizer import load_variants
+from normalizer.rules import load_exceptions
+
+# Stems listed in the summary
+TOP_STEMS = 10
+
+
+def lexicon_bytes(words: Union[Iterable[str], Dict[str, str]]) -> int:
+    """Estimate the memory of a lookup set or dict and its strings."""
+    # Built item by item, like the loaders do
+    if isinstance(words, dict):
+        container = {}
+        for key, value in words.items():
+            container[key] = value
+        strings = list(container) + list(container.values())
+    else:
+        container = set(list(words))
+        strings = list(container)
+    return sys.getsizeof(container) + sum(sys.getsizeof(s) for s in strings)
+
+
+def compaction_report() -> Dict[str, Any]:
+    """Compact the loaded exception and variant lists.
+
+    Returns:
+        Report with entry counts and memory estimates before and after, the
+        stems covering the most forms, and the compacted lists themselves
+        (``kept_exceptions``, ``kept_variants``).
+    """
+    exceptions = load_exceptions()
+    # Canonical forms map to themselves and are not variant entries
+    variants = {word: canonical for word, canonical in load_variants().items() if word != canonical}
+    kept_exceptions, removed_exceptions = compact_exceptions(exceptions)
+    kept_variants, removed_variants = compact_variants(variants)
+
+    report: Dict[str, Any] = {}
+    for name, before, kept, removed in (
+        ('exceptions', exceptions, kept_exceptions, removed_exceptions),
+        ('variants', variants, kept_variants, removed_variants),
+    ):
+        before_bytes = lexicon_bytes(before)
+        after_bytes = lexicon_bytes(kept)
+        report[name] = {
+            'entries': len(before),
+            'kept': len(kept),
+            'removed': len(removed),
+            'removed_ratio': round(len(removed) / len(before), 4) if before else 0.0,
+            'bytes_before': before_bytes,
+            'bytes_after': after_bytes,
+            'top_stems': Counter(removed.values()).most_common(TOP_STEMS),
+            'covered_by': removed,
+        }
+    report['kept_exceptions'] = kept_exceptions
+    report['kept_variants'] = kept_variants
+    return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a compaction report as a short human-readable summary."""
+    lines = [
+        "=" * 50,
+        "LEXICON COMPACTION (with --morphology):",
+        "=" * 50,
+    ]
+    for name in ('exceptions', 'variants'):
+        section = report[name]
+        lines.append(
+            f"  {name.capitalize():<11} {section['entries']} → {section['kept']} entries "
+            f"({section['removed']} covered by a stem, {section['removed_ratio']:.1%})"
+        )
+        lines.append(
+            f"  {'':<11} ~{section['bytes_before'] / 1024:.0f} KiB → ~{section['bytes_after'] / 1024:.0f} KiB"
+        )
+        for stem, count in section['top_stems']:
+            lines.append(f"  {'':<11}   {stem}: {count} forms")
+    return '\n'.join(lines)
+
+
+def write_variants(path: Path, variants: Dict[str, str]) -> None:
+    """Write a variant dictionary as JSONL grouped by canonical form."""
+    groups: Dict[str, list] = {}
+    for variant, canonical in variants.items():
+        groups.setdefault(canonical, []).append(variant)
+    with open(path, 'w', encoding='utf-8') as f:
+        for canonical, group in groups.items():
+            f.write(json.dumps({'canonical': canonical, 'variants': group}, ensure_ascii=False) + '\n')
+
+
+def main() -> None:
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(
+        description='Report how much the exception and variant lists can be compacted '
+                    'with clitic-aware lookups.'
+    )
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Print the full report (including every covered form) as JSON'
+    )
+    parser.add_argument(
+        '--write-exceptions',
+        help='Write the compacted exception list to this file (use with --morphology)'
+    )
+    parser.add_argument(
+        '--write-variants',
+        help='Write the compacted variant list to this JSONL file (use with --morphology)'
+    )
+    args = parser.parse_args()
+
+    reload_data()
+    report = compaction_report()
+
+    if args.write_exceptions:
+        with open(args.write_exceptions, 'w', encoding='utf-8') as f:
+            json.dump(report['kept_exceptions'], f, ensure_ascii=False, indent=2)
+    if args.write_variants:
+        write_variants(Path(args.write_variants), report['kept_variants'])
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Transparent compressed file access for the Hassaniya normalization CLI.
+
+Input compression is detected from magic bytes, so misnamed files still
+work; output compression is chosen by extension. Files are opened as text
+streams through the codec, so nothing is decompressed to disk.
+"""
+
+import bz2
+import gzip
+import lzma
+from pathlib import Path
+from typing import IO, Optional, Union
+
+_MAGIC_BYTES = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+)
+
+_EXTENSIONS = {
+    '.gz': 'gzip',
+    '.gzip': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+}
+
+_OPENERS = {
+    'gzip': gzip.open,
+    'bz2': bz2.open,
+    'xz': lzma.open,
+}
+
+
+def detect_compression(path: Union[str, Path], mode: str = 'r') -> Optional[str]:
+    """Detect the compression codec of a file.
+
+    Args:
+        path: File path.
+        mode: ``'r'`` to sniff magic bytes of an existing file, ``'w'`` to
+            decide from the extension only.
+
+    Returns:
+        ``'gzip'``, ``'bz2'``, ``'xz'`` or None for uncompressed files.
+    """
+    path = Path(path)
+    if mode.startswith('r'):
+        with open(path, 'rb') as f:
+            head = f.read(6)
+        for magic, codec in _MAGIC_BYTES:
+            if head.startswith(magic):
+                return codec
+        return None
+    return _EXTENSIONS.get(path.suffix.lower())
+
+
+def open_text(path: Union[str, Path], mode: str = 'r', newline: Optional[str] = None) -> IO[str]:
+    """Open a possibly compressed file as a UTF-8 text stream.
+
+    Args:
+        path: File path.
+        mode: ``'r'`` or ``'w'``.
+        newline: Passed through to the text wrapper.
+
+    Returns:
+        A text file object streaming through the detected codec.
+    """
+    codec = detect_compression(path, mode)
+    if codec is None:
+        return open(path, mode, encoding='utf-8', newline=newline)
+    return _OPENERS[codec](path, mode + 't', encoding='utf-8', newline=newline)
+
@@ -0,0 +1,187 @@
+"""Normalization daemon serving the thin CLI client over a Unix socket.
+
+Usage:
+    python -m cli.daemon [--socket PATH]
+    python -m cli.daemon --status | --stop
+
+The daemon imports the package and loads the data once, then runs each
+``hassaniya-normalize`` invocation sent by ``cli.client`` in-process: the
+client's arguments are parsed by ``cli.normalize_text`` in the client's
+working directory, and its output and exit status are sent back. Data
+files are reloaded only when they change (``refresh_data``).
+
+Invocations run one at a time, since the CLI selects morphology and the
+dictionary profile for the whole process and the daemon captures standard
+output. Files are read and written by the daemon, as the user it runs as;
+the socket is only accessible to that user, and is never created in a
+directory other users can write to (unless it is sticky).
+"""
+
+import argparse
+import io
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from normalizer import normalize_text, refresh_data
+from cli.client import PROTOCOL_VERSION, _trusted_directory, default_socket_path, send_request
+from cli.normalize_text import main as normalize_main
+
+_run_lock = threading.Lock()
+
+
+def run_cli(argv: List[str], cwd: str) -> Dict[str, Any]:
+    """Run one ``cli.normalize_text`` invocation, capturing its output.
+
+    Args:
+        argv: Command-line arguments, without the program name.
+        cwd: Working directory of the client.
+
+    Returns:
+        Dict with ``stdout``, ``stderr`` and ``exit`` status.
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with _run_lock:
+        saved_argv, saved_cwd = sys.argv, os.getcwd()
+        try:
+            os.chdir(cwd)
+            sys.argv = ['hassaniya-normalize'] + list(argv)
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                try:
+                    normalize_main()
+                    status = 0
+                except SystemExit as e:
+                    if e.code is None or isinstance(e.code, int):
+                        status = e.code or 0
+                    else:
+                        print(e.code, file=sys.stderr)
+                        status = 1
+                except Exception:
+                    traceback.print_exc()
+                    status = 1
+        except OSError as e:
+            print(f"Error: {e}", file=stderr)
+            status = 1
+        finally:
+            sys.argv = saved_argv
+            os.chdir(saved_cwd)
+    return {'stdout': stdout.getvalue(), 'stderr': stderr.getvalue(), 'exit': status}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Answer one JSON request line with one JSON response."""
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+        response: Dict[str, Any] = {'version': PROTOCOL_VERSION}
+        if request.get('version') != PROTOCOL_VERSION:
+            response['error'] = f"Unsupported protocol version {request.get('version')}"
+        elif request.get('op') == 'run':
+            response.update(run_cli(request.get('argv', []), request.get('cwd', os.getcwd())))
+        elif request.get('op') == 'status':
+            response['pid'] = os.getpid()
+        elif request.get('op') == 'stop':
+            response['pid'] = os.getpid()
+        else:
+            response['error'] = f"Unknown operation {request.get('op')!r}"
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+        if request.get('op') == 'stop' and 'error' not in response:
+            # Only after answering: handler threads end with the process
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+
+class NormalizerDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server running CLI invocations for ``cli.client``.
+
+    Args:
+        path: Socket path. A missing parent directory is created with mode
+            0700; a stale socket file left by a dead daemon is replaced.
+
+    Raises:
+        ValueError: If another daemon is listening on ``path``, or other
+            users can write to its directory.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(directory):
+            os.mkdir(directory, 0o700)
+        if not _trusted_directory(directory):
+            raise ValueError(f"'{directory}' is writable by other users; choose another socket path")
+        if os.path.lexists(path):
+            if send_request({'op': 'status'}, path) is not None:
+                raise ValueError(f"A daemon is already listening on '{path}'")
+            os.unlink(path)
+        # Only the owner may connect: requests read and write files as the daemon's user
+        umask = os.umask(0o177)
+        try:
+            super().__init__(path, _Handler)
+        finally:
+            os.umask(umask)
+        self.path = path
+        self._inode = os.stat(path).st_ino
+
+        # Load the data and warm the caches once
+        refresh_data()
+        normalize_text("هاذا قلم مدرسة", [])
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            # A daemon started while this one was stopping owns the path now
+            if os.stat(self.path).st_ino == self._inode:
+                os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def main() -> None:
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(description='Keep a warm normalizer for hassaniya-normalize.')
+    parser.add_argument('--socket', default=default_socket_path(),
+                        help='Socket path (default: $HASSANIYA_SOCKET, or per-user in $XDG_RUNTIME_DIR or a 0700 directory in /tmp)')
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument('--status', action='store_true', help='Report whether a daemon is running')
+    action.add_argument('--stop', action='store_true', help='Stop the running daemon')
+    args = parser.parse_args()
+
+    if args.status or args.stop:
+        response = send_request({'op': 'stop' if args.stop else 'status'}, args.socket)
+        if response is None:
+            print(f"No daemon listening on '{args.socket}'")
+            sys.exit(1)
+        print(f"Daemon {'stopping' if args.stop else 'running'} (pid {response['pid']}) on '{args.socket}'")
+        return
+
+    try:
+        server = NormalizerDaemon(args.socket)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"Listening on '{args.socket}' (pid {os.getpid()})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
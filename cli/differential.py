@@ -0,0 +1,508 @@
+"""Differential fuzzing of the normalization engines against the reference.
+
+Usage:
+    python -m cli.differential [--iterations N] [--seed S] [--engines a,b]
+                               [--morphology off|on|both] [--throughput] [--json]
+
+Generates random cases (Arabic, Latin, digits, punctuation and unusual
+whitespace, plus dictionary-heavy texts built from the loaded variants,
+canonical forms and exception words with clitics and punctuation attached),
+runs every engine on each case with morphology off and on, and compares
+outputs and unknown variants with ``normalizer.reference``. A mismatch is
+shrunk to a minimal case (fewer texts, fewer tokens, plain separators, fewer
+characters) before it is reported. Exits with status 1 on any mismatch.
+
+``--throughput`` also times every engine on a dictionary-heavy corpus and
+prints tokens per second relative to the reference.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from normalizer import (
+    anormalize_batch,
+    anormalize_text,
+    normalize_batch,
+    normalize_parallel,
+    normalize_text,
+    normalize_text_bulk,
+    set_morphology,
+    trace,
+)
+from normalizer.morphology import ENCLITICS, morphology_enabled
+from normalizer.normalizer import PUNCTUATION, load_variants
+from normalizer.reference import _proclitics, reference_letter_rules, reference_normalize_text
+from normalizer.rules import apply_letter_rules, load_exceptions
+from normalizer.vectorized import NUMPY_AVAILABLE, apply_letter_rules_batch
+from cli.profiling import Profiler
+
+# Outputs per text, unknown variants per text (None if the engine only
+# reports them for the whole case) and unknown variants of the whole case
+Outcome = Tuple[List[str], Optional[List[List[str]]], List[str]]
+
+ARABIC = 'ابتثجحخدذرزسشصضطظعغفقكلمنهويءآأإؤئىةگق'
+LATIN = 'abcxyzABC'
+DIGITS = '0123456789٠١٢٣'
+SYMBOLS = PUNCTUATION + '-_/«»…ـ'
+# Separators str.split() treats as whitespace, and look-alikes it does not
+WHITESPACE = [' ', ' ', ' ', '  ', '\t', '\n', '\r\n', ' ', ' ', '\x1c', '　', '\x0b']
+NON_SPACES = ['​', '‏', '‍']
+
+# Share of dictionary-heavy cases, and of cases large enough to reach the
+# vectorized path of the bulk engine
+DICTIONARY_RATIO = 0.5
+LARGE_RATIO = 0.02
+LARGE_TOKENS = 1500
+
+# Evaluations spent shrinking one mismatch
+SHRINK_BUDGET = 2000
+
+
+def _merge(unknowns: Sequence[List[str]]) -> List[str]:
+    """Merge per-text unknown variants in order of first appearance."""
+    merged: Dict[str, None] = {}
+    for found in unknowns:
+        merged.update(dict.fromkeys(found))
+    return list(merged)
+
+
+def _clean_words(texts: Sequence[str]) -> List[List[str]]:
+    """Return the punctuation-stripped words of each text."""
+    return [[w for w in (word.strip(PUNCTUATION) for word in text.split()) if w] for text in texts]
+
+
+# Engines ---------------------------------------------------------------
+
+def reference_engine(texts: List[str]) -> Outcome:
+    """Run the frozen reference on the current data and morphology setting."""
+    variants, exceptions = load_variants(), load_exceptions()
+    results = [reference_normalize_text(text, variants, exceptions, morphology_enabled()) for text in texts]
+    unknowns = [found for _, found in results]
+    return [text for text, _ in results], unknowns, _merge(unknowns)
+
+
+def _per_text(normalize: Callable[[str, List[str]], str]) -> Callable[[List[str]], Outcome]:
+    def run(texts: List[str]) -> Outcome:
+        unknowns: List[List[str]] = []
+        outputs = []
+        for text in texts:
+            found: List[str] = []
+            outputs.append(normalize(text, found))
+            unknowns.append(found)
+        return outputs, unknowns, _merge(unknowns)
+    return run
+
+
+def _batch(texts: List[str]) -> Outcome:
+    unknowns: List[List[str]] = []
+    outputs = normalize_batch(texts, unknowns)
+    return outputs, unknowns, _merge(unknowns)
+
+
+def _parallel(executor: str) -> Callable[[List[str]], Outcome]:
+    def run(texts: List[str]) -> Outcome:
+        unknowns: List[str] = []
+        outputs = normalize_parallel(texts, workers=2, unknowns=unknowns, executor=executor)
+        return outputs, None, unknowns
+    return run
+
+
+def _async_batch(texts: List[str]) -> Outcome:
+    outputs, unknowns = asyncio.run(anormalize_batch(texts, batch_size=2))
+    return outputs, unknowns, _merge(unknowns)
+
+
+def _async_text(chunk_chars: Optional[int]) -> Callable[[List[str]], Outcome]:
+    def run(texts: List[str]) -> Outcome:
+        async def gather() -> List[Tuple[str, List[str]]]:
+            if chunk_chars is None:
+                return [await anormalize_text(text) for text in texts]
+            return [await anormalize_text(text, chunk_chars=chunk_chars) for text in texts]
+        results = asyncio.run(gather())
+        unknowns = [found for _, found in results]
+        return [text for text, _ in results], unknowns, _merge(unknowns)
+    return run
+
+
+def _profiler(texts: List[str]) -> Outcome:
+    return _per_text(Profiler().normalize)(texts)
+
+
+def _traced(texts: List[str]) -> Outcome:
+    with trace(lambda event: None):
+        return _batch(texts)
+
+
+def _rules(apply: Callable[[List[str]], List[str]]) -> Callable[[List[str]], Outcome]:
+    def run(texts: List[str]) -> Outcome:
+        return [' '.join(apply(words)) for words in _clean_words(texts)], None, []
+    return run
+
+
+def reference_rules(texts: List[str]) -> Outcome:
+    """Run the reference letter rules on the clean words of each text."""
+    exceptions = load_exceptions()
+    return [
+        ' '.join(reference_letter_rules(word, exceptions, morphology_enabled()) for word in words)
+        for words in _clean_words(texts)
+    ], None, []
+
+
+# name -> (engine, reference it must match)
+ENGINES: Dict[str, Tuple[Callable[[List[str]], Outcome], Callable[[List[str]], Outcome]]] = {
+    'text': (_per_text(normalize_text), reference_engine),
+    'batch': (_batch, reference_engine),
+    'bulk': (_per_text(normalize_text_bulk), reference_engine),
+    'parallel-thread': (_parallel('thread'), reference_engine),
+    'parallel-process': (_parallel('process'), reference_engine),
+    'async-batch': (_async_batch, reference_engine),
+    # Tiny chunks exercise the chunk boundaries
+    'async-text': (_async_text(16), reference_engine),
+    'profiler': (_profiler, reference_engine),
+    # Instrumented path taken while a tracer is active
+    'traced': (_traced, reference_engine),
+    'rules': (_rules(lambda words: [apply_letter_rules(word) for word in words]), reference_rules),
+}
+if NUMPY_AVAILABLE:
+    ENGINES['vectorized'] = (_rules(lambda words: apply_letter_rules_batch(words, min_words=0)), reference_rules)
+
+# Engines timed differently from how they are fuzzed
+THROUGHPUT_ENGINES = {'async-text': _async_text(None)}
+
+# Starting a process pool per case is slow, so it only runs when asked for
+DEFAULT_ENGINES = [name for name in ENGINES if name != 'parallel-process']
+
+
+# Case generation -------------------------------------------------------
+
+class CaseGenerator:
+    """Random normalization cases (lists of texts).
+
+    Args:
+        rng: Random number generator.
+    """
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        variants = load_variants()
+        self.lexicon = sorted(set(variants) | set(variants.values()))
+        self.exceptions = sorted(load_exceptions())
+        self.proclitics = _proclitics()
+
+    def random_token(self) -> str:
+        rng = self.rng
+        pools = [ARABIC] * 6 + [LATIN, DIGITS, SYMBOLS]
+        token = ''.join(rng.choice(rng.choice(pools)) for _ in range(rng.randint(1, 8)))
+        if rng.random() < 0.05:
+            token += rng.choice(NON_SPACES)
+        if rng.random() < 0.01:
+            token += '\ud800'
+        return token
+
+    def dictionary_token(self) -> str:
+        rng = self.rng
+        word = rng.choice(self.lexicon if rng.random() < 0.5 or not self.exceptions else self.exceptions)
+        if rng.random() < 0.3:
+            word = rng.choice(self.proclitics) + word
+        if rng.random() < 0.3:
+            word += rng.choice(ENCLITICS)
+        if rng.random() < 0.2:
+            word = word.replace('ك', rng.choice('گق'), 1)
+        if rng.random() < 0.1:
+            word += 'ة'
+        if rng.random() < 0.2:
+            word = rng.choice(SYMBOLS) + word
+        if rng.random() < 0.2:
+            word += ''.join(rng.choice(SYMBOLS) for _ in range(rng.randint(1, 2)))
+        return word
+
+    def text(self, tokens: int, dictionary: bool) -> str:
+        rng = self.rng
+        parts = []
+        if rng.random() < 0.1:
+            parts.append(rng.choice(WHITESPACE))
+        for i in range(tokens):
+            if i:
+                parts.append(rng.choice(WHITESPACE))
+            use_dictionary = dictionary and rng.random() < 0.8
+            parts.append(self.dictionary_token() if use_dictionary else self.random_token())
+        if rng.random() < 0.1:
+            parts.append(rng.choice(WHITESPACE))
+        return ''.join(parts)
+
+    def case(self) -> List[str]:
+        rng = self.rng
+        dictionary = rng.random() < DICTIONARY_RATIO
+        if rng.random() < LARGE_RATIO:
+            return [self.text(LARGE_TOKENS, True)]
+        texts = []
+        for _ in range(rng.randint(1, 4)):
+            texts.append('' if rng.random() < 0.05 else self.text(rng.randint(0, 12), dictionary))
+        return texts
+
+
+# Comparison and shrinking ----------------------------------------------
+
+def compare(engine: str, texts: List[str]) -> Optional[Dict[str, Any]]:
+    """Run one engine and its reference on a case.
+
+    Returns:
+        None if they agree, otherwise a description of the difference.
+    """
+    run, reference = ENGINES[engine]
+    expected = reference(list(texts))
+    try:
+        actual = run(list(texts))
+    except Exception as e:
+        return {'expected': expected, 'error': f"{type(e).__name__}: {e}"}
+    outputs, per_text, merged = actual
+    if outputs != expected[0] or merged != expected[2] or (per_text is not None and per_text != expected[1]):
+        return {'expected': expected, 'actual': actual}
+    return None
+
+
+def _tokens(text: str) -> List[str]:
+    """Split a text into alternating separators and words (separators first)."""
+    parts, current, is_space = [], '', True
+    for char in text:
+        if (char.isspace() or char in '\x1c\x1d\x1e\x1f') != is_space:
+            parts.append(current)
+            current, is_space = '', not is_space
+        current += char
+    parts.append(current)
+    return parts
+
+
+def shrink(engine: str, texts: List[str], budget: int = SHRINK_BUDGET) -> List[str]:
+    """Reduce a failing case while the engine still disagrees with the reference."""
+    evaluations = 0
+
+    def fails(candidate: List[str]) -> bool:
+        nonlocal evaluations
+        evaluations += 1
+        return compare(engine, candidate) is not None
+
+    texts = list(texts)
+    changed = True
+    while changed and evaluations < budget:
+        changed = False
+
+        # Drop whole texts
+        for i in range(len(texts) - 1, -1, -1):
+            if len(texts) > 1 and fails(texts[:i] + texts[i + 1:]):
+                texts = texts[:i] + texts[i + 1:]
+                changed = True
+
+        for t in range(len(texts)):
+            # Drop runs of words (halves first), with the separator before each
+            parts = _tokens(texts[t])
+            size = max(len(parts) // 2, 1)
+            while size >= 1 and evaluations < budget:
+                i = 1
+                while i < len(parts) and evaluations < budget:
+                    candidate = parts[:max(i - 1, 0)] + parts[i + 2 * size - 1:]
+                    if len(candidate) < len(parts) and fails(texts[:t] + [''.join(candidate)] + texts[t + 1:]):
+                        parts = candidate
+                        changed = True
+                    else:
+                        i += 2
+                size //= 2
+
+            # Plain separators
+            for i in range(0, len(parts), 2):
+                if parts[i] not in ('', ' '):
+                    candidate = parts[:i] + [' ' if i else ''] + parts[i + 1:]
+                    if fails(texts[:t] + [''.join(candidate)] + texts[t + 1:]):
+                        parts = candidate
+                        changed = True
+
+            # Fewer characters in each word
+            for i in range(1, len(parts), 2):
+                j = 0
+                while j < len(parts[i]) and len(parts[i]) > 1 and evaluations < budget:
+                    word = parts[i][:j] + parts[i][j + 1:]
+                    candidate = parts[:i] + [word] + parts[i + 1:]
+                    if fails(texts[:t] + [''.join(candidate)] + texts[t + 1:]):
+                        parts = candidate
+                        changed = True
+                    else:
+                        j += 1
+            texts[t] = ''.join(parts)
+    return texts
+
+
+def run_fuzz(
+    iterations: int,
+    seed: int = 0,
+    engines: Optional[List[str]] = None,
+    morphology: Sequence[bool] = (False, True),
+) -> List[Dict[str, Any]]:
+    """Fuzz the engines against the reference.
+
+    Args:
+        iterations: Cases generated (each runs under every morphology setting).
+        seed: Random seed; the same seed generates the same cases.
+        engines: Engine names (default: ``DEFAULT_ENGINES``).
+        morphology: Morphology settings to test.
+
+    Returns:
+        One shrunk mismatch report per failing (engine, morphology) pair.
+    """
+    engines = engines or DEFAULT_ENGINES
+    rng = random.Random(seed)
+    generator = CaseGenerator(rng)
+    mismatches: Dict[Tuple[str, bool], Dict[str, Any]] = {}
+    previous = morphology_enabled()
+    try:
+        for iteration in range(iterations):
+            texts = generator.case()
+            for enabled in morphology:
+                set_morphology(enabled)
+                for engine in engines:
+                    if (engine, enabled) in mismatches or compare(engine, texts) is None:
+                        continue
+                    minimal = shrink(engine, texts)
+                    mismatches[(engine, enabled)] = {
+                        'engine': engine,
+                        'morphology': enabled,
+                        'iteration': iteration,
+                        'case': minimal,
+                        **compare(engine, minimal),
+                    }
+    finally:
+        set_morphology(previous)
+    return list(mismatches.values())
+
+
+# Throughput ------------------------------------------------------------
+
+def throughput(
+    engines: Optional[List[str]] = None,
+    tokens: int = 100_000,
+    seed: int = 0,
+    line_tokens: int = 20,
+) -> List[Dict[str, Any]]:
+    """Time the engines on a dictionary-heavy corpus split into lines.
+
+    Returns:
+        One row per engine (the reference first) with seconds, tokens per
+        second, speedup over the reference and whether the outputs matched.
+        The rule engines only rewrite clean words, so their speedup is not
+        comparable with the text engines'.
+    """
+    engines = engines or list(ENGINES)
+    generator = CaseGenerator(random.Random(seed))
+    texts = [generator.text(line_tokens, True) for _ in range(max(tokens // line_tokens, 1))]
+    total = sum(len(text.split()) for text in texts)
+
+    rows = []
+    timings = {}
+    for name in ['reference'] + engines:
+        if name == 'reference':
+            run = reference_engine
+        else:
+            run = THROUGHPUT_ENGINES.get(name, ENGINES[name][0])
+        start = time.perf_counter()
+        outcome = run(list(texts))
+        seconds = time.perf_counter() - start
+        timings[name] = seconds
+        if name == 'reference':
+            matches = True
+        else:
+            expected = ENGINES[name][1](list(texts))
+            matches = outcome[0] == expected[0] and outcome[2] == expected[2]
+        rows.append({
+            'engine': name,
+            'seconds': round(seconds, 4),
+            'tokens_per_second': round(total / seconds, 1) if seconds else 0.0,
+            'speedup': round(timings['reference'] / seconds, 2) if seconds else 0.0,
+            'matches': matches,
+        })
+    return rows
+
+
+def format_mismatch(mismatch: Dict[str, Any]) -> str:
+    """Render a mismatch report."""
+    lines = [
+        f"MISMATCH: {mismatch['engine']} (morphology {'on' if mismatch['morphology'] else 'off'}, "
+        f"case {mismatch['iteration']})",
+        f"  case:     {mismatch['case']!r}",
+        f"  expected: {mismatch['expected']!r}",
+    ]
+    if 'error' in mismatch:
+        lines.append(f"  error:    {mismatch['error']}")
+    else:
+        lines.append(f"  actual:   {mismatch['actual']!r}")
+    return '\n'.join(lines)
+
+
+def format_throughput(rows: List[Dict[str, Any]]) -> str:
+    """Render the throughput table."""
+    lines = [
+        f"  {'engine':<18} {'seconds':>9} {'tokens/s':>12} {'speedup':>8}  match",
+    ]
+    for row in rows:
+        lines.append(
+            f"  {row['engine']:<18} {row['seconds']:>9.4f} {row['tokens_per_second']:>12,.0f} "
+            f"{row['speedup']:>7.2f}x  {'yes' if row['matches'] else 'NO'}"
+        )
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(
+        description='Fuzz every normalization engine against the frozen reference implementation.'
+    )
+    parser.add_argument('--iterations', type=int, default=1000, help='Random cases to generate (default: 1000)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument(
+        '--engines',
+        help=f"Comma-separated engines (default: all but parallel-process; available: {', '.join(ENGINES)})"
+    )
+    parser.add_argument(
+        '--morphology',
+        choices=['off', 'on', 'both'],
+        default='both',
+        help='Morphology settings to test (default: both)'
+    )
+    parser.add_argument('--throughput', action='store_true', help='Also print a throughput table per engine')
+    parser.add_argument('--tokens', type=int, default=100_000, help='Tokens in the throughput corpus (default: 100000)')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    engines = None
+    if args.engines:
+        engines = [name.strip() for name in args.engines.split(',') if name.strip()]
+        unknown = [name for name in engines if name not in ENGINES]
+        if unknown:
+            parser.error(f"unknown engines: {', '.join(unknown)}")
+    morphology = {'off': (False,), 'on': (True,), 'both': (False, True)}[args.morphology]
+
+    mismatches = run_fuzz(args.iterations, args.seed, engines, morphology)
+    rows = throughput(engines, args.tokens, args.seed) if args.throughput else None
+
+    if args.json:
+        print(json.dumps({'mismatches': mismatches, 'throughput': rows}, ensure_ascii=False, indent=2))
+    else:
+        for mismatch in mismatches:
+            print(format_mismatch(mismatch))
+        print(f"{len(mismatches)} mismatching engine(s) in {args.iterations} cases "
+              f"(engines: {', '.join(engines or DEFAULT_ENGINES)})")
+        if rows:
+            print(format_throughput(rows))
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
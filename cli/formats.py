@@ -0,0 +1,386 @@
+"""Structured input formats for the Hassaniya normalization CLI.
+
+Records are streamed one at a time: only the selected fields are normalized
+and every other field is left untouched. Records whose selected fields do not
+change are written back verbatim.
+
+Transcripts (SRT, WebVTT, TextGrid; see ``cli.transcripts``) are streamed by
+cue: only the cue texts are normalized, a few hundred at a time in one
+``normalize_batch`` call, and everything else is written back verbatim.
+"""
+
+import csv
+import io
+import json
+import sys
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from normalizer import normalize_batch, normalize_text, unknown_variants
+from cli.transcripts import TRANSCRIPT_FORMATS, decode_payload, encode_payload, iter_cues
+
+STRUCTURED_FORMATS = ('jsonl', 'csv', 'tsv')
+
+# Cue texts normalized per batch; bounds the cues held in memory
+TEXTS_PER_BATCH = 512
+
+# Signature of normalize_text: (text, unknowns) -> normalized text
+Normalize = Callable[[str, List[str]], str]
+
+
+def token_stats(original: str, normalized: str) -> Tuple[int, int]:
+    """Count tokens and changed tokens between a text and its normalization.
+
+    Returns:
+        Tuple of (token count, number of tokens that changed).
+    """
+    original_words = original.split()
+    changed = sum(1 for before, after in zip(original_words, normalized.split()) if before != after)
+    return len(original_words), changed
+
+
+def _normalize_field(value: str, record_unknowns: List[str], stats: Optional[Dict[str, int]],
+                     normalize: Normalize = normalize_text) -> str:
+    """Normalize one field value, updating token statistics."""
+    normalized = normalize(value, record_unknowns)
+    if stats is not None:
+        tokens, changed = token_stats(value, normalized)
+        stats['tokens'] = stats.get('tokens', 0) + tokens
+        stats['changed_tokens'] = stats.get('changed_tokens', 0) + changed
+    return normalized
+
+
+def _track_unknowns(record_unknowns: List[str]) -> None:
+    """Merge a record's unknown variants into the module-level list."""
+    for word in record_unknowns:
+        if word not in unknown_variants:
+            unknown_variants.append(word)
+
+
+def _parse_record(line: str, line_number: int) -> Dict:
+    """Parse one JSON Lines record, raising ValueError with the line number."""
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Line {line_number}: invalid JSON ({e})") from e
+    if not isinstance(record, dict):
+        raise ValueError(f"Line {line_number}: expected a JSON object")
+    return record
+
+
+def _column_indices(header: List[str], fields: List[str]) -> List[int]:
+    """Return the positions of ``fields`` in a CSV/TSV header."""
+    missing = [field for field in fields if field not in header]
+    if missing:
+        raise ValueError(f"Unknown column(s): {', '.join(missing)}")
+    return [header.index(field) for field in fields]
+
+
+def normalize_jsonl(
+    lines: Iterable[str],
+    fields: List[str],
+    unknown_field: Optional[str] = None,
+    stats: Optional[Dict[str, int]] = None,
+    normalize: Normalize = normalize_text,
+) -> Iterator[str]:
+    """Normalize selected fields of JSON Lines records.
+
+    Args:
+        lines: Input lines, one JSON object per line.
+        fields: Top-level keys whose string values should be normalized.
+        unknown_field: Optional key receiving the record's unknown variants.
+        stats: Optional dict accumulating ``tokens`` and ``changed_tokens``.
+        normalize: Function normalizing one field value, with the signature
+            of ``normalize_text``.
+
+    Yields:
+        Output lines, including their line endings.
+
+    Raises:
+        ValueError: If a line is not a JSON object.
+    """
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            yield line
+            continue
+
+        record = _parse_record(line, line_number)
+        record_unknowns: List[str] = []
+        changed = False
+        for field in fields:
+            value = record.get(field)
+            if isinstance(value, str):
+                normalized = _normalize_field(value, record_unknowns, stats, normalize)
+                if normalized != value:
+                    record[field] = normalized
+                    changed = True
+        _track_unknowns(record_unknowns)
+
+        if unknown_field:
+            record[unknown_field] = record_unknowns
+            changed = True
+
+        if not changed:
+            yield line
+            continue
+
+        ending = line[len(line.rstrip('\r\n')):] or '\n'
+        yield json.dumps(record, ensure_ascii=False) + ending
+
+
+def _recording(lines: Iterable[str], consumed: List[str]) -> Iterator[str]:
+    """Yield lines unchanged while remembering them in ``consumed``."""
+    for line in lines:
+        consumed.append(line)
+        yield line
+
+
+def normalize_delimited(
+    lines: Iterable[str],
+    fields: List[str],
+    delimiter: str = ',',
+    unknown_field: Optional[str] = None,
+    stats: Optional[Dict[str, int]] = None,
+    normalize: Normalize = normalize_text,
+) -> Iterator[str]:
+    """Normalize selected columns of CSV/TSV records with a header row.
+
+    Args:
+        lines: Input lines, as returned by iterating over a file opened
+            with ``newline=''``.
+        fields: Column names whose values should be normalized.
+        delimiter: Field delimiter (``','`` for CSV, ``'\\t'`` for TSV).
+        unknown_field: Optional column appended with the record's unknown
+            variants, joined by spaces.
+        stats: Optional dict accumulating ``tokens`` and ``changed_tokens``.
+        normalize: Function normalizing one field value, with the signature
+            of ``normalize_text``.
+
+    Yields:
+        Output text chunks, one per record.
+
+    Raises:
+        ValueError: If the header is missing or a field is not a column.
+    """
+    consumed: List[str] = []
+    reader = csv.reader(_recording(lines, consumed), delimiter=delimiter)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator='\n')
+
+    def render(row: List[str]) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        return buffer.getvalue()
+
+    header = next(reader, None)
+    if header is None:
+        return
+    indices = _column_indices(header, fields)
+
+    if unknown_field:
+        yield render(header + [unknown_field])
+    else:
+        yield ''.join(consumed)
+    consumed.clear()
+
+    for row in reader:
+        record_unknowns: List[str] = []
+        changed = False
+        for index in indices:
+            if index < len(row):
+                normalized = _normalize_field(row[index], record_unknowns, stats, normalize)
+                if normalized != row[index]:
+                    row[index] = normalized
+                    changed = True
+        _track_unknowns(record_unknowns)
+
+        if unknown_field:
+            yield render(row + [' '.join(record_unknowns)])
+        elif changed:
+            yield render(row)
+        else:
+            yield ''.join(consumed)
+        consumed.clear()
+
+
+def _normalize_cues(units: List[List[str]], fmt: str, stats: Optional[Dict[str, int]],
+                    normalize: Optional[Normalize]) -> Iterator[str]:
+    """Normalize the payloads of transcript units and yield the units."""
+    texts = [decode_payload(piece, fmt) for pieces in units for piece in pieces[1::2]]
+    if normalize is None:
+        results = normalize_batch(texts)
+    else:
+        results = []
+        for text in texts:
+            text_unknowns: List[str] = []
+            results.append(normalize(text, text_unknowns))
+            _track_unknowns(text_unknowns)
+
+    position = 0
+    for pieces in units:
+        for index in range(1, len(pieces), 2):
+            text, normalized = texts[position], results[position]
+            position += 1
+            if stats is not None:
+                tokens, changed = token_stats(text, normalized)
+                stats['tokens'] = stats.get('tokens', 0) + tokens
+                stats['changed_tokens'] = stats.get('changed_tokens', 0) + changed
+            # Keep the original spacing of texts the normalizer left unchanged
+            if normalized != ' '.join(text.split()):
+                pieces[index] = encode_payload(normalized, fmt)
+        yield ''.join(pieces)
+
+
+def normalize_transcript(
+    lines: Iterable[str],
+    fmt: str,
+    stats: Optional[Dict[str, int]] = None,
+    normalize: Optional[Normalize] = None,
+) -> Iterator[str]:
+    """Normalize the cue texts of an SRT, WebVTT or TextGrid transcript.
+
+    Cue numbers, timestamps, markup, line breaks and every other part of the
+    file are written back unchanged.
+
+    Args:
+        lines: Input lines, as returned by iterating over a file opened
+            with ``newline=''``.
+        fmt: One of ``TRANSCRIPT_FORMATS``.
+        stats: Optional dict accumulating ``tokens`` and ``changed_tokens``.
+        normalize: Function normalizing one text, with the signature of
+            ``normalize_text`` (default: batched ``normalize_batch`` calls).
+
+    Yields:
+        Output text chunks, one per unit (see ``cli.transcripts``).
+    """
+    pending: List[List[str]] = []
+    texts = 0
+    for pieces in iter_cues(lines, fmt):
+        pending.append(pieces)
+        texts += len(pieces) // 2
+        if texts >= TEXTS_PER_BATCH:
+            yield from _normalize_cues(pending, fmt, stats, normalize)
+            pending = []
+            texts = 0
+    yield from _normalize_cues(pending, fmt, stats, normalize)
+
+
+def normalize_records(
+    input_file: TextIO,
+    output_file: TextIO,
+    fmt: str,
+    fields: List[str],
+    unknown_field: Optional[str] = None,
+    stats: Optional[Dict[str, int]] = None,
+    normalize: Normalize = normalize_text,
+) -> int:
+    """Stream records from ``input_file`` to ``output_file``.
+
+    Args:
+        input_file: Text file opened with ``newline=''`` (or its lines).
+        output_file: Text file opened with ``newline=''``.
+        fmt: One of ``STRUCTURED_FORMATS`` or ``TRANSCRIPT_FORMATS``.
+        fields: Names of the fields to normalize (ignored for transcripts).
+        unknown_field: Optional field receiving per-record unknown variants.
+        stats: Optional dict accumulating ``tokens`` and ``changed_tokens``.
+        normalize: Function normalizing one field value, with the signature
+            of ``normalize_text``.
+
+    Returns:
+        Number of output chunks written.
+    """
+    if fmt in TRANSCRIPT_FORMATS:
+        chunks = normalize_transcript(input_file, fmt, stats, None if normalize is normalize_text else normalize)
+    elif fmt == 'jsonl':
+        chunks = normalize_jsonl(input_file, fields, unknown_field, stats, normalize)
+    elif fmt in ('csv', 'tsv'):
+        delimiter = '\t' if fmt == 'tsv' else ','
+        chunks = normalize_delimited(input_file, fields, delimiter, unknown_field, stats, normalize)
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    count = 0
+    for chunk in chunks:
+        output_file.write(chunk)
+        count += 1
+    return count
+
+
+def split_units(lines: Iterable[str], fmt: str) -> Iterator[str]:
+    """Split input or output text into units written as one output chunk.
+
+    A unit is a line for plain text and JSONL, a record (possibly spanning
+    several lines) for CSV/TSV, the header being the first unit, and a cue
+    block or TextGrid line for transcripts. Normalized output splits into the
+    same units as its input.
+
+    Args:
+        lines: Lines of a file opened with ``newline=''``.
+        fmt: ``'text'``, or one of ``STRUCTURED_FORMATS`` or
+            ``TRANSCRIPT_FORMATS``.
+
+    Yields:
+        The raw text of each unit.
+    """
+    if fmt in ('text', 'jsonl'):
+        yield from lines
+        return
+    if fmt in TRANSCRIPT_FORMATS:
+        for pieces in iter_cues(lines, fmt):
+            yield ''.join(pieces)
+        return
+
+    consumed: List[str] = []
+    for _ in csv.reader(_recording(lines, consumed), delimiter='\t' if fmt == 'tsv' else ','):
+        yield ''.join(consumed)
+        consumed.clear()
+
+
+def iter_units(lines: Iterable[str], fmt: str, fields: List[str]) -> Iterator[Tuple[str, List[str]]]:
+    """Split input into units along with the texts normalized in each.
+
+    Args:
+        lines: Lines of a file opened with ``newline=''``.
+        fmt: ``'text'``, or one of ``STRUCTURED_FORMATS`` or
+            ``TRANSCRIPT_FORMATS``.
+        fields: Selected fields (ignored for plain text and transcripts).
+
+    Yields:
+        Tuples of (raw unit text, texts passed to the normalizer).
+
+    Raises:
+        ValueError: If a record cannot be parsed.
+    """
+    if fmt == 'text':
+        for line in lines:
+            yield line, [line]
+        return
+
+    if fmt in TRANSCRIPT_FORMATS:
+        for pieces in iter_cues(lines, fmt):
+            yield ''.join(pieces), [decode_payload(piece, fmt) for piece in pieces[1::2]]
+        return
+
+    if fmt == 'jsonl':
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                yield line, []
+                continue
+            record = _parse_record(line, line_number)
+            yield line, [record[field] for field in fields if isinstance(record.get(field), str)]
+        return
+
+    consumed: List[str] = []
+    reader = csv.reader(_recording(lines, consumed), delimiter='\t' if fmt == 'tsv' else ',')
+    indices: Optional[List[int]] = None
+    for row in reader:
+        if indices is None:
+            indices = _column_indices(row, fields)
+            texts = []
+        else:
+            texts = [row[index] for index in indices if index < len(row)]
+        yield ''.join(consumed), texts
+        consumed.clear()
@@ -0,0 +1,217 @@
+"""On-disk inverted token index of normalized files.
+
+The index maps every lookup token of the normalized inputs to the files and
+units (lines for plain text and JSONL, records for CSV/TSV) it occurs in. It
+is stored in SQLite together with a snapshot of the data each file was
+normalized with (including its dictionary profile and morphology setting), so
+that after a dictionary change ``apply-delta`` can find
+and re-normalize only the units containing words whose mapping changed.
+
+Plain-text output is written as a single line, so plain-text files are
+re-normalized as a whole when any of their words is affected.
+"""
+
+import json
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from normalizer.morphology import morphology_enabled
+from normalizer.profiles import current_profile
+from cli.compression import open_text
+from cli.formats import iter_units
+from cli.manifest import clean_tokens, data_snapshot, snapshot_fingerprint
+
+# Maximum number of parameters per SQLite query
+_QUERY_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    fingerprint TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    input TEXT UNIQUE NOT NULL,
+    output TEXT NOT NULL,
+    options TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    token TEXT NOT NULL,
+    file_id INTEGER NOT NULL,
+    unit INTEGER NOT NULL,
+    PRIMARY KEY (token, file_id, unit)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_file ON postings (file_id);
+"""
+
+
+def index_units(path: Union[str, Path], options: Dict[str, Any]) -> Dict[str, List[int]]:
+    """Collect the units each lookup token of an input file occurs in.
+
+    Args:
+        path: Input file (may be compressed).
+        options: ``format`` and ``fields`` of the normalization.
+
+    Returns:
+        Mapping of token to sorted unit numbers. Plain-text files have a
+        single unit, 0.
+    """
+    postings: Dict[str, List[int]] = {}
+    whole_file = options['format'] == 'text'
+    with open_text(path, 'r', newline='') as f:
+        for unit, (_, texts) in enumerate(iter_units(f, options['format'], options['fields'])):
+            unit = 0 if whole_file else unit
+            for token in clean_tokens(texts):
+                units = postings.setdefault(token, [])
+                if not units or units[-1] != unit:
+                    units.append(unit)
+    return postings
+
+
+class TokenIndex:
+    """SQLite-backed inverted index of normalized files.
+
+    Args:
+        path: Location of the index database. It is created if missing.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.path))
+        self.connection.executescript(_SCHEMA)
+        # (fingerprint, snapshot) per morphology setting and profile
+        self._snapshots: Dict[Tuple[bool, Optional[str]], Tuple[str, Dict[str, Any]]] = {}
+
+    def close(self) -> None:
+        """Commit pending changes and close the database."""
+        self.connection.commit()
+        self.connection.close()
+
+    def __enter__(self) -> 'TokenIndex':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _current(self) -> Tuple[str, Dict[str, Any]]:
+        """Return the fingerprint and snapshot for the selected settings."""
+        profile = current_profile()
+        key = (morphology_enabled(), profile.name if profile else None)
+        current = self._snapshots.get(key)
+        if current is None:
+            snapshot = data_snapshot()
+            current = self._snapshots[key] = (snapshot_fingerprint(snapshot), snapshot)
+            self.connection.execute(
+                "INSERT OR IGNORE INTO snapshots (fingerprint, data) VALUES (?, ?)",
+                (current[0], json.dumps(snapshot, ensure_ascii=False)),
+            )
+        return current
+
+    @property
+    def fingerprint(self) -> str:
+        """Fingerprint of the loaded data with the selected settings, stored on first use."""
+        return self._current()[0]
+
+    @property
+    def snapshot(self) -> Dict[str, Any]:
+        """Snapshot of the currently loaded data, with the selected settings."""
+        return self._current()[1]
+
+    def add_file(self, input_path: Union[str, Path], output_path: Union[str, Path],
+                 options: Dict[str, Any], postings: Optional[Dict[str, List[int]]] = None) -> None:
+        """Index a file normalized with the currently loaded data.
+
+        Args:
+            input_path: Input file.
+            output_path: Output file written for it.
+            options: Normalization options used.
+            postings: Result of ``index_units`` if already computed; the
+                input is scanned otherwise.
+        """
+        input_path = Path(input_path).resolve()
+        if postings is None:
+            postings = index_units(input_path, options)
+        stat = input_path.stat()
+
+        file_id = self._file_id(input_path)
+        if file_id is not None:
+            self.connection.execute("DELETE FROM postings WHERE file_id = ?", (file_id,))
+            self.connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+        cursor = self.connection.execute(
+            "INSERT INTO files (input, output, options, size, mtime_ns, data) VALUES (?, ?, ?, ?, ?, ?)",
+            (input_path.as_posix(), Path(output_path).resolve().as_posix(),
+             json.dumps(options, ensure_ascii=False), stat.st_size, stat.st_mtime_ns, self.fingerprint),
+        )
+        self.connection.executemany(
+            "INSERT INTO postings (token, file_id, unit) VALUES (?, ?, ?)",
+            ((token, cursor.lastrowid, unit) for token, units in postings.items() for unit in units),
+        )
+
+    def _file_id(self, input_path: Path) -> Optional[int]:
+        row = self.connection.execute("SELECT id FROM files WHERE input = ?", (input_path.as_posix(),)).fetchone()
+        return row[0] if row else None
+
+    def files(self) -> List[Dict[str, Any]]:
+        """Return all indexed files."""
+        rows = self.connection.execute("SELECT id, input, output, options, size, mtime_ns, data FROM files")
+        return [
+            {
+                'id': row[0], 'input': Path(row[1]), 'output': Path(row[2]),
+                'options': json.loads(row[3]), 'size': row[4], 'mtime_ns': row[5], 'data': row[6],
+            }
+            for row in rows
+        ]
+
+    def load_snapshot(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Return a stored data snapshot by fingerprint."""
+        row = self.connection.execute("SELECT data FROM snapshots WHERE fingerprint = ?", (fingerprint,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def lookup(self, tokens: Iterable[str], file_ids: Set[int]) -> Dict[int, Set[int]]:
+        """Return the units of ``file_ids`` containing any of ``tokens``.
+
+        Returns:
+            Mapping of file id to the set of affected unit numbers.
+        """
+        tokens = list(tokens)
+        affected: Dict[int, Set[int]] = {}
+        for i in range(0, len(tokens), _QUERY_BATCH):
+            batch = tokens[i:i + _QUERY_BATCH]
+            placeholders = ','.join('?' * len(batch))
+            rows = self.connection.execute(
+                f"SELECT file_id, unit FROM postings WHERE token IN ({placeholders})", batch
+            )
+            for file_id, unit in rows:
+                if file_id in file_ids:
+                    affected.setdefault(file_id, set()).add(unit)
+        return affected
+
+    def mark_current(self, file_id: int, size: int, mtime_ns: int) -> None:
+        """Record that a file's output matches the currently loaded data."""
+        self.connection.execute(
+            "UPDATE files SET data = ?, size = ?, mtime_ns = ? WHERE id = ?",
+            (self.fingerprint, size, mtime_ns, file_id),
+        )
+
+    def prune_snapshots(self) -> None:
+        """Delete snapshots no indexed file refers to any more."""
+        current = [self.fingerprint] + [fingerprint for fingerprint, _ in self._snapshots.values()]
+        placeholders = ','.join('?' * len(current))
+        self.connection.execute(
+            "DELETE FROM snapshots WHERE fingerprint NOT IN (SELECT DISTINCT data FROM files) "
+            f"AND fingerprint NOT IN ({placeholders})", current
+        )
+
+    def stats(self) -> Tuple[int, int]:
+        """Return (number of files, number of postings)."""
+        files = self.connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        postings = self.connection.execute("SELECT COUNT(*) FROM postings").fetchone()[0]
+        return files, postings
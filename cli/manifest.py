@@ -0,0 +1,285 @@
+"""Manifest for incremental re-normalization of a corpus.
+
+The manifest records, for every input file, its size, modification time and
+content hash, the options and output it was normalized to, and the data
+fingerprint (variants, exceptions and letter-rule version) that produced the
+output. A Bloom filter of the file's tokens is stored alongside, together
+with a snapshot of the data used by the last run.
+
+A file is skipped when its input, options and output are unchanged and
+either the data is unchanged or none of the dictionary keys that changed
+since the snapshot can occur in the file. After a lexicon update only the
+files containing affected words are normalized again.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Set, Tuple, Union
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from normalizer.morphology import morphology_enabled, stems
+from normalizer.normalizer import PUNCTUATION, load_variants
+from normalizer.rules import RULES_VERSION, load_exceptions
+from cli.compression import open_text
+from cli.formats import iter_units
+
+MANIFEST_VERSION = 1
+
+
+class TokenFilter:
+    """Bloom filter over the clean tokens of a file.
+
+    False positives only cause a file to be normalized again, so the filter
+    is sized for roughly a 1% false-positive rate.
+    """
+
+    NUM_HASHES = 7
+    BITS_PER_TOKEN = 10
+
+    def __init__(self, size_bits: int, bits: Optional[bytearray] = None):
+        self.size_bits = size_bits
+        self.bits = bits if bits is not None else bytearray((size_bits + 7) // 8)
+
+    @classmethod
+    def from_tokens(cls, tokens: Set[str]) -> 'TokenFilter':
+        """Build a filter sized for ``tokens``."""
+        token_filter = cls(max(1024, len(tokens) * cls.BITS_PER_TOKEN))
+        for token in tokens:
+            token_filter.add(token)
+        return token_filter
+
+    def _positions(self, token: str) -> Iterable[int]:
+        digest = hashlib.blake2b(token.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size_bits for i in range(self.NUM_HASHES))
+
+    def add(self, token: str) -> None:
+        """Add a token to the filter."""
+        for position in self._positions(token):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, token: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(token))
+
+    def intersects(self, tokens: Iterable[str]) -> bool:
+        """Return True if any of ``tokens`` may be in the filter."""
+        return any(token in self for token in tokens)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'size_bits': self.size_bits, 'bits': base64.b64encode(bytes(self.bits)).decode('ascii')}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TokenFilter':
+        return cls(data['size_bits'], bytearray(base64.b64decode(data['bits'])))
+
+
+def data_snapshot() -> Dict[str, Any]:
+    """Return the currently loaded data in a JSON-serializable form."""
+    snapshot = {
+        'rules_version': RULES_VERSION,
+        'variants': dict(sorted(load_variants().items())),
+        'exceptions': sorted(load_exceptions()),
+    }
+    # Only recorded when enabled, so existing fingerprints stay valid
+    if morphology_enabled():
+        snapshot['morphology'] = True
+    return snapshot
+
+
+def snapshot_fingerprint(snapshot: Dict[str, Any]) -> str:
+    """Return a stable hash of a data snapshot."""
+    encoded = json.dumps(snapshot, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def changed_keys(old: Dict[str, Any], new: Dict[str, Any]) -> Optional[Set[str]]:
+    """Return the words whose normalization may differ between two snapshots.
+
+    Returns:
+        Set of affected clean words, or None if the letter rules or the
+        morphology setting changed and every word may be affected.
+    """
+    if old.get('rules_version') != new.get('rules_version'):
+        return None
+    if old.get('morphology', False) != new.get('morphology', False):
+        return None
+
+    old_variants, new_variants = old['variants'], new['variants']
+    keys = {
+        word for word in old_variants.keys() | new_variants.keys()
+        if old_variants.get(word) != new_variants.get(word)
+    }
+    keys |= set(old['exceptions']) ^ set(new['exceptions'])
+    return keys
+
+
+def clean_tokens(texts: Iterable[str]) -> Set[str]:
+    """Return the lookup keys ``normalize_word`` would use for ``texts``.
+
+    With morphology enabled, the stems each word could be looked up by are
+    included too, so that a change to a stem's entry affects its inflected
+    forms.
+    """
+    tokens: Set[str] = set()
+    for text in texts:
+        for word in text.split():
+            clean_word = word.strip(PUNCTUATION)
+            if clean_word:
+                tokens.add(clean_word)
+    if morphology_enabled():
+        for clean_word in list(tokens):
+            tokens |= stems(clean_word)
+    return tokens
+
+
+def scan_input(path: Union[str, Path], options: Optional[Dict[str, Any]] = None) -> Tuple[str, Set[str]]:
+    """Hash a (possibly compressed) input file and collect its clean tokens.
+
+    Args:
+        path: Input file.
+        options: Normalization options; for JSONL/CSV/TSV only the selected
+            fields are tokenized, after decoding the records.
+
+    Returns:
+        Tuple of (SHA-256 of the decoded text, set of clean tokens).
+    """
+    fmt = options['format'] if options else 'text'
+    fields = options['fields'] if options else []
+    digest = hashlib.sha256()
+    tokens: Set[str] = set()
+    with open_text(path, 'r', newline='') as f:
+        for unit, texts in iter_units(f, fmt, fields):
+            digest.update(unit.encode('utf-8'))
+            tokens |= clean_tokens(texts)
+    return digest.hexdigest(), tokens
+
+
+class Manifest:
+    """Per-file record of what was normalized with which data.
+
+    Args:
+        path: Location of the manifest JSON file. It is created on ``save``.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.base_dir = self.path.parent.resolve()
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.previous: Optional[Dict[str, Any]] = None
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            # A missing or damaged manifest means everything is rebuilt
+            stored = {}
+        if stored.get('version') == MANIFEST_VERSION:
+            self.files = stored.get('files', {})
+            self.previous = stored.get('data')
+
+        self.snapshot = data_snapshot()
+        self.fingerprint = snapshot_fingerprint(self.snapshot)
+        self._previous_fingerprint = snapshot_fingerprint(self.previous) if self.previous else None
+        self._changed: Optional[Set[str]] = set()
+        if self.previous and self._previous_fingerprint != self.fingerprint:
+            self._changed = changed_keys(self.previous, self.snapshot)
+
+    def _key(self, path: Union[str, Path]) -> str:
+        """Return ``path`` relative to the manifest directory when possible."""
+        resolved = Path(path).resolve()
+        try:
+            return resolved.relative_to(self.base_dir).as_posix()
+        except ValueError:
+            return resolved.as_posix()
+
+    def _unaffected(self, entry: Dict[str, Any]) -> bool:
+        """Return True if the entry's output is valid for the current data."""
+        if entry['data'] == self.fingerprint:
+            return True
+        if entry['data'] != self._previous_fingerprint or self._changed is None:
+            return False
+        return not TokenFilter.from_dict(entry['tokens']).intersects(self._changed)
+
+    def is_current(self, input_path: Union[str, Path], output_path: Union[str, Path],
+                   options: Dict[str, Any]) -> bool:
+        """Return True if ``output_path`` is up to date for ``input_path``.
+
+        Args:
+            input_path: Input file.
+            output_path: Output file the input would be normalized to.
+            options: Normalization options that affect the output.
+        """
+        entry = self.files.get(self._key(input_path))
+        input_path, output_path = Path(input_path), Path(output_path)
+        if entry is None or entry['options'] != options or entry['output'] != self._key(output_path):
+            return False
+        if not output_path.exists() or output_path.stat().st_size != entry['output_size']:
+            return False
+
+        stat = input_path.stat()
+        if (stat.st_size, stat.st_mtime_ns) != (entry['size'], entry['mtime_ns']):
+            try:
+                digest, _ = scan_input(input_path, options)
+            except ValueError:
+                # Unparseable input is reported when it is normalized
+                return False
+            if digest != entry['sha256']:
+                return False
+            entry['size'], entry['mtime_ns'] = stat.st_size, stat.st_mtime_ns
+
+        if not self._unaffected(entry):
+            return False
+        entry['data'] = self.fingerprint
+        return True
+
+    def record(self, input_path: Union[str, Path], output_path: Union[str, Path],
+               options: Dict[str, Any], scan: Optional[Tuple[str, Set[str]]] = None) -> None:
+        """Record that ``input_path`` was normalized to ``output_path``.
+
+        Args:
+            input_path: Input file.
+            output_path: Output file written for it.
+            options: Normalization options that affect the output.
+            scan: Result of ``scan_input`` if already computed (e.g. by a
+                worker process); the input is scanned otherwise.
+        """
+        input_path, output_path = Path(input_path), Path(output_path)
+        digest, tokens = scan or scan_input(input_path, options)
+        stat = input_path.stat()
+        self.files[self._key(input_path)] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': digest,
+            'options': options,
+            'output': self._key(output_path),
+            'output_size': output_path.stat().st_size,
+            'data': self.fingerprint,
+            'tokens': TokenFilter.from_tokens(tokens).to_dict(),
+        }
+
+    def save(self) -> None:
+        """Write the manifest atomically.
+
+        Entries normalized with the previous data that are unaffected by the
+        data changes are carried forward to the current data fingerprint, so
+        the stored snapshot can be replaced.
+        """
+        for entry in self.files.values():
+            if entry['data'] != self.fingerprint and self._unaffected(entry):
+                entry['data'] = self.fingerprint
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': MANIFEST_VERSION,
+                'data': self.snapshot,
+                'files': self.files,
+            }, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
@@ -2,18 +2,40 @@
 
 Usage:
     python -m cli.normalize_text --in input.txt --out output.txt [--show-diff]
+    python -m cli.normalize_text --in corpus/ --out normalized/ --workers 8 --report report.json
+    python -m cli.normalize_text --in data.jsonl --out out.jsonl --format jsonl --field text
+    python -m cli.normalize_text --in shard.jsonl.gz --out shard.jsonl.xz --format jsonl --field text
+    python -m cli.normalize_text --in episode.srt --out normalized.srt --format srt
+    python -m cli.normalize_text --in corpus.txt --out out.txt --profile [--profile-stats run.prof]
+    python -m cli.normalize_text --in input.txt --out out.txt --trace trace.jsonl [--trace-word WORD]
+
+Compressed input (gzip, bz2, xz) is detected automatically; output is
+compressed according to the output file extension.
 """
 
 import argparse
 import difflib
+import json
+import os
 import sys
+from contextlib import nullcontext
 from pathlib import Path
-from typing import List
+from typing import Any, ContextManager, Dict, List, Optional
 
 # Add parent directory to path to import normalizer
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from normalizer import normalize_text, unknown_variants, clear_unknown_variants, reload_data
+from normalizer import (
+    normalize_text, unknown_variants, clear_unknown_variants, refresh_data, reload_data, set_morphology,
+    set_profile, trace,
+)
+from cli.batch import format_report, is_batch_input, normalize_tree
+from cli.compression import open_text
+from cli.formats import STRUCTURED_FORMATS, normalize_records
+from cli.transcripts import TRANSCRIPT_FORMATS
+from cli.index import TokenIndex
+from cli.manifest import Manifest
+from cli.profiling import Profiler
 
 
 def highlight_diff(original: str, normalized: str) -> str:
@@ -40,61 +62,87 @@ def highlight_diff(original: str, normalized: str) -> str:
     return ''.join(diff)
 
 
-def main() -> None:
-    """Main CLI function."""
-    parser = argparse.ArgumentParser(
-        description='Normalize Hassaniya Arabic text using letter rules and variant mappings.'
-    )
-    parser.add_argument(
-        '--in', '--input',
-        dest='input_file',
-        required=True,
-        help='Input text file to normalize'
-    )
-    parser.add_argument(
-        '--out', '--output',
-        dest='output_file',
-        required=True,
-        help='Output file for normalized text'
-    )
-    parser.add_argument(
-        '--show-diff',
-        action='store_true',
-        help='Show differences between original and normalized text'
-    )
+def report_unknown_variants() -> None:
+    """Print the unknown variants collected during normalization."""
+    if unknown_variants:
+        print("\n" + "="*50)
+        print("UNKNOWN VARIANTS ENCOUNTERED:")
+        print("="*50)
+        for variant in unknown_variants:
+            print(f"  - {variant}")
+        print(f"\nTotal unknown variants: {len(unknown_variants)}")
+    else:
+        print("\nNo unknown variants encountered.")
+
+
+def _phase(profiler: Optional[Profiler], name: str) -> ContextManager:
+    """Time a phase when profiling, do nothing otherwise."""
+    return profiler.phase(name) if profiler else nullcontext()
+
+
+def normalize_structured(input_path: Path, output_path: Path, args: argparse.Namespace,
+                         profiler: Optional[Profiler] = None) -> None:
+    """Stream JSONL/CSV/TSV records or transcript cues, normalizing only their text.
     
-    args = parser.parse_args()
+    Args:
+        input_path: Input file path.
+        output_path: Output file path.
+        args: Parsed command-line arguments.
+        profiler: Optional profiler timing reads, writes and normalization.
+    """
+    clear_unknown_variants()
     
-    # Validate input file exists
-    input_path = Path(args.input_file)
-    if not input_path.exists():
-        print(f"Error: Input file '{input_path}' does not exist.", file=sys.stderr)
+    try:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open_text(input_path, 'r', newline='') as infile, \
+                open_text(output_path, 'w', newline='') as outfile:
+            if profiler:
+                normalize_records(profiler.reader(infile), profiler.writer(outfile), args.input_format,
+                                  args.fields, args.unknown_field, normalize=profiler.normalize)
+            else:
+                normalize_records(infile, outfile, args.input_format, args.fields, args.unknown_field)
+    except (OSError, ValueError) as e:
+        print(f"Error processing {args.input_format} input: {e}", file=sys.stderr)
         sys.exit(1)
     
+    kind = 'records' if args.input_format in STRUCTURED_FORMATS else 'transcript'
+    print(f"Normalized {args.input_format} {kind} written to '{output_path}'")
+    report_unknown_variants()
+
+
+def normalize_plain(input_path: Path, output_path: Path, args: argparse.Namespace,
+                    profiler: Optional[Profiler] = None) -> None:
+    """Normalize a plain text file in one piece.
+    
+    Args:
+        input_path: Input file path.
+        output_path: Output file path.
+        args: Parsed command-line arguments.
+        profiler: Optional profiler timing each phase.
+    """
     # Read input file
     try:
-        with open(input_path, 'r', encoding='utf-8') as f:
+        with _phase(profiler, 'read'), open_text(input_path, 'r') as f:
             original_text = f.read()
     except Exception as e:
         print(f"Error reading input file: {e}", file=sys.stderr)
         sys.exit(1)
     
-    # Reload data to ensure we're using the latest files
-    reload_data()
-    
     # Clear previous unknown variants
     clear_unknown_variants()
     
     # Normalize text
-    normalized_text = normalize_text(original_text)
+    if profiler:
+        normalized_text = profiler.normalize(original_text)
+    else:
+        normalized_text = normalize_text(original_text)
     
     # Write output file
-    output_path = Path(args.output_file)
     try:
         # Create parent directories if they don't exist
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(output_path, 'w', encoding='utf-8') as f:
+        with _phase(profiler, 'write'), open_text(output_path, 'w') as f:
             f.write(normalized_text)
         
         print(f"Normalized text written to '{output_path}'")
@@ -107,19 +155,258 @@ def main() -> None:
         print("\n" + "="*50)
         print("DIFFERENCES:")
         print("="*50)
-        diff_output = highlight_diff(original_text, normalized_text)
+        with _phase(profiler, 'diff'):
+            diff_output = highlight_diff(original_text, normalized_text)
         print(diff_output)
     
     # Log unknown variants
-    if unknown_variants:
-        print("\n" + "="*50)
-        print("UNKNOWN VARIANTS ENCOUNTERED:")
-        print("="*50)
-        for variant in unknown_variants:
-            print(f"  - {variant}")
-        print(f"\nTotal unknown variants: {len(unknown_variants)}")
+    report_unknown_variants()
+
+
+def normalization_options(args: argparse.Namespace) -> Dict[str, Any]:
+    """Return the options that affect the normalized output.
+    
+    The morphology setting and dictionary profile are recorded so that
+    ``apply-delta`` can re-select them for each indexed file.
+    """
+    return {
+        'format': args.input_format,
+        'fields': args.fields,
+        'unknown_field': args.unknown_field,
+        'morphology': args.morphology,
+        'profile': args.dictionary_profile,
+    }
+
+
+def normalize_batch_mode(args: argparse.Namespace) -> None:
+    """Normalize every file of a directory or glob into a mirrored output tree.
+    
+    Args:
+        args: Parsed command-line arguments.
+    """
+    output_dir = Path(args.output_file)
+    if output_dir.is_file():
+        print(f"Error: Output '{output_dir}' must be a directory in batch mode.", file=sys.stderr)
+        sys.exit(1)
+    
+    # Data is loaded here for the manifest and in-process work; worker
+    # processes load it once each
+    reload_data()
+    manifest = Manifest(args.manifest) if args.manifest else None
+    index = TokenIndex(args.index) if args.index else None
+    try:
+        report = normalize_tree(args.input_file, output_dir, normalization_options(args),
+                                workers=args.workers, manifest=manifest, index=index)
+    finally:
+        if index:
+            index.close()
+    
+    print(format_report(report))
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nReport written to '{args.report}'")
+    
+    if report['failed']:
+        sys.exit(1)
+
+
+def main() -> None:
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(
+        description='Normalize Hassaniya Arabic text using letter rules and variant mappings.'
+    )
+    parser.add_argument(
+        '--in', '--input',
+        dest='input_file',
+        required=True,
+        help='Input text file to normalize (may be gzip/bz2/xz compressed), '
+             'or a directory/glob pattern to normalize many files'
+    )
+    parser.add_argument(
+        '--out', '--output',
+        dest='output_file',
+        required=True,
+        help='Output file for normalized text (.gz/.bz2/.xz to compress), '
+             'or output directory in batch mode'
+    )
+    parser.add_argument(
+        '--show-diff',
+        action='store_true',
+        help='Show differences between original and normalized text'
+    )
+    parser.add_argument(
+        '--format',
+        dest='input_format',
+        choices=('text',) + STRUCTURED_FORMATS + TRANSCRIPT_FORMATS,
+        default='text',
+        help='Input format (default: text); srt, vtt and textgrid normalize only the '
+             'cue texts, keeping numbers, timestamps and layout'
+    )
+    parser.add_argument(
+        '--field',
+        dest='fields',
+        action='append',
+        default=[],
+        help='Field or column to normalize (repeatable, required for jsonl/csv/tsv)'
+    )
+    parser.add_argument(
+        '--unknown-field',
+        help='Write unknown variants of each record into this field'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=os.cpu_count() or 1,
+        help='Worker processes in batch mode (default: number of CPUs)'
+    )
+    parser.add_argument(
+        '--report',
+        help='Write the batch summary report to this JSON file'
+    )
+    parser.add_argument(
+        '--index',
+        help='Token index (SQLite) updated with the normalized files, '
+             'for targeted updates with hassaniya-apply-delta'
+    )
+    parser.add_argument(
+        '--manifest',
+        help='Manifest file recording what was normalized; inputs whose output '
+             'is still valid for the current data are skipped'
+    )
+    parser.add_argument(
+        '--morphology',
+        action='store_true',
+        help='Look up word stems without proclitics (و ف ب ل ال) and pronoun suffixes '
+             'when a word has no exact entry'
+    )
+    parser.add_argument(
+        '--dictionary-profile',
+        metavar='NAME',
+        help='Normalize with a dictionary profile from data/profiles/ layered on the base data'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Report time per phase, tokens/sec and peak memory (tracemalloc)'
+    )
+    parser.add_argument(
+        '--profile-stats',
+        help='With --profile, also run cProfile, list hotspots and dump stats to this file'
+    )
+    parser.add_argument(
+        '--trace',
+        help='Write why each token was (or was not) rewritten to this JSONL file '
+             '(variant, stem, exception, rules or unchanged)'
+    )
+    parser.add_argument(
+        '--trace-word',
+        dest='trace_words',
+        action='append',
+        help='With --trace, only trace this word (repeatable)'
+    )
+    
+    args = parser.parse_args()
+    
+    if args.input_format in STRUCTURED_FORMATS:
+        if not args.fields:
+            parser.error(f"--field is required with --format {args.input_format}")
+    elif args.fields or args.unknown_field:
+        parser.error("--field/--unknown-field require --format jsonl, csv or tsv")
+    if args.input_format != 'text' and args.show_diff:
+        parser.error("--show-diff is only supported with --format text")
+    
+    if args.profile_stats and not args.profile:
+        parser.error("--profile-stats requires --profile")
+    if args.trace_words and not args.trace:
+        parser.error("--trace-word requires --trace")
+    if args.trace and args.profile:
+        parser.error("--trace and --profile cannot be combined")
+    
+    set_morphology(args.morphology)
+    try:
+        set_profile(args.dictionary_profile)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    if is_batch_input(args.input_file):
+        if args.show_diff:
+            parser.error("--show-diff is not supported for directories or glob patterns")
+        if args.profile:
+            parser.error("--profile is only supported for single files")
+        if args.trace:
+            parser.error("--trace is only supported for single files")
+        normalize_batch_mode(args)
+        return
+    
+    # Validate input file exists
+    input_path = Path(args.input_file)
+    if not input_path.exists():
+        print(f"Error: Input file '{input_path}' does not exist.", file=sys.stderr)
+        sys.exit(1)
+    
+    output_path = Path(args.output_file)
+    
+    profiler = Profiler(args.profile_stats) if args.profile else None
+    if profiler:
+        profiler.start()
+    
+    if args.trace:
+        trace_file = open_text(args.trace, 'w')
+        with trace_file, trace(lambda event: trace_file.write(json.dumps(event, ensure_ascii=False) + '\n'),
+                               words=args.trace_words):
+            normalize_single(input_path, output_path, args)
+        print(f"Trace written to '{args.trace}'")
     else:
-        print("\nNo unknown variants encountered.")
+        normalize_single(input_path, output_path, args, profiler)
+    
+    if profiler:
+        profiler.stop()
+        print()
+        print(profiler.format_summary())
+
+
+def normalize_single(input_path: Path, output_path: Path, args: argparse.Namespace,
+                     profiler: Optional[Profiler] = None) -> None:
+    """Normalize one file, honouring the manifest and index options.
+    
+    Args:
+        input_path: Input file path.
+        output_path: Output file path.
+        args: Parsed command-line arguments.
+        profiler: Optional profiler timing each phase.
+    """
+    # Reload data to ensure we're using the latest files (a no-op in the
+    # daemon while they are unchanged)
+    with _phase(profiler, 'data load'):
+        refresh_data()
+    
+    # Skip inputs whose output is still valid for the current data
+    options = normalization_options(args)
+    manifest = None
+    if args.manifest:
+        with _phase(profiler, 'manifest'):
+            manifest = Manifest(args.manifest)
+            current = manifest.is_current(input_path, output_path, options)
+            if current:
+                manifest.save()
+        if current:
+            print(f"'{output_path}' is up to date, skipping.")
+            return
+    
+    if args.input_format != 'text':
+        normalize_structured(input_path, output_path, args, profiler)
+    else:
+        normalize_plain(input_path, output_path, args, profiler)
+    
+    if manifest:
+        with _phase(profiler, 'manifest'):
+            manifest.record(input_path, output_path, options)
+            manifest.save()
+    
+    if args.index:
+        with _phase(profiler, 'index'), TokenIndex(args.index) as index:
+            index.add_file(input_path, output_path, options)
 
 
 if __name__ == '__main__':
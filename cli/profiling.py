@@ -0,0 +1,220 @@
+"""Profiling support for the Hassaniya normalization CLI.
+
+``Profiler`` records wall time per phase (data load, read, tokenize,
+prefilter, lookup, rules, write, diff), token throughput, the share of tokens
+skipped by the prefilter fast path and peak memory, and can run cProfile
+to report hotspots and dump a stats file. Normalization is timed with a
+phase-instrumented equivalent of ``normalize_text``: tokens are split and
+de-duplicated first, texts the prefilter passes through are returned as is,
+the others are looked up, then passed through the letter rules,
+so that each phase is timed once per text instead of once per word.
+
+Time not spent in any phase (record parsing, bookkeeping) is reported as
+``other``. Memory tracing slows Python down, so absolute times under
+``--profile`` are higher than in a normal run; the split between phases is
+what matters.
+"""
+
+import cProfile
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Union
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from normalizer import unknown_variants
+from normalizer.morphology import lookup_variant, morphology_enabled
+from normalizer.normalizer import PUNCTUATION, load_variants
+from normalizer.prefilter import passes
+from normalizer.rules import apply_letter_rules
+
+# Phases in report order; others are appended as they occur
+PHASES = ('data load', 'read', 'tokenize', 'prefilter', 'lookup', 'rules', 'write', 'diff')
+
+# Number of cProfile hotspots in the summary
+TOP_FUNCTIONS = 10
+
+
+class _TimedWriter:
+    """File wrapper timing ``write`` calls under the ``write`` phase."""
+
+    def __init__(self, file: TextIO, profiler: 'Profiler'):
+        self.file = file
+        self.profiler = profiler
+
+    def write(self, text: str) -> int:
+        with self.profiler.phase('write'):
+            return self.file.write(text)
+
+
+class Profiler:
+    """Collect per-phase timings, throughput and memory usage of a run.
+
+    Args:
+        stats_path: Optional file receiving cProfile stats (readable with
+            ``pstats`` or snakeviz). cProfile only runs when it is given.
+    """
+
+    def __init__(self, stats_path: Optional[Union[str, Path]] = None):
+        self.stats_path = stats_path
+        self.phases: Dict[str, float] = {}
+        self.tokens = 0
+        self.tokens_skipped = 0
+        self.seconds = 0.0
+        self.peak_memory = 0
+        self.hotspots: List[Dict[str, Any]] = []
+        self._profile = cProfile.Profile() if stats_path else None
+        self._start = 0.0
+
+    def start(self) -> None:
+        """Start timing, memory tracing and cProfile."""
+        tracemalloc.start()
+        self._start = time.perf_counter()
+        if self._profile:
+            self._profile.enable()
+
+    def stop(self) -> None:
+        """Stop profiling and collect the results."""
+        if self._profile:
+            self._profile.disable()
+        self.seconds = time.perf_counter() - self._start
+        self.peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        if self._profile:
+            self._profile.dump_stats(str(self.stats_path))
+            stats = pstats.Stats(self._profile).sort_stats('tottime')
+            for func in stats.fcn_list[:TOP_FUNCTIONS]:
+                calls, _, own_time, cumulative_time, _ = stats.stats[func]
+                filename, line, name = func
+                self.hotspots.append({
+                    'function': f"{Path(filename).name}:{line}({name})" if line else name,
+                    'calls': calls,
+                    'own_seconds': round(own_time, 4),
+                    'cumulative_seconds': round(cumulative_time, 4),
+                })
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Add the time spent in the ``with`` block to phase ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def reader(self, lines: Iterable[str]) -> Iterator[str]:
+        """Yield ``lines``, timing each read under the ``read`` phase."""
+        iterator = iter(lines)
+        while True:
+            with self.phase('read'):
+                line = next(iterator, None)
+            if line is None:
+                return
+            yield line
+
+    def writer(self, file: TextIO) -> _TimedWriter:
+        """Wrap ``file`` so that writes are timed under the ``write`` phase."""
+        return _TimedWriter(file, self)
+
+    def normalize(self, text: str, unknowns: Optional[List[str]] = None) -> str:
+        """Normalize a text like ``normalize_text``, timing each phase.
+
+        Args:
+            text: The text to normalize.
+            unknowns: Optional list collecting unknown variants for this call.
+                Defaults to the module-level ``unknown_variants`` list.
+
+        Returns:
+            The normalized text, identical to ``normalize_text(text)``.
+        """
+        if not text:
+            return text
+        if unknowns is None:
+            unknowns = unknown_variants
+
+        with self.phase('tokenize'):
+            words = text.split()
+        self.tokens += len(words)
+
+        with self.phase('prefilter'):
+            variants = load_variants()
+            if passes(text, words, variants):
+                self.tokens_skipped += len(words)
+                return ' '.join(words)
+
+        with self.phase('tokenize'):
+            tokens = list(dict.fromkeys(words))
+
+        with self.phase('lookup'):
+            morphology = morphology_enabled()
+            table: Dict[str, str] = {}
+            misses = []
+            for token in tokens:
+                clean_word = token.strip(PUNCTUATION)
+                if not clean_word:
+                    table[token] = token
+                    continue
+                prefix = token[:len(token) - len(token.lstrip(PUNCTUATION))]
+                suffix = token[len(prefix) + len(clean_word):]
+                canonical = variants.get(clean_word)
+                if canonical is None and morphology:
+                    canonical = lookup_variant(clean_word, variants)
+                if canonical is not None:
+                    table[token] = prefix + canonical + suffix
+                else:
+                    misses.append((token, prefix, clean_word, suffix))
+
+        with self.phase('rules'):
+            for token, prefix, clean_word, suffix in misses:
+                normalized = apply_letter_rules(clean_word)
+                if clean_word not in unknowns and clean_word != normalized:
+                    unknowns.append(clean_word)
+                table[token] = prefix + normalized + suffix
+
+        with self.phase('tokenize'):
+            return ' '.join([table[word] for word in words])
+
+    def report(self) -> Dict[str, Any]:
+        """Return the profile as a JSON-serializable dict."""
+        phases = {name: self.phases[name] for name in PHASES if name in self.phases}
+        phases.update({name: value for name, value in self.phases.items() if name not in phases})
+        phases['other'] = max(self.seconds - sum(phases.values()), 0.0)
+        return {
+            'seconds': round(self.seconds, 4),
+            'phases': {name: round(value, 4) for name, value in phases.items()},
+            'tokens': self.tokens,
+            'tokens_per_second': round(self.tokens / self.seconds, 1) if self.seconds else 0.0,
+            'tokens_skipped': self.tokens_skipped,
+            'skip_rate': round(self.tokens_skipped / self.tokens, 4) if self.tokens else 0.0,
+            'peak_memory_bytes': self.peak_memory,
+            'hotspots': self.hotspots,
+        }
+
+    def format_summary(self) -> str:
+        """Render the profile as a short human-readable summary."""
+        report = self.report()
+        total = report['seconds'] or 1.0
+        lines = [
+            "=" * 50,
+            "PROFILE:",
+            "=" * 50,
+        ]
+        for name, seconds in report['phases'].items():
+            lines.append(f"  {name:<12} {seconds:>9.4f}s  {seconds / total:>6.1%}")
+        lines += [
+            f"  {'total':<12} {report['seconds']:>9.4f}s",
+            f"  Tokens:      {report['tokens']} ({report['tokens_per_second']} tokens/s)",
+            f"  Prefilter:   {report['tokens_skipped']} tokens skipped ({report['skip_rate']:.1%})",
+            f"  Peak memory: {report['peak_memory_bytes'] / (1024 * 1024):.1f} MiB (tracemalloc)",
+        ]
+        if self.hotspots:
+            lines.append("  Hotspots (own time):")
+            for hotspot in self.hotspots:
+                lines.append(f"    {hotspot['own_seconds']:>8.4f}s  {hotspot['calls']:>8}  {hotspot['function']}")
+            lines.append(f"  cProfile stats written to '{self.stats_path}'")
+        return '\n'.join(lines)
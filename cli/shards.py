@@ -0,0 +1,608 @@
+"""Resumable, sharded normalization jobs on a shared filesystem.
+
+Usage:
+    python -m cli.shards plan --in CORPUS --out OUTPUT --job JOB [--shard-size MB]
+    python -m cli.shards run --job JOB [--workers N] [--lease SECONDS]
+    python -m cli.shards status --job JOB [--json]
+
+``plan`` splits the files of a directory or glob into shards of roughly
+``--shard-size`` input bytes (a file is never split) and writes them, with
+the normalization options and the data fingerprint, to ``JOB/job.json``.
+``run`` may then be started on any number of machines that see the same
+job directory. Each claims shards by creating ``JOB/locks/<shard>.lock``
+exclusively, normalizes their files like batch mode (every output is
+written to a temporary file and renamed), and checkpoints the shard by
+atomically writing ``JOB/done/<shard>.json`` before releasing the lock.
+No coordinator is needed.
+
+A running worker refreshes the modification time of its locks. A lock not
+refreshed for ``--lease`` seconds belongs to a dead worker and is taken
+over; a ``<shard>.lock.takeover-<token>`` file created exclusively ensures
+only one worker takes over each stale lock. Worker clocks and the file
+server's clock should roughly agree, and the lease should be much longer
+than the skew between them. If a slow worker loses its lock, both workers
+write the same outputs, so the result is unchanged.
+
+Restarting ``run`` after a crash skips checkpointed shards and redoes the
+rest. A machine whose data (variants, exceptions, letter rules,
+morphology, dictionary profile) differs from the plan's refuses to run.
+Paths are stored relative to the job directory, so machines may mount the
+share at different locations if the corpus and output keep their place
+relative to it.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Union
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from normalizer import reload_data
+from normalizer.morphology import morphology_enabled, set_morphology
+from normalizer.profiles import current_profile, set_profile
+from normalizer.sketch import DEFAULT_CAPACITY, HeavyHitters
+from cli.batch import Task, _init_worker, _process_files, collect_inputs
+from cli.formats import STRUCTURED_FORMATS
+from cli.transcripts import TRANSCRIPT_FORMATS
+from cli.manifest import data_snapshot, snapshot_fingerprint
+
+JOB_VERSION = 1
+
+# Input bytes per shard, and seconds after which an unrefreshed lock is stale
+DEFAULT_SHARD_BYTES = 64 * 1024 * 1024
+DEFAULT_LEASE = 600.0
+
+# Unknown variants kept in each checkpoint and in the report
+UNKNOWN_TOP_K = 50
+
+
+def write_json_atomic(path: Path, data: Any) -> None:
+    """Write ``data`` as JSON to ``path`` atomically and durably.
+
+    The temporary file name is unique per host and process, so several
+    machines may write the same path concurrently; the last rename wins.
+    """
+    temp_path = path.with_name(f".{path.name}.{socket.gethostname()}.{os.getpid()}.tmp")
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+
+def _relative(path: Path, job_dir: Path) -> str:
+    return Path(os.path.relpath(path.resolve(), job_dir.resolve())).as_posix()
+
+
+def plan_job(
+    job_dir: Union[str, Path],
+    input_arg: str,
+    output_dir: Union[str, Path],
+    options: Dict[str, Any],
+    shard_bytes: int = DEFAULT_SHARD_BYTES,
+) -> Dict[str, Any]:
+    """Split a corpus into shards and write the job plan.
+
+    Planning again with the same corpus, options and data returns the
+    existing plan, so ``plan`` can be part of a restart script.
+
+    Args:
+        job_dir: Job directory on the shared filesystem.
+        input_arg: Input directory or glob pattern.
+        output_dir: Root of the mirrored output tree.
+        options: ``format``, ``fields`` and ``unknown_field`` settings.
+        shard_bytes: Target input bytes per shard.
+
+    Returns:
+        The job plan.
+
+    Raises:
+        ValueError: If there is nothing to normalize, or the job directory
+            already holds a different plan.
+    """
+    job_dir, output_dir = Path(job_dir), Path(output_dir)
+    base, files = collect_inputs(input_arg)
+    excluded = (output_dir.resolve(), job_dir.resolve())
+    files = [
+        path for path in files
+        if not any(root == path.resolve() or root in path.resolve().parents for root in excluded)
+    ]
+    if not files:
+        raise ValueError(f"No input files match '{input_arg}'")
+
+    shards: List[Dict[str, Any]] = []
+    current: Dict[str, Any] = {'files': [], 'bytes': 0}
+    for path in files:
+        size = path.stat().st_size
+        if current['files'] and current['bytes'] + size > shard_bytes:
+            shards.append(current)
+            current = {'files': [], 'bytes': 0}
+        current['files'].append([_relative(path, job_dir), _relative(output_dir / path.relative_to(base), job_dir)])
+        current['bytes'] += size
+    shards.append(current)
+    for number, shard in enumerate(shards):
+        shard['id'] = f"shard-{number:05d}"
+
+    profile = current_profile()
+    job = {
+        'version': JOB_VERSION,
+        'options': options,
+        'morphology': morphology_enabled(),
+        'profile': profile.name if profile else None,
+        'data': snapshot_fingerprint(data_snapshot()),
+        'shards': shards,
+    }
+
+    job_path = job_dir / 'job.json'
+    if job_path.exists():
+        existing = load_job(job_dir)
+        if existing != job:
+            raise ValueError(f"'{job_path}' holds a different plan; use a new job directory")
+        return existing
+
+    for name in ('locks', 'done'):
+        (job_dir / name).mkdir(parents=True, exist_ok=True)
+    write_json_atomic(job_path, job)
+    return job
+
+
+def load_job(job_dir: Union[str, Path]) -> Dict[str, Any]:
+    """Read the plan of a job directory.
+
+    Raises:
+        ValueError: If there is no readable plan of this version.
+    """
+    job_path = Path(job_dir) / 'job.json'
+    try:
+        with open(job_path, 'r', encoding='utf-8') as f:
+            job = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"Cannot read job plan '{job_path}': {e}") from e
+    if job.get('version') != JOB_VERSION:
+        raise ValueError(f"'{job_path}' has unsupported version {job.get('version')}")
+    return job
+
+
+class ShardLock:
+    """Claim on one shard, held as an exclusively created lock file.
+
+    Use ``acquire`` to create one. The lock file holds the owner's host, pid
+    and a random token; its modification time is the owner's last refresh.
+    """
+
+    def __init__(self, path: Path, token: str):
+        self.path = path
+        self.token = token
+
+    @classmethod
+    def acquire(cls, path: Union[str, Path], lease: float = DEFAULT_LEASE) -> Optional['ShardLock']:
+        """Claim ``path``, taking it over if its owner stopped refreshing it.
+
+        Returns:
+            The lock, or None if another live worker holds it.
+        """
+        path = Path(path)
+        token = uuid.uuid4().hex
+        record = json.dumps({
+            'token': token,
+            'host': socket.gethostname(),
+            'pid': os.getpid(),
+            'claimed_at': time.time(),
+        })
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return cls._take_over(path, token, record, lease)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(record)
+        return cls(path, token)
+
+    @staticmethod
+    def _owner(path: Path) -> str:
+        """Return the token of the claim held in ``path``."""
+        stat = path.stat()
+        try:
+            return json.loads(path.read_text(encoding='utf-8'))['token']
+        except (ValueError, KeyError, TypeError):
+            # Owner died between creating and writing the file
+            return f"empty-{stat.st_mtime_ns}"
+
+    @classmethod
+    def _take_over(cls, path: Path, token: str, record: str, lease: float) -> Optional['ShardLock']:
+        try:
+            if time.time() - path.stat().st_mtime < lease:
+                return None
+            stale_token = cls._owner(path)
+        except FileNotFoundError:
+            # Released in the meantime; the next claim attempt will get it
+            return None
+
+        # Only one worker at a time holds the marker for this stale owner
+        marker = path.with_name(f"{path.name}.takeover-{stale_token}")
+        try:
+            os.close(os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+        except FileExistsError:
+            return None
+        try:
+            # A worker that read the same stale owner may have taken over and
+            # removed its marker already; its claim is in the file by then
+            try:
+                if cls._owner(path) != stale_token:
+                    return None
+            except FileNotFoundError:
+                return None
+            write_json_atomic(path, json.loads(record))
+        finally:
+            marker.unlink(missing_ok=True)
+        return cls(path, token)
+
+    def owned(self) -> bool:
+        """Return True if the lock file still holds this claim."""
+        try:
+            return json.loads(self.path.read_text(encoding='utf-8')).get('token') == self.token
+        except (OSError, ValueError):
+            return False
+
+    def refresh(self) -> None:
+        """Mark the claim as alive."""
+        try:
+            os.utime(self.path)
+        except FileNotFoundError:
+            pass
+
+    def release(self) -> None:
+        """Delete the lock file unless another worker has taken it over."""
+        if self.owned():
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class _Heartbeat:
+    """Background thread refreshing the held locks every ``lease / 4`` seconds."""
+
+    def __init__(self, lease: float):
+        self.interval = max(lease / 4, 0.05)
+        self.locks: Set[ShardLock] = set()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='shard-heartbeat', daemon=True)
+
+    def __enter__(self) -> '_Heartbeat':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            for lock in list(self.locks):
+                lock.refresh()
+
+
+def _checkpoint_path(job_dir: Path, shard_id: str) -> Path:
+    return job_dir / 'done' / f"{shard_id}.json"
+
+
+def configure_worker(job: Dict[str, Any]) -> None:
+    """Load the data with the plan's settings and check it matches the plan.
+
+    Raises:
+        ValueError: If the profile is unknown or the data differs.
+    """
+    set_morphology(job['morphology'])
+    reload_data()
+    set_profile(job['profile'])
+    if snapshot_fingerprint(data_snapshot()) != job['data']:
+        raise ValueError(
+            "The variant/exception data on this machine differs from the job plan; "
+            "sync the data files (or re-plan into a new job directory)"
+        )
+
+
+def _shard_tasks(job_dir: Path, job: Dict[str, Any], shard: Dict[str, Any]) -> List[Task]:
+    return [
+        (job_dir / input_path, job_dir / output_path, job['options'], False, False)
+        for input_path, output_path in shard['files']
+    ]
+
+
+def _checkpoint(shard: Dict[str, Any], results: List[Dict[str, Any]], started_at: float) -> Dict[str, Any]:
+    """Summarize the per-file results of a fully normalized shard."""
+    unknowns = HeavyHitters(DEFAULT_CAPACITY)
+    totals = {'bytes': 0, 'tokens': 0, 'changed_tokens': 0}
+    for result in results:
+        for key in totals:
+            totals[key] += result['stats'][key]
+        unknowns.update(result['unknown_variants'])
+    finished_at = time.time()
+    return {
+        'shard': shard['id'],
+        'host': socket.gethostname(),
+        'pid': os.getpid(),
+        'started_at': started_at,
+        'finished_at': finished_at,
+        'seconds': round(finished_at - started_at, 3),
+        'files': len(results),
+        **totals,
+        'unknown_variants': unknowns.to_dict(),
+    }
+
+
+def run_job(
+    job_dir: Union[str, Path],
+    workers: int = 1,
+    lease: float = DEFAULT_LEASE,
+    max_shards: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Claim and normalize shards until none is left for this worker.
+
+    Shards that fail are released without a checkpoint and not retried by
+    this call; the next ``run`` retries them.
+
+    Args:
+        job_dir: Job directory written by ``plan_job``.
+        workers: Worker processes on this machine.
+        lease: Seconds after which another worker's unrefreshed lock is
+            taken over.
+        max_shards: Stop after claiming this many shards (default: no limit).
+
+    Returns:
+        Dict with ``shards`` (completed by this call), ``errors`` and the
+        job-wide ``report`` (see ``job_report``).
+
+    Raises:
+        ValueError: If the plan cannot be read or the data differs from it.
+    """
+    job_dir = Path(job_dir)
+    job = load_job(job_dir)
+    configure_worker(job)
+
+    completed: List[str] = []
+    errors: List[Dict[str, str]] = []
+
+    def claims() -> Iterator[tuple]:
+        claimed = 0
+        for shard in job['shards']:
+            if max_shards is not None and claimed >= max_shards:
+                return
+            if _checkpoint_path(job_dir, shard['id']).exists():
+                continue
+            lock = ShardLock.acquire(job_dir / 'locks' / f"{shard['id']}.lock", lease)
+            if lock is None:
+                continue
+            # Another worker may have finished it just before releasing
+            if _checkpoint_path(job_dir, shard['id']).exists():
+                lock.release()
+                continue
+            claimed += 1
+            yield shard, lock
+
+    def finish(shard: Dict[str, Any], lock: ShardLock, results: List[Dict[str, Any]], started_at: float) -> None:
+        try:
+            failures = [result for result in results if 'error' in result]
+            if failures:
+                errors.extend(
+                    {'shard': shard['id'], 'file': str(result['input']), 'error': result['error']}
+                    for result in failures
+                )
+            else:
+                write_json_atomic(_checkpoint_path(job_dir, shard['id']), _checkpoint(shard, results, started_at))
+                completed.append(shard['id'])
+        finally:
+            heartbeat.locks.discard(lock)
+            lock.release()
+
+    with _Heartbeat(lease) as heartbeat:
+        if workers <= 1:
+            for shard, lock in claims():
+                heartbeat.locks.add(lock)
+                started_at = time.time()
+                finish(shard, lock, _process_files(_shard_tasks(job_dir, job, shard)), started_at)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(job['morphology'], job['profile'])) as pool:
+                running: Dict[Future, tuple] = {}
+                pending = claims()
+                exhausted = False
+                while running or not exhausted:
+                    while not exhausted and len(running) < workers:
+                        claim = next(pending, None)
+                        if claim is None:
+                            exhausted = True
+                            break
+                        shard, lock = claim
+                        heartbeat.locks.add(lock)
+                        future = pool.submit(_process_files, _shard_tasks(job_dir, job, shard))
+                        running[future] = (shard, lock, time.time())
+                    if not running:
+                        break
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        shard, lock, started_at = running.pop(future)
+                        try:
+                            results = future.result()
+                        except Exception as e:
+                            heartbeat.locks.discard(lock)
+                            lock.release()
+                            errors.append({'shard': shard['id'], 'file': '', 'error': f"{type(e).__name__}: {e}"})
+                            continue
+                        finish(shard, lock, results, started_at)
+
+    return {'shards': completed, 'errors': errors, 'report': job_report(job_dir, lease)}
+
+
+def job_report(job_dir: Union[str, Path], lease: float = DEFAULT_LEASE) -> Dict[str, Any]:
+    """Aggregate the checkpoints of a job.
+
+    Throughput is measured over the job's wall-clock span, from the first
+    checkpointed shard's start to the last one's end, across all machines.
+    Unknown variants are counted once per file they occurred in.
+
+    Returns:
+        Dict with shard counts (``done``, ``running``, ``stale``,
+        ``pending``), totals over done shards, ``tokens_per_second``,
+        ``hosts`` and the most frequent ``unknown_variants``.
+    """
+    job_dir = Path(job_dir)
+    job = load_job(job_dir)
+    unknowns = HeavyHitters(DEFAULT_CAPACITY)
+    report: Dict[str, Any] = {
+        'shards': len(job['shards']),
+        'done': 0,
+        'running': 0,
+        'stale': 0,
+        'pending': 0,
+        'files': 0,
+        'bytes': 0,
+        'tokens': 0,
+        'changed_tokens': 0,
+        'worker_seconds': 0.0,
+    }
+    hosts = set()
+    first_start, last_finish = None, None
+    now = time.time()
+    for shard in job['shards']:
+        try:
+            with open(_checkpoint_path(job_dir, shard['id']), 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            try:
+                age = now - (job_dir / 'locks' / f"{shard['id']}.lock").stat().st_mtime
+            except FileNotFoundError:
+                report['pending'] += 1
+            else:
+                report['running' if age < lease else 'stale'] += 1
+            continue
+        report['done'] += 1
+        for key in ('files', 'bytes', 'tokens', 'changed_tokens'):
+            report[key] += checkpoint[key]
+        report['worker_seconds'] += checkpoint['seconds']
+        hosts.add(checkpoint['host'])
+        unknowns.merge(HeavyHitters.from_dict(checkpoint['unknown_variants']))
+        first_start = min(first_start, checkpoint['started_at']) if first_start else checkpoint['started_at']
+        last_finish = max(last_finish, checkpoint['finished_at']) if last_finish else checkpoint['finished_at']
+
+    elapsed = (last_finish - first_start) if first_start is not None else 0.0
+    report['worker_seconds'] = round(report['worker_seconds'], 3)
+    report['seconds'] = round(elapsed, 3)
+    report['tokens_per_second'] = round(report['tokens'] / elapsed, 1) if elapsed else 0.0
+    report['hosts'] = sorted(hosts)
+    report['unknown_variants'] = [
+        {'word': word, 'files': count, 'error': error}
+        for word, count, error in unknowns.top(UNKNOWN_TOP_K)
+    ]
+    report['distinct_unknown_variants'] = len(unknowns)
+    return report
+
+
+def format_job_report(report: Dict[str, Any]) -> str:
+    """Render a job report as a short human-readable summary."""
+    lines = [
+        "=" * 50,
+        "JOB SUMMARY:",
+        "=" * 50,
+        f"  Shards:         {report['shards']} planned, {report['done']} done, {report['running']} running, "
+        f"{report['stale']} stale, {report['pending']} pending",
+        f"  Files:          {report['files']} ({report['bytes']} bytes)",
+        f"  Tokens:         {report['tokens']} ({report['changed_tokens']} changed)",
+        f"  Time:           {report['seconds']:.2f}s wall, {report['worker_seconds']:.2f}s in workers "
+        f"({report['tokens_per_second']} tokens/s) on {len(report['hosts'])} host(s)",
+        f"  Unknown variants: {report['distinct_unknown_variants']} tracked",
+    ]
+    for variant in report['unknown_variants'][:10]:
+        lines.append(f"    {variant['files']:>8}  {variant['word']}")
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(description='Resumable, sharded normalization jobs.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    plan = commands.add_parser('plan', help='Split a corpus into shards')
+    plan.add_argument('--in', '--input', dest='input_file', required=True,
+                      help='Input directory or glob pattern')
+    plan.add_argument('--out', '--output', dest='output_dir', required=True,
+                      help='Output directory (mirrors the input layout)')
+    plan.add_argument('--shard-size', type=float, default=DEFAULT_SHARD_BYTES / (1024 * 1024),
+                      help=f'Input megabytes per shard (default: {DEFAULT_SHARD_BYTES // (1024 * 1024)})')
+    plan.add_argument('--format', dest='input_format', default='text',
+                      choices=('text',) + STRUCTURED_FORMATS + TRANSCRIPT_FORMATS,
+                      help='Input format (default: text)')
+    plan.add_argument('--field', dest='fields', action='append', default=[],
+                      help='Field or column to normalize (repeatable, required for jsonl/csv/tsv)')
+    plan.add_argument('--unknown-field', help='Write unknown variants of each record into this field')
+    plan.add_argument('--morphology', action='store_true', help='Normalize with clitic-aware stem lookups')
+    plan.add_argument('--dictionary-profile', metavar='NAME',
+                      help='Normalize with a dictionary profile from data/profiles/')
+
+    run = commands.add_parser('run', help='Claim and normalize shards (run on every machine)')
+    run.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                     help='Worker processes (default: number of CPUs)')
+    run.add_argument('--lease', type=float, default=DEFAULT_LEASE,
+                     help=f'Seconds before a silent worker\'s shard is taken over (default: {DEFAULT_LEASE:.0f})')
+    run.add_argument('--report', help='Write the job summary to this JSON file')
+
+    status = commands.add_parser('status', help='Show progress and aggregate statistics')
+    status.add_argument('--lease', type=float, default=DEFAULT_LEASE,
+                        help=f'Seconds before a lock counts as stale (default: {DEFAULT_LEASE:.0f})')
+    status.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    for command in (plan, run, status):
+        command.add_argument('--job', required=True, help='Job directory on the shared filesystem')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'plan':
+            if args.input_format in STRUCTURED_FORMATS and not args.fields:
+                parser.error(f"--field is required with --format {args.input_format}")
+            if args.input_format not in STRUCTURED_FORMATS and (args.fields or args.unknown_field):
+                parser.error("--field/--unknown-field require --format jsonl, csv or tsv")
+            set_morphology(args.morphology)
+            reload_data()
+            set_profile(args.dictionary_profile)
+            options = {'format': args.input_format, 'fields': args.fields, 'unknown_field': args.unknown_field}
+            job = plan_job(args.job, args.input_file, args.output_dir, options,
+                           int(args.shard_size * 1024 * 1024))
+            total = sum(shard['bytes'] for shard in job['shards'])
+            print(f"Planned {len(job['shards'])} shard(s), {total} bytes, in '{args.job}'")
+        elif args.command == 'run':
+            result = run_job(args.job, workers=args.workers, lease=args.lease)
+            print(f"Normalized {len(result['shards'])} shard(s) on {socket.gethostname()}")
+            print(format_job_report(result['report']))
+            for error in result['errors'][:10]:
+                print(f"  ! {error['shard']} {error['file']}: {error['error']}")
+            if args.report:
+                with open(args.report, 'w', encoding='utf-8') as f:
+                    json.dump(result, f, ensure_ascii=False, indent=2)
+            if result['errors']:
+                sys.exit(1)
+        else:
+            report = job_report(args.job, args.lease)
+            if args.json:
+                print(json.dumps(report, ensure_ascii=False, indent=2))
+            else:
+                print(format_job_report(report))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
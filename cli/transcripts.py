@@ -0,0 +1,154 @@
+"""Transcript formats for the Hassaniya normalization CLI.
+
+SRT and WebVTT subtitles and Praat TextGrids are split into units whose text
+payloads are the only parts to normalize: cue numbers, timestamps, settings,
+markup and layout are kept as literal text. A unit is a cue block (with the
+blank lines after it) for SRT/WebVTT, and a line, or a string spanning
+several lines, for TextGrids.
+
+Each unit is returned as a list of pieces alternating between literal text
+and payload, starting and ending with literal text, so ``''.join(pieces)``
+is the raw unit and ``pieces[1::2]`` are its payloads. A payload never spans
+a line break and has no leading or trailing whitespace. Files are read line
+by line and only one unit is held at a time.
+"""
+
+import re
+from typing import Iterable, Iterator, List, Optional, Pattern
+
+TRANSCRIPT_FORMATS = ('srt', 'vtt', 'textgrid')
+
+# Blocks of a WebVTT file that are not cues
+_VTT_BLOCKS = ('WEBVTT', 'NOTE', 'STYLE', 'REGION')
+
+# Line breaks, and within SRT/WebVTT cue text also tags (<i>, <v Name>,
+# <00:00:01.000>) and SSA override codes ({\an8}), are kept as literal text
+_CUE_SEPARATOR = re.compile(r'(\r\n?|\n|<[^>\n]*>|\{\\[^}\n]*\})')
+_LINE_SEPARATOR = re.compile(r'(\r\n?|\n)')
+
+# A TextGrid line holding a string: optional ``key =`` and the opening quote
+_TEXTGRID_STRING = re.compile(r'(\s*(?:([^"=]*?)\s*=\s*)?)"')
+# Rest of a string after its opening quote; quotes are doubled inside
+_TEXTGRID_BODY = re.compile(r'((?:[^"]|"")*)"(?!")')
+# Keys of the long TextGrid format holding interval texts and point marks
+_TEXTGRID_KEYS = ('text', 'mark')
+# Tier classes of the short format, each followed by the tier name
+_TEXTGRID_TIERS = ('IntervalTier', 'TextTier')
+
+
+def decode_payload(piece: str, fmt: str) -> str:
+    """Return the text of a payload piece (TextGrid quotes are undoubled)."""
+    return piece.replace('""', '"') if fmt == 'textgrid' else piece
+
+
+def encode_payload(text: str, fmt: str) -> str:
+    """Return the payload piece for ``text`` (TextGrid quotes are doubled)."""
+    return text.replace('"', '""') if fmt == 'textgrid' else text
+
+
+def _append_text(pieces: List[str], text: str, separator: Pattern) -> None:
+    """Append ``text`` to ``pieces`` as payloads and literal separators."""
+    for position, part in enumerate(separator.split(text)):
+        core = part.strip()
+        if position % 2 or not core:
+            pieces[-1] += part
+            continue
+        lead = len(part) - len(part.lstrip())
+        pieces[-1] += part[:lead]
+        pieces.append(core)
+        pieces.append(part[lead + len(core):])
+
+
+def _cue_pieces(block: List[str], fmt: str) -> List[str]:
+    """Split an SRT/WebVTT block into pieces; the text follows the timing line."""
+    first = next((line for line in block if line.strip()), None)
+    if first is None or fmt == 'vtt' and first.lstrip('\ufeff').split(maxsplit=1)[0] in _VTT_BLOCKS:
+        return [''.join(block)]
+    for position, line in enumerate(block):
+        if '-->' in line:
+            pieces = [''.join(block[:position + 1])]
+            _append_text(pieces, ''.join(block[position + 1:]), _CUE_SEPARATOR)
+            return pieces
+    # Not a cue: leave it as it is
+    return [''.join(block)]
+
+
+def _iter_cue_blocks(lines: Iterable[str], fmt: str) -> Iterator[List[str]]:
+    """Split SRT/WebVTT lines into cue blocks."""
+    block: List[str] = []
+    blank = False
+    for line in lines:
+        if line.strip():
+            if blank:
+                yield _cue_pieces(block, fmt)
+                block = []
+                blank = False
+        elif block:
+            blank = True
+        block.append(line)
+    if block:
+        yield _cue_pieces(block, fmt)
+
+
+def _iter_textgrid(lines: Iterable[str]) -> Iterator[List[str]]:
+    """Split TextGrid lines (long or short format) into units."""
+    tier: Optional[str] = None
+    lines = iter(lines)
+    for line in lines:
+        match = _TEXTGRID_STRING.match(line)
+        if match is None:
+            if tier is not None:
+                yield [tier]
+                tier = None
+            yield [line]
+            continue
+
+        raw = line
+        body = _TEXTGRID_BODY.match(raw, match.end())
+        while body is None:
+            line = next(lines, None)
+            if line is None:
+                break
+            raw += line
+            body = _TEXTGRID_BODY.match(raw, match.end())
+        if body is None:
+            # Unterminated string: leave the rest of the file as it is
+            yield [(tier or '') + raw]
+            return
+
+        key = match.group(2)
+        if tier is not None:
+            # Name of the tier whose class was just read (short format)
+            yield [tier + raw]
+            tier = None
+        elif key is None and body.group(1) in _TEXTGRID_TIERS:
+            tier = raw
+        elif key is None or key in _TEXTGRID_KEYS:
+            pieces = [raw[:match.end()]]
+            _append_text(pieces, body.group(1), _LINE_SEPARATOR)
+            pieces[-1] += raw[body.end(1):]
+            yield pieces
+        else:
+            yield [raw]
+    if tier is not None:
+        yield [tier]
+
+
+def iter_cues(lines: Iterable[str], fmt: str) -> Iterator[List[str]]:
+    """Split a transcript into units of literal and payload pieces.
+
+    Args:
+        lines: Lines of a file opened with ``newline=''``.
+        fmt: One of ``TRANSCRIPT_FORMATS``.
+
+    Yields:
+        The pieces of each unit, alternating literal text and payload.
+
+    Raises:
+        ValueError: If ``fmt`` is not a transcript format.
+    """
+    if fmt in ('srt', 'vtt'):
+        return _iter_cue_blocks(lines, fmt)
+    if fmt == 'textgrid':
+        return _iter_textgrid(lines)
+    raise ValueError(f"Unsupported format: {fmt}")
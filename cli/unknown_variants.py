@@ -0,0 +1,123 @@
+"""Inspect and build top-K unknown variant counts.
+
+Usage:
+    python -m cli.unknown_variants top SKETCH [SKETCH ...] [--limit N] [--json]
+    python -m cli.unknown_variants merge SKETCH [SKETCH ...] --out MERGED
+    python -m cli.unknown_variants scan INPUT [INPUT ...] --sketch SKETCH
+
+``top`` lists the most frequent unknown variants of one or more count files
+(for example the ``HASSANIYA_UNKNOWN_SKETCH`` file of the web server, or one
+file per machine), merged. ``merge`` writes the merged counts to a new file.
+``scan`` normalizes text files line by line and adds the unknown variants of
+each line to a count file. Counts are approximate, see
+``normalizer/sketch.py``.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Iterable, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from normalizer import normalize_batch, reload_data, set_morphology
+from normalizer.sketch import DEFAULT_CAPACITY, HeavyHitters, UnknownVariantTracker, merge_files
+from cli.compression import open_text
+
+# Lines normalized per batch call when scanning
+SCAN_CHUNK_LINES = 1000
+
+
+def scan_files(paths: Iterable[str], tracker: UnknownVariantTracker) -> int:
+    """Normalize files line by line, counting the unknown variants of each line.
+
+    Returns:
+        Number of lines scanned.
+    """
+    lines_scanned = 0
+    for path in paths:
+        with open_text(path, 'r') as f:
+            while True:
+                lines = [line for _, line in zip(range(SCAN_CHUNK_LINES), f)]
+                if not lines:
+                    break
+                unknowns: List[List[str]] = []
+                normalize_batch(lines, unknowns)
+                for variants in unknowns:
+                    tracker.record(variants)
+                lines_scanned += len(lines)
+    tracker.flush()
+    return lines_scanned
+
+
+def format_top(summary: HeavyHitters, limit: int) -> str:
+    """Render the most frequent unknown variants as a table."""
+    rows = summary.top(limit)
+    if not rows:
+        return "No unknown variants recorded."
+    lines = [f"  {'count':>8} {'±':>6}  word"]
+    for word, count, error in rows:
+        lines.append(f"  {count:>8} {error:>6}  {word}")
+    lines.append(f"\n{len(rows)} of {len(summary)} tracked words; {summary.total} occurrences recorded")
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(description='Top-K unknown variant counts.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    top = commands.add_parser('top', help='List the most frequent unknown variants')
+    top.add_argument('sketches', nargs='+', help='Count files to merge')
+    top.add_argument('--limit', type=int, default=50, help='Words to list (default: 50)')
+    top.add_argument('--json', action='store_true', help='Print the list as JSON')
+
+    merge = commands.add_parser('merge', help='Merge count files into one')
+    merge.add_argument('sketches', nargs='+', help='Count files to merge')
+    merge.add_argument('--out', required=True, help='Merged count file')
+
+    scan = commands.add_parser('scan', help='Count the unknown variants of text files')
+    scan.add_argument('inputs', nargs='+', help='Text files (optionally compressed)')
+    scan.add_argument('--sketch', required=True, help='Count file to add to (created if missing)')
+    scan.add_argument('--morphology', action='store_true', help='Normalize with clitic-aware stem lookups')
+
+    for command in (merge, scan):
+        command.add_argument(
+            '--capacity',
+            type=int,
+            default=DEFAULT_CAPACITY,
+            help=f'Words kept (default: {DEFAULT_CAPACITY})'
+        )
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'top':
+            summary = merge_files(args.sketches, max(HeavyHitters.load(path).capacity for path in args.sketches))
+            if args.json:
+                print(json.dumps({
+                    'variants': [
+                        {'word': word, 'count': count, 'error': error}
+                        for word, count, error in summary.top(args.limit)
+                    ],
+                    'total': summary.total,
+                }, ensure_ascii=False, indent=2))
+            else:
+                print(format_top(summary, args.limit))
+        elif args.command == 'merge':
+            summary = merge_files(args.sketches, args.capacity)
+            summary.save(args.out)
+            print(f"Merged {len(args.sketches)} file(s) into '{args.out}' ({len(summary)} words)")
+        else:
+            set_morphology(args.morphology)
+            reload_data()
+            lines = scan_files(args.inputs, UnknownVariantTracker(args.sketch, args.capacity))
+            print(f"Scanned {lines} line(s) into '{args.sketch}'")
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -88,6 +88,7 @@ ACTIONS:
     web         Launch the custom web interface (recommended)
     gradio      Launch the Gradio interface
     normalize   Normalize a text file from command line
+    daemon      Start|stop|status of the warm normalizer used by 'normalize'
     install     Install/update dependencies
     help        Show this help message
 
@@ -96,6 +97,7 @@ EXAMPLES:
     ./hassaniya.sh gradio
     ./hassaniya.sh normalize input.txt output.txt
     ./hassaniya.sh normalize input.txt output.txt --show-diff
+    ./hassaniya.sh daemon start
     ./hassaniya.sh install
 
 WEB INTERFACE FEATURES:
@@ -196,13 +198,13 @@ case "$1" in
             exit 1
         fi
         
-        local python_cmd=$(get_python_cmd)
+        python_cmd=$(get_python_cmd)
         echo -e "${CYAN}🔤 Normalizing text from '$2' to '$3'...${NC}"
         
         if [ "$4" = "--show-diff" ]; then
-            $python_cmd -m cli.normalize_text --in "$2" --out "$3" --show-diff
+            $python_cmd -m cli.client --in "$2" --out "$3" --show-diff
         else
-            $python_cmd -m cli.normalize_text --in "$2" --out "$3"
+            $python_cmd -m cli.client --in "$2" --out "$3"
         fi
         
         if [ $? -eq 0 ]; then
@@ -213,6 +215,45 @@ case "$1" in
         fi
         ;;
     
+    'daemon')
+        python_cmd=$(get_python_cmd)
+        case "$2" in
+            'start')
+                log_file=$(mktemp)
+                nohup $python_cmd -m cli.daemon > "$log_file" 2>&1 &
+                daemon_pid=$!
+                # The daemon loads the data before it listens: wait for it
+                # (not another daemon) to answer, or report why it exited
+                for _ in $(seq 60); do
+                    if $python_cmd -m cli.daemon --status 2> /dev/null | grep -q "(pid $daemon_pid)"; then
+                        rm -f "$log_file"
+                        echo -e "${GREEN}✓ Daemon started (pid $daemon_pid)${NC}"
+                        exit 0
+                    fi
+                    if ! kill -0 "$daemon_pid" 2> /dev/null; then
+                        break
+                    fi
+                    sleep 0.5
+                done
+                kill "$daemon_pid" 2> /dev/null || true
+                cat "$log_file" >&2
+                rm -f "$log_file"
+                echo -e "${RED}✗ Daemon failed to start${NC}"
+                exit 1
+                ;;
+            'stop')
+                $python_cmd -m cli.daemon --stop
+                ;;
+            'status'|'')
+                $python_cmd -m cli.daemon --status
+                ;;
+            *)
+                echo -e "${YELLOW}Usage: ./hassaniya.sh daemon start|stop|status${NC}"
+                exit 1
+                ;;
+        esac
+        ;;
+    
     *)
         echo -e "${RED}✗ Unknown action: $1${NC}"
         show_help
@@ -4,7 +4,49 @@ This package provides functionality to normalize Hassaniya Arabic text using
 letter-level rules and variant mappings.
 """
 
-from .normalizer import normalize_text, normalize_word, unknown_variants, clear_unknown_variants
+from .normalizer import (
+    normalize_text,
+    normalize_word,
+    normalize_batch,
+    unknown_variants,
+    clear_unknown_variants,
+    reload_data,
+    refresh_data,
+)
+from .bulk import normalize_text_bulk
+from .compiler import DictionaryError
+from .morphology import set_morphology
+from .parallel import normalize_parallel
+from .tracing import add_hook, remove_hook, trace
+from .prefilter import prefilter_stats, reset_prefilter_stats, set_prefilter
+from .profiles import list_profiles, register_profile, set_profile, use_profile
+from .aio import anormalize_text, anormalize_batch, anormalize_lines, set_concurrency_limit
 
 __version__ = "0.1.0"
-__all__ = ["normalize_text", "normalize_word", "unknown_variants", "clear_unknown_variants"]
\ No newline at end of file
+__all__ = [
+    "normalize_text",
+    "normalize_word",
+    "normalize_batch",
+    "normalize_text_bulk",
+    "normalize_parallel",
+    "anormalize_text",
+    "anormalize_batch",
+    "anormalize_lines",
+    "set_concurrency_limit",
+    "set_morphology",
+    "set_prefilter",
+    "prefilter_stats",
+    "reset_prefilter_stats",
+    "DictionaryError",
+    "use_profile",
+    "set_profile",
+    "register_profile",
+    "list_profiles",
+    "trace",
+    "add_hook",
+    "remove_hook",
+    "unknown_variants",
+    "clear_unknown_variants",
+    "reload_data",
+    "refresh_data",
+]
\ No newline at end of file
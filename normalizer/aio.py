@@ -0,0 +1,208 @@
+"""Asyncio interface for Hassaniya text normalization.
+
+The coroutines in this module offload normalization to a bounded executor so
+that the event loop stays responsive. Large texts are cut at whitespace into
+chunks that are normalized as separate executor jobs, and the number of jobs
+in flight is limited by a semaphore shared by all calls on an event loop.
+
+Unknown variants are returned with each result instead of being tracked in
+the module-level ``unknown_variants`` list. The dictionary profile and the
+tracer selected when a coroutine is called are used for all of its jobs.
+"""
+
+import asyncio
+import re
+import weakref
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import AsyncIterable, AsyncIterator, Callable, List, Optional, Sequence, Tuple, TypeVar
+
+from .normalizer import normalize_batch
+from .parallel import _normalize_chunk
+from .profiles import current_profile, run_with_profile
+from .tracing import current_tracer, run_with_tracer
+
+T = TypeVar('T')
+
+# Default number of executor threads
+MAX_WORKERS = 4
+
+# Texts longer than this are normalized in several executor jobs
+CHUNK_CHARS = 65536
+
+# Texts per executor job in anormalize_batch and anormalize_lines
+BATCH_SIZE = 256
+
+_WHITESPACE = re.compile(r'\s')
+
+_executor: Optional[ThreadPoolExecutor] = None
+_concurrency_limit = MAX_WORKERS
+_semaphores: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]' = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def set_concurrency_limit(limit: int) -> None:
+    """Set the maximum number of executor jobs in flight per event loop.
+
+    Args:
+        limit: Maximum number of concurrent jobs (at least 1).
+
+    Raises:
+        ValueError: If ``limit`` is smaller than 1.
+    """
+    global _concurrency_limit
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    _concurrency_limit = limit
+    _semaphores.clear()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return the shared default executor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='hassaniya')
+    return _executor
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Return the job-limiting semaphore of the running event loop."""
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(_concurrency_limit)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+async def _run(func: Callable[..., T], *args, executor: Optional[Executor] = None) -> T:
+    """Run ``func`` in the executor, respecting the concurrency limit."""
+    # Executor threads do not inherit the caller's context
+    profile = current_profile()
+    if profile is not None:
+        func, args = run_with_profile, (profile, func) + args
+    tracer = current_tracer()
+    if tracer is not None:
+        func, args = run_with_tracer, (tracer, func) + args
+    async with _get_semaphore():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor or _get_executor(), func, *args)
+
+
+def _split_chunks(text: str, chunk_chars: int) -> List[str]:
+    """Cut ``text`` at whitespace into pieces of roughly ``chunk_chars``."""
+    chunks = []
+    start = 0
+    while len(text) - start > chunk_chars:
+        match = _WHITESPACE.search(text, start + chunk_chars)
+        if match is None:
+            break
+        chunks.append(text[start:match.start()])
+        start = match.end()
+    chunks.append(text[start:])
+    return chunks
+
+
+def _normalize_texts(texts: List[str]) -> Tuple[List[str], List[List[str]]]:
+    """Normalize texts, returning per-text unknown variants."""
+    per_text: List[List[str]] = []
+    return normalize_batch(texts, per_text), per_text
+
+
+async def anormalize_text(
+    text: str,
+    executor: Optional[Executor] = None,
+    chunk_chars: int = CHUNK_CHARS,
+) -> Tuple[str, List[str]]:
+    """Normalize a text without blocking the event loop.
+
+    Args:
+        text: The text to normalize.
+        executor: Executor for the CPU work (default: a shared thread pool).
+            A ``ProcessPoolExecutor`` may be passed for multi-core work.
+        chunk_chars: Approximate size of the pieces normalized per job.
+
+    Returns:
+        Tuple of (normalized text, unknown variants in the text).
+    """
+    if not text:
+        return text, []
+
+    jobs = [_run(_normalize_chunk, [chunk], executor=executor) for chunk in _split_chunks(text, chunk_chars)]
+    normalized_parts = []
+    unknowns: List[str] = []
+    for results, found in await asyncio.gather(*jobs):
+        if results[0]:
+            normalized_parts.append(results[0])
+        for variant in found:
+            if variant not in unknowns:
+                unknowns.append(variant)
+
+    return ' '.join(normalized_parts), unknowns
+
+
+async def anormalize_batch(
+    texts: Sequence[str],
+    executor: Optional[Executor] = None,
+    batch_size: int = BATCH_SIZE,
+) -> Tuple[List[str], List[List[str]]]:
+    """Normalize several texts without blocking the event loop.
+
+    Args:
+        texts: The texts to normalize.
+        executor: Executor for the CPU work (default: a shared thread pool).
+        batch_size: Texts per executor job.
+
+    Returns:
+        Tuple of (normalized texts, unknown variants per text), in input order.
+    """
+    jobs = [
+        _run(_normalize_texts, list(texts[i:i + batch_size]), executor=executor)
+        for i in range(0, len(texts), batch_size)
+    ]
+    results: List[str] = []
+    unknowns: List[List[str]] = []
+    for batch_results, batch_unknowns in await asyncio.gather(*jobs):
+        results.extend(batch_results)
+        unknowns.extend(batch_unknowns)
+    return results, unknowns
+
+
+async def anormalize_lines(
+    lines: AsyncIterable[str],
+    executor: Optional[Executor] = None,
+    batch_size: int = BATCH_SIZE,
+) -> AsyncIterator[Tuple[str, List[str]]]:
+    """Normalize lines from an async iterator as they arrive.
+
+    Lines are grouped into batches; the next batch is read while the previous
+    one is being normalized, so at most two batches are held in memory.
+
+    Args:
+        lines: Async iterable of lines (line endings are not preserved).
+        executor: Executor for the CPU work (default: a shared thread pool).
+        batch_size: Lines per executor job.
+
+    Yields:
+        Tuples of (normalized line, unknown variants in the line).
+    """
+    pending: Optional[asyncio.Future] = None
+    batch: List[str] = []
+
+    async for line in lines:
+        batch.append(line)
+        if len(batch) < batch_size:
+            continue
+        job = asyncio.ensure_future(_run(_normalize_texts, batch, executor=executor))
+        batch = []
+        if pending is not None:
+            for item in zip(*await pending):
+                yield item
+        pending = job
+
+    if pending is not None:
+        for item in zip(*await pending):
+            yield item
+    if batch:
+        for item in zip(*await _run(_normalize_texts, batch, executor=executor)):
+            yield item
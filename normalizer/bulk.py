@@ -0,0 +1,133 @@
+"""Bulk normalization engine.
+
+``normalize_text_bulk`` produces the same output as ``normalize_text`` but
+avoids per-token Python calls. Tokens are de-duplicated, the distinct tokens
+are joined into one string, and:
+
+1. a single compiled pattern pass splits every token into leading
+   punctuation, clean word and trailing punctuation;
+2. clean words are looked up in the variant dictionary;
+3. the گ/ق rule is applied with one pair of ``str.replace`` passes over the
+   remaining non-exception words, and the final ة rule with one pattern pass.
+   Large batches use the NumPy codepoint path of ``vectorized`` instead when
+   NumPy is installed.
+
+The output text is then assembled from the per-token results in C.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from .morphology import has_exception_stem, lookup_variant, morphology_enabled
+from .normalizer import PUNCTUATION, load_variants, normalize_text, unknown_variants
+from .prefilter import passes
+from .profiles import use_profile
+from .rules import load_exceptions
+from .tracing import current_tracer
+from .vectorized import NUMPY_AVAILABLE, VECTORIZE_MIN_WORDS, apply_letter_rules_batch
+
+# Tokens never contain whitespace, so they can be joined with newlines and
+# processed line by line
+_PUNCT_CLASS = '[' + re.escape(PUNCTUATION) + ']*'
+_TOKEN_PARTS = re.compile(f'^({_PUNCT_CLASS})(.*?)({_PUNCT_CLASS})$', re.MULTILINE)
+_FINAL_TAA = re.compile('ة$', re.MULTILINE)
+
+
+def normalize_tokens(tokens: List[str], unknowns: Optional[List[str]] = None) -> Dict[str, str]:
+    """Normalize distinct tokens in bulk.
+
+    Args:
+        tokens: Distinct whitespace-free tokens, in first-occurrence order.
+        unknowns: List receiving unknown variants, in first-occurrence order.
+
+    Returns:
+        Mapping of each token to its normalized form.
+    """
+    variants = load_variants()
+    exceptions = load_exceptions()
+    morphology = morphology_enabled()
+    parts = _TOKEN_PARTS.findall('\n'.join(tokens))
+
+    table: Dict[str, str] = {}
+    rule_tokens: List[str] = []
+    rule_parts = []
+    for token, (prefix, clean_word, suffix) in zip(tokens, parts):
+        if not clean_word:
+            table[token] = token
+        elif clean_word in variants:
+            table[token] = prefix + variants[clean_word] + suffix
+        else:
+            canonical = lookup_variant(clean_word, variants) if morphology else None
+            if canonical is not None:
+                table[token] = prefix + canonical + suffix
+            else:
+                rule_tokens.append(token)
+                rule_parts.append((prefix, clean_word, suffix))
+
+    if not rule_tokens:
+        return table
+
+    clean_words = [clean_word for _, clean_word, _ in rule_parts]
+    if NUMPY_AVAILABLE and len(clean_words) >= VECTORIZE_MIN_WORDS:
+        normalized_words = apply_letter_rules_batch(clean_words)
+    else:
+        if morphology:
+            exceptions = {
+                clean_word for clean_word in clean_words
+                if clean_word in exceptions or has_exception_stem(clean_word, exceptions)
+            }
+
+        # گ/ق → ك on non-exception words only, in one pass over all of them
+        replaced_text = '\n'.join(
+            [clean_word for clean_word in clean_words if clean_word not in exceptions]
+        ).replace('گ', 'ك').replace('ق', 'ك')
+        replaced_iter = iter(replaced_text.split('\n'))
+        replaced = [
+            clean_word if clean_word in exceptions else next(replaced_iter)
+            for clean_word in clean_words
+        ]
+
+        # Final ة → ه on all of them, in one pattern pass
+        normalized_words = _FINAL_TAA.sub('ه', '\n'.join(replaced)).split('\n')
+
+    seen = set(unknowns) if unknowns is not None else set()
+    for token, (prefix, clean_word, suffix), normalized in zip(rule_tokens, rule_parts, normalized_words):
+        table[token] = prefix + normalized + suffix
+        if unknowns is not None and normalized != clean_word and clean_word not in seen:
+            seen.add(clean_word)
+            unknowns.append(clean_word)
+
+    return table
+
+
+def normalize_text_bulk(text: str, unknowns: Optional[List[str]] = None, profile: Optional[str] = None) -> str:
+    """Normalize a text with the bulk engine.
+
+    Output and unknown-variant tracking are identical to ``normalize_text``,
+    which also handles the call while a tracer is active.
+
+    Args:
+        text: The text to normalize.
+        unknowns: Optional list collecting unknown variants for this call.
+            Defaults to the module-level ``unknown_variants`` list.
+        profile: Dictionary profile for this call (default: the one
+            currently selected).
+
+    Returns:
+        The normalized text.
+    """
+    if profile is not None:
+        with use_profile(profile):
+            return normalize_text_bulk(text, unknowns)
+    if not text:
+        return text
+    if current_tracer() is not None:
+        return normalize_text(text, unknowns)
+    if unknowns is None:
+        unknowns = unknown_variants
+
+    words = text.split()
+    if passes(text, words, load_variants()):
+        return ' '.join(words)
+    table = normalize_tokens(list(dict.fromkeys(words)), unknowns)
+    return ' '.join(map(table.__getitem__, words))
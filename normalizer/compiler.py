@@ -0,0 +1,105 @@
+"""Compile the variant data into a one-hop lookup table.
+
+The variant file lists canonical forms with their variants. Compiling it:
+
+1. validates the entries: a variant mapped to two different canonical forms
+   and chains that loop back on themselves are errors;
+2. collapses chains (a canonical form that is itself listed as a variant of
+   another word) so that every variant maps directly to its final form;
+3. maps every canonical form to itself, so known words are served with a
+   single dict hit and are never rewritten by the letter rules.
+
+Problems that do not make the result ambiguous are returned as warnings:
+variants that are also exception words (the variant mapping wins), variants
+that can never match because they contain whitespace or surrounding
+punctuation, entries mapping a word to itself, and canonical forms the letter
+rules would rewrite.
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .rules import apply_letter_rules
+
+
+class DictionaryError(ValueError):
+    """Raised when the variant data is inconsistent.
+
+    Args:
+        problems: Description of every error found.
+    """
+
+    def __init__(self, problems: List[str]):
+        self.problems = problems
+        super().__init__(f"Invalid variant data: {'; '.join(problems)}")
+
+
+def compile_variants(
+    entries: Iterable[Dict],
+    exceptions: Optional[Set[str]] = None,
+    punctuation: str = '',
+) -> Tuple[Dict[str, str], List[str]]:
+    """Validate variant entries and build the compiled lookup table.
+
+    Args:
+        entries: Entries with ``canonical`` and ``variants`` keys, in file order.
+        exceptions: Optional exception words, checked for overlaps.
+        punctuation: Characters stripped from words before lookup.
+
+    Returns:
+        Tuple of (mapping of every known word to its final form, warnings).
+
+    Raises:
+        DictionaryError: If a variant has conflicting canonical forms or a
+            chain of variants forms a cycle.
+    """
+    errors: List[str] = []
+    warnings: List[str] = []
+    mapping: Dict[str, str] = {}
+    canonicals: Dict[str, None] = {}
+
+    for entry in entries:
+        canonical = entry['canonical']
+        canonicals.setdefault(canonical)
+        for variant in entry['variants']:
+            if variant == canonical:
+                warnings.append(f"'{variant}' is listed as a variant of itself")
+                continue
+            previous = mapping.setdefault(variant, canonical)
+            if previous != canonical:
+                errors.append(f"'{variant}' is a variant of both '{previous}' and '{canonical}'")
+            if not variant or variant.split() != [variant] or variant.strip(punctuation) != variant:
+                warnings.append(f"'{variant}' can never match a word")
+            if exceptions and variant in exceptions:
+                warnings.append(f"'{variant}' is both a variant and an exception word; the variant wins")
+
+    # Follow every chain to its end, detecting cycles
+    compiled: Dict[str, str] = {}
+    reported: Set[str] = set()
+    for variant in mapping:
+        path = [variant]
+        target = mapping[variant]
+        while target in mapping and target not in compiled:
+            if target in path:
+                cycle = path[path.index(target):] + [target]
+                if not reported & set(cycle):
+                    errors.append(f"cycle: {' → '.join(cycle)}")
+                    reported.update(cycle)
+                break
+            path.append(target)
+            target = mapping[target]
+        else:
+            final = compiled.get(target, target)
+            for word in path:
+                compiled[word] = final
+
+    if errors:
+        raise DictionaryError(errors)
+
+    for canonical in canonicals:
+        if canonical in mapping:
+            continue
+        compiled[canonical] = canonical
+        if apply_letter_rules(canonical) != canonical:
+            warnings.append(f"canonical '{canonical}' would be rewritten by the letter rules; kept as is")
+
+    return compiled, warnings
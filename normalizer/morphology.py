@@ -0,0 +1,182 @@
+"""Clitic-aware lexicon lookup for Hassaniya text.
+
+Hassaniya and Arabic words carry proclitics (conjunctions و/ف, prepositions
+ب/ل, the article ال) and enclitic pronouns (possessive and object suffixes).
+The variant and exception lists only match whole words, so every inflected
+form would need its own entry. With morphology enabled, a word that has no
+exact entry is split into proclitic + stem + enclitic using prefix and suffix
+tries, and the stem is looked up instead:
+
+- a stem found in the variant dictionary is replaced by its canonical form
+  and the affixes are reattached (``والي`` → ``واللي``);
+- a stem found in the exception list makes the whole word an exception.
+
+Exact matches always take precedence, so enabling morphology never changes
+the normalization of words that are already listed. Morphology is disabled
+by default.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Conjunctions, prepositions and the article, combined in this order
+CONJUNCTIONS = ('', 'و', 'ف')
+PREPOSITIONS = ('', 'ب', 'ل')
+ARTICLES = ('', 'ال')
+
+# Possessive and object pronoun suffixes
+ENCLITICS = ('ي', 'ني', 'ك', 'كم', 'كن', 'ه', 'ها', 'هم', 'هن', 'نا', 'و')
+
+# Stems shorter than this are never looked up, to avoid spurious matches
+# such as و + لي
+MIN_STEM_LENGTH = 3
+
+_enabled = False
+
+
+def _proclitics() -> List[str]:
+    """Return every proclitic sequence (ل + ال is written لل)."""
+    proclitics = set()
+    for conjunction in CONJUNCTIONS:
+        for preposition in PREPOSITIONS:
+            for article in ARTICLES:
+                if preposition == 'ل' and article:
+                    proclitics.add(conjunction + 'لل')
+                else:
+                    proclitics.add(conjunction + preposition + article)
+    proclitics.discard('')
+    return sorted(proclitics)
+
+
+class AffixTrie:
+    """Character trie matching affixes at the start (or end) of words.
+
+    Args:
+        affixes: Affixes to match.
+        suffixes: Match at the end of words instead of the start.
+    """
+
+    _END = ''
+
+    def __init__(self, affixes: Iterable[str], suffixes: bool = False):
+        self.suffixes = suffixes
+        self.root: Dict[str, dict] = {}
+        for affix in affixes:
+            node = self.root
+            for char in reversed(affix) if suffixes else affix:
+                node = node.setdefault(char, {})
+            node[self._END] = {}
+
+    def match_lengths(self, word: str) -> List[int]:
+        """Return the lengths of all affixes ``word`` starts (or ends) with.
+
+        The empty affix (length 0) is always included first.
+        """
+        lengths = [0]
+        node = self.root
+        for depth, char in enumerate(reversed(word) if self.suffixes else word, 1):
+            node = node.get(char)
+            if node is None:
+                break
+            if self._END in node:
+                lengths.append(depth)
+        return lengths
+
+
+PROCLITIC_TRIE = AffixTrie(_proclitics())
+ENCLITIC_TRIE = AffixTrie(ENCLITICS, suffixes=True)
+
+
+def set_morphology(enabled: bool) -> None:
+    """Enable or disable clitic-aware lookups for all normalization engines."""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def morphology_enabled() -> bool:
+    """Return True if clitic-aware lookups are enabled."""
+    return _enabled
+
+
+def splits(word: str) -> Iterator[Tuple[str, str, str]]:
+    """Yield the (proclitic, stem, enclitic) analyses of a word.
+
+    Analyses stripping fewer characters come first; the word itself (no
+    affixes) is not included.
+    """
+    prefix_lengths = PROCLITIC_TRIE.match_lengths(word)
+    suffix_lengths = ENCLITIC_TRIE.match_lengths(word)
+    candidates = [
+        (prefix_length + suffix_length, prefix_length, suffix_length)
+        for prefix_length in prefix_lengths
+        for suffix_length in suffix_lengths
+        if (prefix_length or suffix_length)
+        and len(word) - prefix_length - suffix_length >= MIN_STEM_LENGTH
+    ]
+    for _, prefix_length, suffix_length in sorted(candidates):
+        end = len(word) - suffix_length
+        yield word[:prefix_length], word[prefix_length:end], word[end:]
+
+
+def stems(word: str) -> Set[str]:
+    """Return every stem ``word`` could be looked up by."""
+    return {stem for _, stem, _ in splits(word)}
+
+
+def lookup_variant(word: str, variants: Dict[str, str]) -> Optional[str]:
+    """Return the canonical form of ``word`` via its stem, or None.
+
+    Args:
+        word: Clean word without an exact variant entry.
+        variants: Variant dictionary.
+    """
+    for prefix, stem, suffix in splits(word):
+        canonical = variants.get(stem)
+        if canonical is not None:
+            return prefix + canonical + suffix
+    return None
+
+
+def has_exception_stem(word: str, exceptions: Set[str]) -> bool:
+    """Return True if a stem of ``word`` is in the exception list."""
+    return any(stem in exceptions for _, stem, _ in splits(word))
+
+
+def compact_exceptions(exceptions: Iterable[str]) -> Tuple[List[str], Dict[str, str]]:
+    """Remove exception words covered by a shorter listed stem.
+
+    Returns:
+        Tuple of (words to keep, mapping of each removed word to the kept
+        stem covering it).
+    """
+    kept: Set[str] = set()
+    removed: Dict[str, str] = {}
+    for word in sorted(set(exceptions), key=lambda w: (len(w), w)):
+        stem = next((stem for _, stem, _ in splits(word) if stem in kept), None)
+        if stem is None:
+            kept.add(word)
+        else:
+            removed[word] = stem
+    return sorted(kept), removed
+
+
+def compact_variants(variants: Dict[str, str]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Remove variant entries reproduced by a shorter listed variant's stem.
+
+    Returns:
+        Tuple of (variant dictionary to keep, in the original order, and
+        mapping of each removed variant to the kept variant covering it).
+    """
+    kept: Dict[str, str] = {}
+    removed: Dict[str, str] = {}
+    for word in sorted(variants, key=lambda w: (len(w), w)):
+        canonical = variants[word]
+        stem = next(
+            (stem for prefix, stem, suffix in splits(word)
+             if stem in kept and prefix + kept[stem] + suffix == canonical),
+            None,
+        )
+        if stem is None:
+            kept[word] = canonical
+        else:
+            removed[word] = stem
+    return {word: variants[word] for word in variants if word in kept}, removed
@@ -5,20 +5,57 @@ variant lookups with letter-level rules.
 """
 
 import json
-from typing import Dict, List
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .compiler import compile_variants
+from .morphology import lookup_variant, morphology_enabled, splits
+from .prefilter import passes
+from .profiles import clear_profiles, current_profile, use_profile
+from .rules import PUNCTUATION, apply_letter_rules, load_exceptions
+from .tracing import Tracer, current_tracer
+
 # Global variables for caching
 _variant_dict: Dict[str, str] = {}
 unknown_variants: List[str] = []
 
+# Data files as of the last reload_data, for refresh_data
+_loaded_signature: Optional[Tuple[Tuple[str, int, int], ...]] = None
+
+
+def load_variants(force_reload: bool = False) -> Mapping[str, str]:
+    """Return the variant mappings of the selected dictionary profile.
 
-def load_variants(force_reload: bool = False) -> Dict[str, str]:
+    Without a profile (see ``profiles.use_profile``) this is the base
+    dictionary from ``load_base_variants``.
+    
+    Args:
+        force_reload: If True, reload the base data even if already cached.
+    
+    Returns:
+        Mapping of variant words to their canonical forms.
+
+    Raises:
+        DictionaryError: If the variant data has conflicts or cycles.
+    """
+    variants = load_base_variants(force_reload)
+    profile = current_profile()
+    return variants if profile is None else profile.variants
+
+
+def load_base_variants(force_reload: bool = False) -> Dict[str, str]:
     """Load variant mappings from JSONL file.
+
+    The entries are compiled first: chains are collapsed so that every variant
+    maps to its final form, and canonical forms map to themselves.
     
     Args:
         force_reload: If True, reload data even if already cached.
     
     Returns:
         Dictionary mapping variant words to their canonical forms.
+
+    Raises:
+        DictionaryError: If the variant data has conflicts or cycles.
     """
     global _variant_dict
     if not _variant_dict or force_reload:
@@ -29,21 +66,19 @@ def load_variants(force_reload: bool = False) -> Dict[str, str]:
             with open(variants_file, 'r', encoding='utf-8') as f:
                 lines = f.readlines()
             
-            for line in lines:
-                line = line.strip()
-                if line:
-                    entry = json.loads(line)
-                    canonical = entry['canonical']
-                    for variant in entry['variants']:
-                        _variant_dict[variant] = canonical
+            entries = [json.loads(line) for line in lines if line.strip()]
         except (FileNotFoundError, json.JSONDecodeError):
             # If file doesn't exist or is malformed, use empty dict
             _variant_dict = {}
+        else:
+            # A new dict, so caches keyed on the old one (profiles, prefilter)
+            # see the reload
+            _variant_dict, _ = compile_variants(entries, punctuation=PUNCTUATION)
     
     return _variant_dict
 
 
-def normalize_word(word: str) -> str:
+def normalize_word(word: str, unknowns: Optional[List[str]] = None) -> str:
     """Normalize a single word using variant lookup and letter rules.
     
     Workflow:
@@ -54,17 +89,26 @@ def normalize_word(word: str) -> str:
     
     Args:
         word: The word to normalize.
+        unknowns: Optional list collecting unknown variants for this call.
+            Defaults to the module-level ``unknown_variants`` list.
         
     Returns:
         The normalized word.
     """
+    tracer = current_tracer()
+    if tracer is not None and word:
+        return _trace_word(word, unknowns, tracer)
+    return _normalize_word(word, unknowns)
+
+
+def _normalize_word(word: str, unknowns: Optional[List[str]] = None) -> str:
+    """``normalize_word`` without the tracer check, for the per-token loops."""
     if not word:
         return word
     
     # Remove punctuation for lookup but preserve it
-    punctuation = '.,!?;:()[]{}"\'\''
-    clean_word = word.strip(punctuation)
-    prefix = word[:len(word) - len(word.lstrip(punctuation))]
+    clean_word = word.strip(PUNCTUATION)
+    prefix = word[:len(word) - len(word.lstrip(PUNCTUATION))]
     suffix = word[len(clean_word) + len(prefix):]
     
     if not clean_word:
@@ -76,35 +120,185 @@ def normalize_word(word: str) -> str:
     if clean_word in variants:
         return prefix + variants[clean_word] + suffix
     
-    # Step 2: Apply letter rules
+    # Step 1b: Look the stem up when clitic-aware lookups are enabled
+    if morphology_enabled():
+        canonical = lookup_variant(clean_word, variants)
+        if canonical is not None:
+            return prefix + canonical + suffix
+    
+    # Step 2: Apply letter rules, unless the word has nothing they rewrite
+    if 'گ' not in clean_word and 'ق' not in clean_word and not clean_word.endswith('ة'):
+        return word
     normalized = apply_letter_rules(clean_word)
     
     # Step 3: Track unknown variants (words that weren't in dictionary)
-    if clean_word not in unknown_variants and clean_word != normalized:
-        unknown_variants.append(clean_word)
+    if unknowns is None:
+        unknowns = unknown_variants
+    if clean_word not in unknowns and clean_word != normalized:
+        unknowns.append(clean_word)
     
     return prefix + normalized + suffix
 
 
-def normalize_text(text: str) -> str:
+def _trace_word(word: str, unknowns: Optional[List[str]], tracer: Tracer, **context: Any) -> str:
+    """Normalize a word like ``normalize_word``, reporting the decision to ``tracer``.
+
+    Args:
+        word: The word to normalize.
+        unknowns: Optional list collecting unknown variants.
+        tracer: Callable receiving the event (see ``tracing``).
+        **context: Extra event fields, such as the text index of a batch.
+
+    Returns:
+        The normalized word.
+    """
+    clean_word = word.strip(PUNCTUATION)
+    prefix = word[:len(word) - len(word.lstrip(PUNCTUATION))]
+    suffix = word[len(clean_word) + len(prefix):]
+    event: Dict[str, Any] = {'token': word, 'word': clean_word, 'decision': None}
+    variants = load_variants()
+    morphology = morphology_enabled()
+
+    normalized = None
+    if clean_word in variants:
+        normalized = variants[clean_word]
+        event.update(decision='variant', canonical=normalized)
+    elif clean_word and morphology:
+        for _, stem, _ in splits(clean_word):
+            if stem in variants:
+                normalized = lookup_variant(clean_word, variants)
+                event.update(decision='stem', stem=stem, canonical=variants[stem])
+                break
+
+    if normalized is None:
+        normalized = apply_letter_rules(clean_word) if clean_word else clean_word
+        rules = []
+        if 'گ' in clean_word or 'ق' in clean_word:
+            exceptions = load_exceptions()
+            exception = clean_word if clean_word in exceptions else None
+            if exception is None and morphology:
+                exception = next((stem for _, stem, _ in splits(clean_word) if stem in exceptions), None)
+            if exception is not None:
+                event['exception'] = exception
+            else:
+                rules.append('gaf_qaf')
+        if clean_word.endswith('ة'):
+            rules.append('final_taa')
+        if rules:
+            event['rules'] = rules
+        event['decision'] = 'exception' if 'exception' in event else 'rules' if rules else 'unchanged'
+
+        if unknowns is None:
+            unknowns = unknown_variants
+        if clean_word not in unknowns and clean_word != normalized:
+            unknowns.append(clean_word)
+
+    event['output'] = prefix + normalized + suffix
+    event.update(context)
+    tracer(event)
+    return event['output']
+
+
+def normalize_text(text: str, unknowns: Optional[List[str]] = None, profile: Optional[str] = None) -> str:
     """Normalize a complete text by processing each word.
     
     Args:
         text: The text to normalize.
+        unknowns: Optional list collecting unknown variants for this call.
+            Defaults to the module-level ``unknown_variants`` list.
+        profile: Dictionary profile for this call (default: the one
+            currently selected).
         
     Returns:
         The normalized text.
     """
+    if profile is not None:
+        with use_profile(profile):
+            return normalize_text(text, unknowns)
     if not text:
         return text
     
     # Split on whitespace and normalize each word
     words = text.split()
-    normalized_words = [normalize_word(word) for word in words]
+    tracer = current_tracer()
+    if tracer is not None:
+        return ' '.join([_trace_word(word, unknowns, tracer) for word in words])
+    if passes(text, words, load_variants()):
+        return ' '.join(words)
+    normalized_words = [_normalize_word(word, unknowns) for word in words]
     
     return ' '.join(normalized_words)
 
 
+def normalize_batch(
+    texts: Iterable[str],
+    unknowns: Optional[List[List[str]]] = None,
+    profile: Optional[str] = None,
+) -> List[str]:
+    """Normalize several texts in a single call.
+    
+    Each distinct token is normalized once per batch, so texts sharing
+    vocabulary (the common case for concurrent requests) reuse each other's
+    work. Results are identical to calling ``normalize_text`` on each text.
+    
+    Args:
+        texts: The texts to normalize.
+        unknowns: Optional list that receives one list of unknown variants
+            per text. If omitted, unknown variants are tracked in the
+            module-level ``unknown_variants`` list.
+        profile: Dictionary profile for this call (default: the one
+            currently selected).
+        
+    Returns:
+        The normalized texts, in input order.
+    """
+    if profile is not None:
+        with use_profile(profile):
+            return normalize_batch(texts, unknowns)
+    memo: Dict[str, Tuple[str, Optional[str]]] = {}
+    results = []
+    variants = load_variants()
+    tracer = current_tracer()
+    
+    for index, text in enumerate(texts):
+        text_unknowns = [] if unknowns is not None else unknown_variants
+        if not text:
+            results.append(text)
+            if unknowns is not None:
+                unknowns.append(text_unknowns)
+            continue
+        
+        words = text.split()
+        if tracer is not None:
+            results.append(' '.join([_trace_word(word, text_unknowns, tracer, text=index) for word in words]))
+            if unknowns is not None:
+                unknowns.append(text_unknowns)
+            continue
+        if passes(text, words, variants):
+            results.append(' '.join(words))
+            if unknowns is not None:
+                unknowns.append(text_unknowns)
+            continue
+        
+        normalized_words = []
+        for word in words:
+            cached = memo.get(word)
+            if cached is None:
+                found: List[str] = []
+                cached = (_normalize_word(word, found), found[0] if found else None)
+                memo[word] = cached
+            normalized, unknown = cached
+            if unknown is not None and unknown not in text_unknowns:
+                text_unknowns.append(unknown)
+            normalized_words.append(normalized)
+        
+        results.append(' '.join(normalized_words))
+        if unknowns is not None:
+            unknowns.append(text_unknowns)
+    
+    return results
+
+
 def clear_unknown_variants() -> None:
     """Clear the list of unknown variants.
     
@@ -114,16 +308,53 @@ def clear_unknown_variants() -> None:
     unknown_variants.clear()
 
 
+def _data_signature() -> Tuple[Tuple[str, int, int], ...]:
+    """Return the path, size and modification time of every data file."""
+    import os
+    from .profiles import PROFILES_DIR
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+    paths = [os.path.join(data_dir, 'hassaniya_variants.jsonl'), os.path.join(data_dir, 'exception_words_g_q.json')]
+    if PROFILES_DIR.is_dir():
+        paths += sorted(str(path) for path in PROFILES_DIR.glob('*.json'))
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        signature.append((path, stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+def refresh_data() -> bool:
+    """Reload the data files only if they changed since they were loaded.
+    
+    Long-running processes call this instead of ``reload_data`` before each
+    unit of work; a change is detected by file size and modification time.
+    
+    Returns:
+        True if the data was reloaded.
+    """
+    if _loaded_signature is not None and _data_signature() == _loaded_signature:
+        return False
+    reload_data()
+    return True
+
+
 def reload_data() -> None:
     """Force reload of all data files (variants and exceptions).
     
     This clears the cache and reloads data from files.
     Useful when data files have been updated.
     """
-    global _variant_dict
+    global _variant_dict, _loaded_signature
+    _loaded_signature = _data_signature()
     _variant_dict = {}
-    load_variants(force_reload=True)
+    load_base_variants(force_reload=True)
     
     # Also reload exceptions from rules module
     from .rules import reload_exceptions
-    reload_exceptions()
\ No newline at end of file
+    reload_exceptions()
+    
+    # Profiles are rebuilt on the new base data
+    clear_profiles()
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""Parallel normalization of many texts.
+
+This module spreads ``normalize_batch`` over several CPU cores. The executor
+is chosen from the measured cost of the input: small jobs run inline, large
+jobs run in a process pool whose workers load the data files once, and a
+thread pool is used instead of processes on free-threaded Python builds.
+Workers use the dictionary profile selected by the caller. While a tracer is
+active (see ``tracing``) everything runs inline, so the tracer sees every
+event.
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Iterable, List, Optional, Tuple
+
+from .morphology import morphology_enabled, set_morphology
+from .normalizer import load_variants, normalize_batch, unknown_variants
+from .profiles import current_profile, run_with_profile, set_profile
+from .rules import load_exceptions
+from .tracing import current_tracer
+
+# Number of texts normalized inline to estimate the per-item cost
+SAMPLE_SIZE = 32
+
+# Rough cost of starting one worker process and loading the data files
+PROCESS_STARTUP_SECONDS = 0.15
+
+# Target duration of a single chunk handed to a worker
+TARGET_CHUNK_SECONDS = 0.05
+
+EXECUTORS = ('auto', 'inline', 'thread', 'process')
+
+
+def _init_worker(morphology: bool = False, profile: Optional[str] = None) -> None:
+    """Load variants and exceptions once when a worker process starts."""
+    set_morphology(morphology)
+    set_profile(profile)
+    load_variants()
+    load_exceptions()
+
+
+def _normalize_chunk(texts: List[str]) -> Tuple[List[str], List[str]]:
+    """Normalize a chunk of texts in a worker.
+
+    Args:
+        texts: The texts to normalize.
+
+    Returns:
+        Tuple of (normalized texts, unknown variants found in the chunk).
+    """
+    per_text: List[List[str]] = []
+    results = normalize_batch(texts, per_text)
+    chunk_unknowns: List[str] = []
+    seen = set()
+    for variants in per_text:
+        for variant in variants:
+            if variant not in seen:
+                seen.add(variant)
+                chunk_unknowns.append(variant)
+    return results, chunk_unknowns
+
+
+def _gil_enabled() -> bool:
+    """Return True unless running on a free-threaded Python build."""
+    check = getattr(sys, '_is_gil_enabled', None)
+    return True if check is None else check()
+
+
+def _auto_chunksize(per_item_seconds: float, remaining: int, workers: int) -> int:
+    """Pick a chunk size that keeps chunks near ``TARGET_CHUNK_SECONDS``.
+
+    Chunks are capped so that every worker receives at least four of them,
+    which keeps the pool balanced when item costs vary.
+    """
+    by_cost = int(TARGET_CHUNK_SECONDS / per_item_seconds) if per_item_seconds > 0 else remaining
+    by_balance = -(-remaining // (workers * 4))
+    return max(1, min(by_cost, by_balance))
+
+
+def normalize_parallel(
+    texts: Iterable[str],
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    unknowns: Optional[List[str]] = None,
+    executor: str = 'auto',
+) -> List[str]:
+    """Normalize many texts using multiple CPU cores.
+
+    The first texts are normalized inline to measure the per-item cost. The
+    remaining work then stays inline if it would take less time than
+    starting the workers, and otherwise goes to a pool. Order is preserved
+    and results are identical to ``normalize_text`` on each text.
+
+    Args:
+        texts: The texts to normalize.
+        workers: Number of workers (default: ``os.cpu_count()``).
+        chunksize: Texts per work unit (default: tuned from the measured
+            per-item cost).
+        unknowns: Optional list receiving the unknown variants found across
+            all workers. Defaults to the module-level ``unknown_variants``.
+        executor: ``'auto'``, ``'inline'``, ``'thread'`` or ``'process'``.
+
+    Returns:
+        The normalized texts, in input order.
+
+    Raises:
+        ValueError: If ``executor``, ``workers`` or ``chunksize`` is invalid.
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(f"executor must be one of {', '.join(EXECUTORS)}")
+    if workers is not None and workers < 1:
+        raise ValueError("workers must be at least 1")
+    if chunksize is not None and chunksize < 1:
+        raise ValueError("chunksize must be at least 1")
+
+    texts = list(texts)
+    workers = workers or os.cpu_count() or 1
+    if unknowns is None:
+        unknowns = unknown_variants
+    seen = set(unknowns)
+
+    def merge(found: List[str]) -> None:
+        for variant in found:
+            if variant not in seen:
+                seen.add(variant)
+                unknowns.append(variant)
+
+    # Measure the per-item cost on a sample, keeping its results; the cost
+    # picks the executor in auto mode and the chunk size in every mode
+    sample = texts[:SAMPLE_SIZE]
+    start = time.perf_counter()
+    results, found = _normalize_chunk(sample)
+    per_item = (time.perf_counter() - start) / len(sample) if sample else 0.0
+    merge(found)
+
+    remaining = texts[len(sample):]
+    if not remaining:
+        return results
+
+    if current_tracer() is not None:
+        executor = 'inline'
+    elif executor == 'auto':
+        estimated = per_item * len(remaining)
+        if workers == 1 or estimated < PROCESS_STARTUP_SECONDS * 2:
+            executor = 'inline'
+        else:
+            executor = 'process' if _gil_enabled() else 'thread'
+
+    if executor == 'inline':
+        chunk_results, found = _normalize_chunk(remaining)
+        merge(found)
+        return results + chunk_results
+
+    if chunksize is None:
+        chunksize = _auto_chunksize(per_item, len(remaining), workers)
+    chunks = [remaining[i:i + chunksize] for i in range(0, len(remaining), chunksize)]
+
+    profile = current_profile()
+    pool: Executor
+    if executor == 'process':
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(morphology_enabled(), profile.name if profile else None))
+        normalize_chunk = _normalize_chunk
+    else:
+        load_variants()
+        load_exceptions()
+        pool = ThreadPoolExecutor(max_workers=workers)
+        normalize_chunk = partial(run_with_profile, profile, _normalize_chunk)
+
+    with pool:
+        for chunk_results, found in pool.map(normalize_chunk, chunks):
+            results.extend(chunk_results)
+            merge(found)
+
+    return results
@@ -0,0 +1,106 @@
+"""Fast path for texts that normalization cannot change.
+
+Most lines contain none of the characters the letter rules rewrite and no
+dictionary variant. ``passes`` detects such lines with a scan for those
+characters and one set-membership pass over the tokens, so callers can return
+the (whitespace-collapsed) line without looking up or rewriting any token.
+
+The membership filter is the set of variant keys that map to a different
+word; keys mapping to themselves cannot change a token. A frozenset is exact
+and, in CPython, faster than a pure-Python Bloom filter or first-character
+index would be. For the same reason the character scan uses substring tests
+rather than a compiled character class, and punctuation is only stripped from
+the tokens when the line contains some. One filter is kept per variant
+mapping, so dictionary profiles get their own.
+
+The line-level fast path is off while morphology is enabled, because a clitic
+form of a variant may be any token. The counters behind ``prefilter_stats``
+are updated without a lock and may be slightly off under concurrent use.
+"""
+
+import re
+from itertools import repeat
+from typing import Any, Dict, FrozenSet, List, Mapping, Tuple
+
+from .morphology import morphology_enabled
+from .rules import PUNCTUATION, RULE_CHARACTERS
+
+_GAF, _QAF, _TAA_MARBUTA = RULE_CHARACTERS
+_PUNCTUATION_SCAN = re.compile('[' + re.escape(PUNCTUATION) + ']')
+
+# Changing variant keys per variant mapping, keyed by id(); the mapping is
+# kept alive by the entry so the id cannot be reused while cached
+_MAX_FILTERS = 32
+_filters: Dict[int, Tuple[Mapping[str, str], FrozenSet[str]]] = {}
+
+_enabled = True
+_stats = {'texts': 0, 'texts_skipped': 0, 'tokens': 0, 'tokens_skipped': 0}
+
+
+def set_prefilter(enabled: bool) -> None:
+    """Enable or disable the fast path (enabled by default)."""
+    global _enabled
+    _enabled = enabled
+
+
+def prefilter_enabled() -> bool:
+    """Return whether the fast path is enabled."""
+    return _enabled
+
+
+def variant_filter(variants: Mapping[str, str]) -> FrozenSet[str]:
+    """Return the variant keys of ``variants`` that map to another word."""
+    entry = _filters.get(id(variants))
+    if entry is not None and entry[0] is variants:
+        return entry[1]
+    keys = frozenset([word for word, canonical in variants.items() if word != canonical])
+    if len(_filters) >= _MAX_FILTERS:
+        _filters.clear()
+    _filters[id(variants)] = (variants, keys)
+    return keys
+
+
+def passes(text: str, words: List[str], variants: Mapping[str, str]) -> bool:
+    """Return whether normalization leaves every token of ``text`` unchanged.
+
+    Args:
+        text: The text being normalized.
+        words: ``text.split()``.
+        variants: The active variant mapping.
+
+    Returns:
+        True if ``' '.join(words)`` is the normalized text.
+    """
+    if not _enabled or morphology_enabled():
+        return False
+    _stats['texts'] += 1
+    _stats['tokens'] += len(words)
+    if _GAF in text or _QAF in text or _TAA_MARBUTA in text:
+        return False
+    keys = variant_filter(variants)
+    if keys:
+        if not keys.isdisjoint(words):
+            return False
+        if _PUNCTUATION_SCAN.search(text) and not keys.isdisjoint(map(str.strip, words, repeat(PUNCTUATION))):
+            return False
+    _stats['texts_skipped'] += 1
+    _stats['tokens_skipped'] += len(words)
+    return True
+
+
+def prefilter_stats() -> Dict[str, Any]:
+    """Return how many texts and tokens the fast path has skipped.
+
+    Returns:
+        Dict with ``texts``, ``texts_skipped``, ``tokens``, ``tokens_skipped``
+        and ``skip_rate`` (skipped share of tokens, 0.0 when none were seen).
+    """
+    stats: Dict[str, Any] = dict(_stats)
+    stats['skip_rate'] = stats['tokens_skipped'] / stats['tokens'] if stats['tokens'] else 0.0
+    return stats
+
+
+def reset_prefilter_stats() -> None:
+    """Reset the counters behind ``prefilter_stats``."""
+    for key in _stats:
+        _stats[key] = 0
@@ -0,0 +1,396 @@
+"""Named dictionary profiles layered on the shared lexicon.
+
+A profile adapts the base data (``data/hassaniya_variants.jsonl`` and the
+exception list) for one sub-dialect or customer. It is described by a JSON
+file ``data/profiles/<name>.json`` (or registered with
+``register_profile``)::
+
+    {
+        "description": "Atar speakers",
+        "extends": "north",
+        "variants": [{"canonical": "...", "variants": ["...", "..."]}],
+        "remove_variants": ["..."],
+        "exceptions": ["..."],
+        "remove_exceptions": ["..."]
+    }
+
+Every key is optional. ``extends`` builds on another profile instead of the
+base data. Variants a profile lists override the base mapping of the same
+words, and removed words fall back to the letter rules.
+
+The profile is compiled like the base data (chains collapsed, conflicts
+rejected) and only its difference from the base is kept: ``variants`` and
+``exceptions`` are copy-on-write overlays that read through to the base
+dictionary and set, so each profile costs memory in proportion to its
+changes rather than to the lexicon.
+
+A profile is selected for a block of code with ``use_profile`` (per thread
+and per asyncio task) or for the whole process with ``set_profile``; every
+engine then reads the overlay through ``load_variants`` and
+``load_exceptions``. Profiles are rebuilt after ``reload_data``.
+"""
+
+import json
+import re
+import threading
+from collections.abc import Mapping, Set as AbstractSet
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple, TypeVar
+
+T = TypeVar('T')
+
+PROFILES_DIR = Path(__file__).parent.parent / 'data' / 'profiles'
+
+# Name selecting the base data without a profile
+DEFAULT_PROFILE = 'default'
+
+SPEC_KEYS = ('description', 'extends', 'variants', 'remove_variants', 'exceptions', 'remove_exceptions')
+
+_NAME = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+class OverlayDict(Mapping):
+    """Read-only mapping: ``base`` with ``added`` entries and ``removed`` keys.
+
+    Args:
+        base: Shared base mapping (not copied).
+        added: Entries added or replaced.
+        removed: Keys of ``base`` hidden by the overlay.
+    """
+
+    __slots__ = ('base', 'added', 'removed', '_length')
+
+    def __init__(self, base: Dict[str, str], added: Dict[str, str], removed: FrozenSet[str]):
+        self.base = base
+        self.added = added
+        self.removed = removed
+        self._length = len(base) - len(removed) + sum(1 for key in added if key not in base)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.added or (key in self.base and key not in self.removed)
+
+    def __getitem__(self, key: str) -> str:
+        value = self.added.get(key)
+        if value is not None:
+            return value
+        if key in self.removed:
+            raise KeyError(key)
+        return self.base[key]
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        value = self.added.get(key)
+        if value is not None:
+            return value
+        if key in self.removed:
+            return default
+        return self.base.get(key, default)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.base:
+            if key not in self.removed:
+                yield key
+        for key in self.added:
+            if key not in self.base:
+                yield key
+
+    def __len__(self) -> int:
+        return self._length
+
+
+class OverlaySet(AbstractSet):
+    """Read-only set: ``base`` with ``added`` and without ``removed`` items.
+
+    Args:
+        base: Shared base set (not copied).
+        added: Items not in ``base``.
+        removed: Items of ``base`` hidden by the overlay.
+    """
+
+    __slots__ = ('base', 'added', 'removed', '_length')
+
+    def __init__(self, base: Set[str], added: FrozenSet[str], removed: FrozenSet[str]):
+        self.base = base
+        self.added = added
+        self.removed = removed
+        self._length = len(base) - len(removed) + len(added)
+
+    def __contains__(self, item: object) -> bool:
+        return item in self.added or (item in self.base and item not in self.removed)
+
+    def __iter__(self) -> Iterator[str]:
+        for item in self.base:
+            if item not in self.removed:
+                yield item
+        yield from self.added
+
+    def __len__(self) -> int:
+        return self._length
+
+
+class Profile:
+    """A compiled dictionary profile.
+
+    Attributes:
+        name: Profile name.
+        description: Free-text description from the spec.
+        variants: Variant mapping (overlay on the base mapping).
+        exceptions: Exception words (overlay on the base set).
+    """
+
+    def __init__(self, name: str, description: str, variants: OverlayDict, exceptions: OverlaySet):
+        self.name = name
+        self.description = description
+        self.variants = variants
+        self.exceptions = exceptions
+
+    def __repr__(self) -> str:
+        return f"Profile({self.name!r})"
+
+    def __reduce__(self):
+        # Worker processes rebuild the profile by name from their own data
+        return get_profile, (self.name,)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the size of the profile's difference from the base data."""
+        return {
+            'added_variants': len(self.variants.added),
+            'removed_variants': len(self.variants.removed),
+            'added_exceptions': len(self.exceptions.added),
+            'removed_exceptions': len(self.exceptions.removed),
+        }
+
+
+_active: ContextVar[Optional[Profile]] = ContextVar('hassaniya_profile')
+_default: Optional[Profile] = None
+
+_registered: Dict[str, Dict[str, Any]] = {}
+_compiled: Dict[str, Profile] = {}
+_lock = threading.RLock()
+_base_loaders: Optional[Tuple[Callable[[], Dict[str, str]], Callable[[], Set[str]]]] = None
+
+
+def current_profile() -> Optional[Profile]:
+    """Return the profile selected in this context, or None for the base data."""
+    return _active.get(_default)
+
+
+def _check_name(name: str) -> None:
+    if not _NAME.match(name):
+        raise ValueError(f"Invalid profile name: {name!r}")
+
+
+def _validate_spec(name: str, spec: Any) -> Dict[str, Any]:
+    if not isinstance(spec, dict):
+        raise ValueError(f"Profile {name!r} must be a JSON object")
+    unknown = sorted(set(spec) - set(SPEC_KEYS))
+    if unknown:
+        raise ValueError(f"Profile {name!r} has unknown keys: {', '.join(unknown)}")
+    for key in ('remove_variants', 'exceptions', 'remove_exceptions'):
+        if not all(isinstance(word, str) for word in spec.get(key, [])):
+            raise ValueError(f"Profile {name!r}: '{key}' must be a list of words")
+    for entry in spec.get('variants', []):
+        if not (
+            isinstance(entry, dict) and isinstance(entry.get('canonical'), str)
+            and isinstance(entry.get('variants'), list)
+            and all(isinstance(word, str) for word in entry['variants'])
+        ):
+            raise ValueError(f"Profile {name!r}: variant entries need 'canonical' and 'variants'")
+    return spec
+
+
+def _load_spec(name: str) -> Dict[str, Any]:
+    """Return the spec of a registered or on-disk profile."""
+    if name in _registered:
+        return _registered[name]
+    try:
+        with open(PROFILES_DIR / f"{name}.json", 'r', encoding='utf-8') as f:
+            spec = json.load(f)
+    except FileNotFoundError:
+        raise ValueError(f"Unknown profile: {name!r}") from None
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Profile {name!r} is not valid JSON: {e}") from e
+    return _validate_spec(name, spec)
+
+
+def register_profile(name: str, spec: Dict[str, Any]) -> None:
+    """Register a profile from a spec dict, taking precedence over files.
+
+    Registered profiles live in this process only; worker processes that are
+    not forked from it only see profiles in ``PROFILES_DIR``.
+
+    Raises:
+        ValueError: If the name or spec is invalid.
+    """
+    _check_name(name)
+    if name == DEFAULT_PROFILE:
+        raise ValueError(f"'{DEFAULT_PROFILE}' is reserved for the base data")
+    with _lock:
+        _registered[name] = _validate_spec(name, spec)
+        _compiled.clear()
+
+
+def unregister_profile(name: str) -> None:
+    """Forget a profile registered with ``register_profile``."""
+    with _lock:
+        _registered.pop(name, None)
+        _compiled.clear()
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Return the name, description and parent of every available profile."""
+    names = set(_registered)
+    if PROFILES_DIR.is_dir():
+        names.update(path.stem for path in PROFILES_DIR.glob('*.json') if _NAME.match(path.stem))
+    names.discard(DEFAULT_PROFILE)
+    profiles = []
+    for name in sorted(names):
+        try:
+            spec = _load_spec(name)
+        except ValueError as e:
+            profiles.append({'name': name, 'error': str(e)})
+            continue
+        profiles.append({
+            'name': name,
+            'description': spec.get('description', ''),
+            'extends': spec.get('extends'),
+        })
+    return profiles
+
+
+def _build(name: str, base_variants: Dict[str, str], base_exceptions: Set[str], chain: List[str]) -> Profile:
+    """Compile a profile (and the profiles it extends) against the base data."""
+    from .compiler import compile_variants
+    from .rules import PUNCTUATION
+
+    if name in chain:
+        raise ValueError(f"Profiles extend each other in a cycle: {' -> '.join(chain + [name])}")
+    spec = _load_spec(name)
+    parent_name = spec.get('extends')
+    if parent_name is not None and parent_name != DEFAULT_PROFILE:
+        _check_name(parent_name)
+        parent = _build(parent_name, base_variants, base_exceptions, chain + [name])
+        inherited_variants: Mapping = parent.variants
+        inherited_exceptions: AbstractSet = parent.exceptions
+    else:
+        inherited_variants, inherited_exceptions = base_variants, base_exceptions
+
+    exceptions = (set(inherited_exceptions) - set(spec.get('remove_exceptions', []))) | set(spec.get('exceptions', []))
+
+    # The inherited mapping, as entries, minus the words the profile removes
+    # or redefines, followed by the profile's own entries
+    dropped = set(spec.get('remove_variants', []))
+    for entry in spec.get('variants', []):
+        dropped.update(entry['variants'])
+    entries = [
+        {'canonical': canonical, 'variants': [word]}
+        for word, canonical in inherited_variants.items()
+        if word != canonical and word not in dropped
+    ]
+    entries.extend(spec.get('variants', []))
+    compiled, _ = compile_variants(entries, exceptions, PUNCTUATION)
+
+    added = {word: canonical for word, canonical in compiled.items() if base_variants.get(word) != canonical}
+    removed = frozenset(word for word in base_variants if word not in compiled)
+    return Profile(
+        name,
+        spec.get('description', ''),
+        OverlayDict(base_variants, added, removed),
+        OverlaySet(
+            base_exceptions,
+            frozenset(exceptions - base_exceptions),
+            frozenset(word for word in base_exceptions if word not in exceptions),
+        ),
+    )
+
+
+def _base_data() -> Tuple[Dict[str, str], Set[str]]:
+    """Return the base variant mapping and exception set."""
+    global _base_loaders
+    if _base_loaders is None:
+        from .normalizer import load_base_variants
+        from .rules import load_base_exceptions
+        _base_loaders = (load_base_variants, load_base_exceptions)
+    return _base_loaders[0](), _base_loaders[1]()
+
+
+def get_profile(name: Optional[str]) -> Optional[Profile]:
+    """Return the compiled profile ``name`` (None for the base data).
+
+    Profiles are compiled on first use and cached until the data is reloaded.
+
+    Raises:
+        ValueError: If the profile does not exist or is invalid.
+        DictionaryError: If the profile's variants conflict.
+    """
+    if name is None or name == DEFAULT_PROFILE:
+        return None
+    base_variants, base_exceptions = _base_data()
+    profile = _compiled.get(name)
+    if profile is not None and profile.variants.base is base_variants and profile.exceptions.base is base_exceptions:
+        return profile
+    _check_name(name)
+    with _lock:
+        # Compile with the base data visible to the letter rules
+        token = _active.set(None)
+        try:
+            profile = _build(name, base_variants, base_exceptions, [])
+        finally:
+            _active.reset(token)
+        _compiled[name] = profile
+    return profile
+
+
+def clear_profiles() -> None:
+    """Drop the compiled profiles; they are rebuilt on next use.
+
+    The process-wide profile is rebuilt right away.
+    """
+    global _default
+    with _lock:
+        _compiled.clear()
+    if _default is not None:
+        _default = get_profile(_default.name)
+
+
+def set_profile(name: Optional[str]) -> None:
+    """Select a profile for the whole process (None or 'default' for the base data).
+
+    Raises:
+        ValueError: If the profile does not exist or is invalid.
+    """
+    global _default
+    _default = get_profile(name)
+
+
+class use_profile:
+    """Select a profile for the current thread or task within a ``with`` block.
+
+    Args:
+        name: Profile name (None or 'default' for the base data).
+
+    Raises:
+        ValueError: On entering, if the profile does not exist or is invalid.
+    """
+
+    __slots__ = ('name', '_token')
+
+    def __init__(self, name: Optional[str]):
+        self.name = name
+
+    def __enter__(self) -> Optional[Profile]:
+        profile = get_profile(self.name)
+        self._token = _active.set(profile)
+        return profile
+
+    def __exit__(self, *exc_info) -> None:
+        _active.reset(self._token)
+
+
+def run_with_profile(profile: Optional[Profile], func: Callable[..., T], *args: Any) -> T:
+    """Call ``func`` with ``profile`` selected; for executor threads and workers."""
+    token = _active.set(profile)
+    try:
+        return func(*args)
+    finally:
+        _active.reset(token)
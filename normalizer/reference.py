@@ -0,0 +1,127 @@
+"""Frozen reference implementation of the normalization semantics.
+
+This module is the specification the optimized engines (batch, bulk,
+vectorized, parallel, async) are tested against. It is deliberately naive:
+one word at a time, no caches, and clitic analyses enumerated by brute force
+instead of with the affix tries. Do not optimize it or share code with the
+engines; change it only when the normalization semantics themselves change,
+and in the same commit.
+
+The data tables are passed in explicitly so that the reference does not
+depend on any loader.
+"""
+
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .morphology import ARTICLES, CONJUNCTIONS, ENCLITICS, MIN_STEM_LENGTH, PREPOSITIONS
+
+# Characters stripped from both ends of a word before lookup
+REFERENCE_PUNCTUATION = '.,!?;:()[]{}"\'\'،؛؟'
+
+
+def _proclitics() -> List[str]:
+    """Return every proclitic sequence, spelled out."""
+    proclitics = []
+    for conjunction in CONJUNCTIONS:
+        for preposition in PREPOSITIONS:
+            for article in ARTICLES:
+                # ل + ال is written لل
+                if preposition == 'ل' and article:
+                    proclitic = conjunction + 'لل'
+                else:
+                    proclitic = conjunction + preposition + article
+                if proclitic and proclitic not in proclitics:
+                    proclitics.append(proclitic)
+    return proclitics
+
+
+def reference_splits(word: str) -> Iterator[Tuple[str, str, str]]:
+    """Yield (proclitic, stem, enclitic) analyses, fewest stripped characters first."""
+    candidates = set()
+    for proclitic in [''] + _proclitics():
+        if not word.startswith(proclitic):
+            continue
+        for enclitic in ('',) + ENCLITICS:
+            if not word.endswith(enclitic):
+                continue
+            stem_length = len(word) - len(proclitic) - len(enclitic)
+            if (proclitic or enclitic) and stem_length >= MIN_STEM_LENGTH:
+                candidates.add((len(proclitic) + len(enclitic), len(proclitic), len(enclitic)))
+    for _, proclitic_length, enclitic_length in sorted(candidates):
+        end = len(word) - enclitic_length
+        yield word[:proclitic_length], word[proclitic_length:end], word[end:]
+
+
+def reference_letter_rules(word: str, exceptions: Set[str], morphology: bool = False) -> str:
+    """Apply the letter rules to a clean word.
+
+    1. گ and ق become ك unless the word (or, with morphology, one of its
+       stems) is an exception word.
+    2. A final ة becomes ه.
+    """
+    if not word:
+        return word
+    protected = word in exceptions or (
+        morphology and any(stem in exceptions for _, stem, _ in reference_splits(word))
+    )
+    result = word
+    if not protected:
+        result = result.replace('گ', 'ك').replace('ق', 'ك')
+    if result.endswith('ة'):
+        result = result[:-1] + 'ه'
+    return result
+
+
+def reference_normalize_word(
+    word: str,
+    variants: Dict[str, str],
+    exceptions: Set[str],
+    morphology: bool = False,
+) -> Tuple[str, Optional[str]]:
+    """Normalize one whitespace-free token.
+
+    Returns:
+        Tuple of (normalized token, the clean word if it is an unknown
+        variant, else None).
+    """
+    if not word:
+        return word, None
+    clean_word = word.strip(REFERENCE_PUNCTUATION)
+    if not clean_word:
+        return word, None
+    prefix = word[:len(word) - len(word.lstrip(REFERENCE_PUNCTUATION))]
+    suffix = word[len(prefix) + len(clean_word):]
+
+    if clean_word in variants:
+        return prefix + variants[clean_word] + suffix, None
+    if morphology:
+        for proclitic, stem, enclitic in reference_splits(clean_word):
+            if stem in variants:
+                return prefix + proclitic + variants[stem] + enclitic + suffix, None
+
+    normalized = reference_letter_rules(clean_word, exceptions, morphology)
+    return prefix + normalized + suffix, (clean_word if normalized != clean_word else None)
+
+
+def reference_normalize_text(
+    text: str,
+    variants: Dict[str, str],
+    exceptions: Set[str],
+    morphology: bool = False,
+) -> Tuple[str, List[str]]:
+    """Normalize a text word by word.
+
+    Returns:
+        Tuple of (normalized text, unknown variants in order of first
+        appearance).
+    """
+    if not text:
+        return text, []
+    words = []
+    unknowns: List[str] = []
+    for word in text.split():
+        normalized, unknown = reference_normalize_word(word, variants, exceptions, morphology)
+        words.append(normalized)
+        if unknown is not None and unknown not in unknowns:
+            unknowns.append(unknown)
+    return ' '.join(words), unknowns
@@ -5,12 +5,44 @@ including exception handling for specific words.
 """
 
 import json
-from typing import Set
+from typing import AbstractSet, Set
+
+from .morphology import has_exception_stem, morphology_enabled
+from .profiles import current_profile
+
+# Version of the letter rules; bump whenever apply_letter_rules changes output
+RULES_VERSION = 1
+
+# Every character apply_letter_rules can rewrite; words without any of them
+# are returned unchanged (keep in sync with the rules)
+RULE_CHARACTERS = 'گقة'
+
+# Characters stripped from both ends of a word before lookup, including the
+# Arabic comma, semicolon and question mark
+PUNCTUATION = '.,!?;:()[]{}"\'\'،؛؟'
+
 # Global variable to store exception words
 _exception_words: Set[str] = set()
 
 
-def load_exceptions(force_reload: bool = False) -> Set[str]:
+def load_exceptions(force_reload: bool = False) -> AbstractSet[str]:
+    """Return the exception words of the selected dictionary profile.
+
+    Without a profile (see ``profiles.use_profile``) this is the base list
+    from ``load_base_exceptions``.
+    
+    Args:
+        force_reload: If True, reload the base data even if already cached.
+    
+    Returns:
+        Set of words that should not have گ/ق replaced with ك.
+    """
+    exceptions = load_base_exceptions(force_reload)
+    profile = current_profile()
+    return exceptions if profile is None else profile.exceptions
+
+
+def load_base_exceptions(force_reload: bool = False) -> Set[str]:
     """Load exception words from the JSON file.
     
     Args:
@@ -38,7 +70,8 @@ def apply_letter_rules(word: str) -> str:
     """Apply letter-level normalization rules to a word.
     
     Rules:
-    1. Replace گ and ق with ك (unless word is in exception list)
+    1. Replace گ and ق with ك (unless word is in exception list, or its
+       stem is when morphology is enabled)
     2. Replace final ة with ه
     
     Args:
@@ -54,7 +87,7 @@ def apply_letter_rules(word: str) -> str:
     result = word
     
     # Rule 1: Replace گ and ق with ك (unless in exceptions)
-    if word not in exceptions:
+    if word not in exceptions and not (morphology_enabled() and has_exception_stem(word, exceptions)):
         result = result.replace('گ', 'ك')
         result = result.replace('ق', 'ك')
     
@@ -73,4 +106,4 @@ def reload_exceptions() -> None:
     """
     global _exception_words
     _exception_words = set()
-    load_exceptions(force_reload=True)
\ No newline at end of file
+    load_base_exceptions(force_reload=True)
\ No newline at end of file
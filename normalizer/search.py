@@ -0,0 +1,288 @@
+"""Prefix and substring search over the dictionary data.
+
+Used by the web UIs to browse canonical words, variants, separation pairs and
+exception words without shipping whole files to the browser. Each entry type
+has its own index:
+
+- forms are kept in a sorted array, so a prefix is a ``bisect`` range;
+- every form is also indexed by its character trigrams (posting lists of
+  positions in the sorted array, stored as compact ``array`` objects). A
+  substring query of three or more characters only verifies the forms in the
+  shortest posting list of its trigrams; a shorter query merges the posting
+  lists of the trigrams containing it, lazily, until the page is full.
+
+Results are ordered by (form, entry type) across all types and paginated with
+an opaque cursor naming the last result returned, so pages stay consistent
+when entries are added between requests.
+"""
+
+import base64
+import heapq
+import json
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Entry types, in result order for equal forms
+TYPES = ('canonical', 'variant', 'separation', 'exception')
+
+MODES = ('prefix', 'substring')
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Length of the indexed character n-grams
+GRAM = 3
+
+# Short substring queries scan instead of merging posting lists when their
+# postings cover at least 1/DENSE_RATIO of the forms
+DENSE_RATIO = 64
+
+
+def encode_cursor(form: str, entry_type: str) -> str:
+    """Return the opaque cursor continuing after (form, entry_type)."""
+    raw = json.dumps([form, entry_type], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a cursor from ``encode_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        form, entry_type = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(form, str) or entry_type not in TYPES:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return form, entry_type
+
+
+class FormIndex:
+    """Sorted, trigram-indexed forms of one entry type.
+
+    Args:
+        records: Records with a ``form`` key; the first record of each form
+            is kept.
+    """
+
+    def __init__(self, records: Iterable[Dict[str, Any]]):
+        unique: Dict[str, Dict[str, Any]] = {}
+        for record in records:
+            unique.setdefault(record['form'], record)
+        self.forms: List[str] = sorted(unique)
+        self.records: List[Dict[str, Any]] = [unique[form] for form in self.forms]
+
+        postings: Dict[str, List[int]] = {}
+        # Forms too short to have a trigram
+        self.short = array('I', (p for p, form in enumerate(self.forms) if len(form) < GRAM))
+        for position, form in enumerate(self.forms):
+            for gram in {form[i:i + GRAM] for i in range(len(form) - GRAM + 1)}:
+                postings.setdefault(gram, []).append(position)
+        self.grams: Dict[str, array] = {gram: array('I', ids) for gram, ids in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.forms)
+
+    def prefix(self, query: str, start: int) -> Iterator[int]:
+        """Yield positions from ``start`` on whose form starts with ``query``."""
+        forms = self.forms
+        position = max(bisect_left(forms, query), start)
+        while position < len(forms) and forms[position].startswith(query):
+            yield position
+            position += 1
+
+    def substring(self, query: str, start: int) -> Iterator[int]:
+        """Yield positions from ``start`` on whose form contains ``query``."""
+        forms = self.forms
+        if not query:
+            yield from range(start, len(forms))
+            return
+        if len(query) >= GRAM:
+            lists = [self.grams.get(query[i:i + GRAM]) for i in range(len(query) - GRAM + 1)]
+            if not all(lists):
+                return
+            shortest = min(lists, key=len)
+            for position in memoryview(shortest)[bisect_left(shortest, start):]:
+                if query in forms[position]:
+                    yield position
+            return
+        # Shorter queries: merge the posting lists of every gram containing
+        # them, or scan in order when matches are dense enough that a page
+        # fills after a few thousand forms
+        lists = [ids for gram, ids in self.grams.items() if query in gram]
+        lists.append(self.short)
+        if sum(len(ids) for ids in lists) * DENSE_RATIO >= len(forms):
+            for position in range(start, len(forms)):
+                if query in forms[position]:
+                    yield position
+            return
+        previous = -1
+        for position in heapq.merge(*(memoryview(ids)[bisect_left(ids, start):] for ids in lists)):
+            if position != previous and query in forms[position]:
+                yield position
+            previous = position
+
+
+class LexiconIndex:
+    """Search index over all dictionary entry types.
+
+    Args:
+        variants_data: Entries with ``canonical`` and ``variants`` keys.
+        separation_data: Entries with ``separated`` and ``linked`` keys.
+        exceptions: Exception words.
+    """
+
+    def __init__(
+        self,
+        variants_data: Iterable[Dict[str, Any]] = (),
+        separation_data: Iterable[Dict[str, str]] = (),
+        exceptions: Iterable[str] = (),
+    ):
+        canonicals = []
+        variants = []
+        for entry in variants_data:
+            canonicals.append({'type': 'canonical', 'form': entry['canonical'], 'variants': entry['variants']})
+            variants.extend(
+                {'type': 'variant', 'form': variant, 'canonical': entry['canonical']}
+                for variant in entry['variants']
+            )
+        separations = []
+        for entry in separation_data:
+            pair = {'separated': entry['separated'], 'linked': entry['linked']}
+            separations.append({'type': 'separation', 'form': entry['separated'], **pair})
+            separations.append({'type': 'separation', 'form': entry['linked'], **pair})
+
+        self.indexes: Dict[str, FormIndex] = {
+            'canonical': FormIndex(canonicals),
+            'variant': FormIndex(variants),
+            'separation': FormIndex(separations),
+            'exception': FormIndex({'type': 'exception', 'form': word} for word in exceptions),
+        }
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of indexed forms per entry type."""
+        return {entry_type: len(index) for entry_type, index in self.indexes.items()}
+
+    def search(
+        self,
+        query: str = '',
+        mode: str = 'prefix',
+        types: Optional[Iterable[str]] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Return one page of entries matching ``query``.
+
+        Args:
+            query: Text to match; an empty query lists every entry.
+            mode: 'prefix' or 'substring'.
+            types: Entry types to include (default: all of ``TYPES``).
+            limit: Page size, capped at ``MAX_PAGE_SIZE``.
+            cursor: ``next_cursor`` of the previous page.
+
+        Returns:
+            Dict with the ``results`` (records with ``type`` and ``form``) and
+            the ``next_cursor`` (None on the last page).
+
+        Raises:
+            ValueError: If the mode, a type, the limit or the cursor is invalid.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown search mode '{mode}' (expected one of {', '.join(MODES)})")
+        selected = list(TYPES) if types is None else list(dict.fromkeys(types))
+        unknown = [entry_type for entry_type in selected if entry_type not in TYPES]
+        if unknown or not selected:
+            raise ValueError(f"Unknown entry types {unknown} (expected some of {', '.join(TYPES)})")
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        limit = min(limit, MAX_PAGE_SIZE)
+        after = decode_cursor(cursor) if cursor else None
+
+        streams = []
+        for entry_type in selected:
+            index = self.indexes[entry_type]
+            rank = TYPES.index(entry_type)
+            start = 0
+            if after is not None:
+                # Equal forms are ordered by type
+                if rank <= TYPES.index(after[1]):
+                    start = bisect_right(index.forms, after[0])
+                else:
+                    start = bisect_left(index.forms, after[0])
+            streams.append(_keyed(index, getattr(index, mode)(query, start), rank, entry_type))
+
+        results = []
+        next_cursor = None
+        for form, _, position, entry_type in heapq.merge(*streams):
+            if len(results) == limit:
+                last = results[-1]
+                next_cursor = encode_cursor(last['form'], last['type'])
+                break
+            results.append(self.indexes[entry_type].records[position])
+        return {'results': results, 'next_cursor': next_cursor}
+
+
+def _keyed(index: FormIndex, positions: Iterator[int], rank: int, entry_type: str) -> Iterator[Tuple]:
+    """Yield merge keys (form, type rank, position, type) for ``positions``."""
+    for position in positions:
+        yield index.forms[position], rank, position, entry_type
+
+
+class IndexCache:
+    """Lexicon index rebuilt whenever one of its data files changes.
+
+    Args:
+        variants_file: Variant JSONL file.
+        separation_file: Word separation JSONL file.
+        exceptions_file: Exception word JSON file.
+    """
+
+    def __init__(self, variants_file: str, separation_file: str, exceptions_file: str):
+        self.paths = (variants_file, separation_file, exceptions_file)
+        self._signature: Optional[Tuple] = None
+        self._index: Optional[LexiconIndex] = None
+
+    def _stat(self) -> Tuple:
+        signature = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def get(self) -> LexiconIndex:
+        """Return the index, rebuilding it if a data file changed."""
+        signature = self._stat()
+        if self._index is None or signature != self._signature:
+            variants_file, separation_file, exceptions_file = self.paths
+            self._index = LexiconIndex(
+                _read_jsonl(variants_file),
+                _read_jsonl(separation_file),
+                _read_json(exceptions_file),
+            )
+            self._signature = signature
+        return self._index
+
+
+def _read_jsonl(path: str) -> List[Dict[str, Any]]:
+    """Read a JSONL file, returning an empty list if missing or malformed."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+
+def _read_json(path: str) -> List[str]:
+    """Read a JSON list, returning an empty list if missing or malformed."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
@@ -0,0 +1,310 @@
+"""Bounded top-K tracking of unknown variants (Space-Saving).
+
+A long-running process sees an unbounded number of distinct unknown words,
+but annotators only need the frequent ones. ``HeavyHitters`` keeps at most
+``capacity`` words with approximate counts (the Space-Saving algorithm): a
+new word arriving when the summary is full replaces the word with the lowest
+count and inherits that count as its error. Every word seen more than
+``total / capacity`` times is guaranteed to be kept, each count is an upper
+bound, and ``count - error`` is a lower bound.
+
+Summaries are mergeable, so workers can each keep their own and combine them.
+``UnknownVariantTracker`` does this with a file: it records into an
+in-memory summary and periodically merges it into a JSON file shared by every
+process pointed at it, under a lock file where ``fcntl`` is available.
+A failed periodic merge is logged and retried later, so it never fails the
+normalization that triggered it.
+
+Counts are per text: a word is counted once for every normalized text
+(request, paragraph, line) it appeared in as an unknown variant.
+"""
+
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SKETCH_VERSION = 1
+
+# Words kept, and seconds between merges into the shared file
+DEFAULT_CAPACITY = 1000
+DEFAULT_FLUSH_INTERVAL = 60.0
+
+
+class HeavyHitters:
+    """Space-Saving summary of the most frequent items of a stream.
+
+    Args:
+        capacity: Maximum number of items kept.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.total = 0
+        self._counts: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        # (count, item) entries; an entry may be stale (lower than the
+        # current count) until it reaches the top of the heap
+        self._heap: List[Tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __contains__(self, item: str) -> bool:
+        return item in self._counts
+
+    def add(self, item: str, count: int = 1) -> None:
+        """Count ``count`` occurrences of ``item``."""
+        self.total += count
+        if item in self._counts:
+            self._counts[item] += count
+            return
+        error = 0
+        if len(self._counts) >= self.capacity:
+            error, victim = self._pop_min()
+            del self._counts[victim]
+            del self._errors[victim]
+        self._counts[item] = error + count
+        self._errors[item] = error
+        heapq.heappush(self._heap, (error + count, item))
+
+    def update(self, items: Iterable[str]) -> None:
+        """Count one occurrence of each item."""
+        for item in items:
+            self.add(item)
+
+    def _pop_min(self) -> Tuple[int, str]:
+        """Remove and return the heap entry of the item with the lowest count."""
+        while True:
+            count, item = heapq.heappop(self._heap)
+            current = self._counts[item]
+            if current == count:
+                return count, item
+            heapq.heappush(self._heap, (current, item))
+
+    def min_count(self) -> int:
+        """Return the lowest count kept, or 0 while the summary is not full."""
+        if len(self._counts) < self.capacity:
+            return 0
+        return min(self._counts.values())
+
+    def top(self, limit: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """Return (item, count, error) tuples, most frequent first."""
+        ranked = sorted(self._counts.items(), key=lambda entry: (-entry[1], entry[0]))
+        return [(item, count, self._errors[item]) for item, count in ranked[:limit]]
+
+    def merge(self, other: 'HeavyHitters') -> None:
+        """Add the counts of another summary to this one.
+
+        An item missing from a full summary may have occurred up to that
+        summary's lowest count times, so that count is added to its count
+        and error. The ``capacity`` items with the highest counts are kept.
+        """
+        floor, other_floor = self.min_count(), other.min_count()
+        merged = {}
+        for item in set(self._counts) | set(other._counts):
+            merged[item] = (
+                self._counts.get(item, floor) + other._counts.get(item, other_floor),
+                self._errors.get(item, floor) + other._errors.get(item, other_floor),
+            )
+        kept = heapq.nsmallest(self.capacity, merged.items(), key=lambda entry: (-entry[1][0], entry[0]))
+        self.total += other.total
+        self._counts = {item: count for item, (count, _) in kept}
+        self._errors = {item: error for item, (_, error) in kept}
+        self._heap = [(count, item) for item, count in self._counts.items()]
+        heapq.heapify(self._heap)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the summary as a JSON-serializable dict."""
+        return {
+            'version': SKETCH_VERSION,
+            'capacity': self.capacity,
+            'total': self.total,
+            'items': [list(entry) for entry in self.top()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], capacity: Optional[int] = None) -> 'HeavyHitters':
+        """Rebuild a summary from ``to_dict`` output.
+
+        Args:
+            data: Serialized summary.
+            capacity: Capacity of the result (default: the stored capacity).
+                A smaller capacity keeps the most frequent items.
+
+        Raises:
+            ValueError: If the data is not a serialized summary.
+        """
+        if not isinstance(data, dict) or data.get('version') != SKETCH_VERSION:
+            raise ValueError("Not a heavy hitters summary")
+        try:
+            stored = cls(int(data['capacity']))
+            for item, count, error in data['items']:
+                stored._counts[str(item)] = int(count)
+                stored._errors[str(item)] = int(error)
+            stored.total = int(data['total'])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Malformed heavy hitters summary: {e}") from e
+        stored._heap = [(count, item) for item, count in stored._counts.items()]
+        heapq.heapify(stored._heap)
+        if capacity is None or capacity == stored.capacity:
+            return stored
+        summary = cls(capacity)
+        summary.merge(stored)
+        return summary
+
+    @classmethod
+    def load(cls, path: Union[str, Path], capacity: Optional[int] = None) -> 'HeavyHitters':
+        """Load a summary saved with ``save``; a missing file gives an empty one.
+
+        Raises:
+            ValueError: If the file is not a saved summary.
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls(capacity or DEFAULT_CAPACITY)
+        return cls.from_dict(data, capacity)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the summary to ``path`` atomically."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+
+def merge_files(paths: Iterable[Union[str, Path]], capacity: int = DEFAULT_CAPACITY) -> HeavyHitters:
+    """Merge saved summaries into one of the given capacity."""
+    merged = HeavyHitters(capacity)
+    for path in paths:
+        merged.merge(HeavyHitters.load(path))
+    return merged
+
+
+class UnknownVariantTracker:
+    """Thread-safe unknown variant counts, optionally shared through a file.
+
+    Args:
+        path: JSON file the counts are merged into; None keeps them in
+            memory only.
+        capacity: Words kept in memory and in the file.
+        interval: Seconds between merges into the file.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        capacity: int = DEFAULT_CAPACITY,
+        interval: float = DEFAULT_FLUSH_INTERVAL,
+    ):
+        self.path = Path(path) if path else None
+        self.capacity = capacity
+        self.interval = interval
+        self._pending = HeavyHitters(capacity)
+        self._lock = threading.Lock()
+        # Held while counts move from memory to the file
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def record(self, variants: Iterable[str]) -> None:
+        """Count the unknown variants of one text.
+
+        When ``interval`` has passed, the counts are merged into the file;
+        errors doing so are logged, and the counts kept for the next merge.
+        """
+        with self._lock:
+            self._pending.update(variants)
+        if self.path and time.monotonic() - self._last_flush >= self.interval:
+            try:
+                self.flush()
+            except (OSError, ValueError) as e:
+                logger.warning("Could not merge unknown variant counts into '%s': %s", self.path, e)
+
+    def flush(self) -> None:
+        """Merge the counts recorded since the last flush into the file.
+
+        Raises:
+            OSError: If the file cannot be read or written.
+            ValueError: If the file is not a valid summary.
+        """
+        if not self.path:
+            return
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, HeavyHitters(self.capacity)
+                self._last_flush = time.monotonic()
+            if not pending.total:
+                return
+            try:
+                with self._file_lock():
+                    stored = HeavyHitters.load(self.path, self.capacity)
+                    stored.merge(pending)
+                    stored.save(self.path)
+            except (OSError, ValueError):
+                # Keep the counts for the next attempt
+                with self._lock:
+                    pending.merge(self._pending)
+                    self._pending = pending
+                raise
+
+    def snapshot(self) -> HeavyHitters:
+        """Return the stored counts merged with those not flushed yet."""
+        summary = HeavyHitters(self.capacity)
+        with self._flush_lock:
+            if self.path:
+                with self._file_lock():
+                    summary.merge(HeavyHitters.load(self.path, self.capacity))
+            with self._lock:
+                summary.merge(self._pending)
+        return summary
+
+    def reset(self) -> None:
+        """Forget all counts, including the file."""
+        with self._flush_lock:
+            with self._lock:
+                self._pending = HeavyHitters(self.capacity)
+            if self.path:
+                with self._file_lock():
+                    self.path.unlink(missing_ok=True)
+
+    def _file_lock(self):
+        """Return a context manager holding the lock file of ``path``."""
+        return _FileLock(self.path.with_name(self.path.name + '.lock'))
+
+
+class _FileLock:
+    """Exclusive ``flock`` on a lock file; a no-op without ``fcntl``."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self) -> '_FileLock':
+        if fcntl is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a')
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
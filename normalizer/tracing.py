@@ -0,0 +1,112 @@
+"""Decision tracing for the normalization pipeline.
+
+A tracer is a callable receiving one event dict per normalized token::
+
+    {"token": "قلب،", "word": "قلب", "decision": "variant", "output": "كلب،",
+     "canonical": "كلب"}
+
+``decision`` is one of:
+
+- ``variant``: exact dictionary entry (``canonical``)
+- ``stem``: dictionary entry of a stem, with morphology enabled (``stem``,
+  ``canonical``)
+- ``exception``: گ/ق kept because the word, or with morphology one of its
+  stems, is an exception word (``exception``, and ``rules`` if the final ة
+  rule still applied)
+- ``rules``: letter rules applied (``rules``: ``gaf_qaf`` and/or
+  ``final_taa``)
+- ``unchanged``: nothing applied
+
+Events of ``normalize_batch`` carry the index of their text as ``text``.
+
+Tracers are selected like dictionary profiles: for a block of code with
+``trace`` (per thread and per asyncio task), or for the whole process with
+``add_hook``. The engines check for a tracer once per call and then run an
+instrumented per-word path, so the untraced path has no per-token check and
+the fast paths (prefilter, bulk, vectorized) are only bypassed while
+tracing. ``normalize_parallel`` runs inline while a tracer is active.
+"""
+
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, TypeVar
+
+T = TypeVar('T')
+
+Tracer = Callable[[Dict[str, Any]], None]
+
+_active: ContextVar[Optional[Tracer]] = ContextVar('hassaniya_tracer')
+_hooks: List[Tracer] = []
+_default: Optional[Tracer] = None
+
+
+def current_tracer() -> Optional[Tracer]:
+    """Return the tracer active in this context, or None when not tracing."""
+    return _active.get(_default)
+
+
+def _dispatch(event: Dict[str, Any]) -> None:
+    for hook in list(_hooks):
+        hook(event)
+
+
+def add_hook(hook: Tracer) -> None:
+    """Call ``hook`` with the events of every normalization in the process."""
+    global _default
+    _hooks.append(hook)
+    _default = _dispatch
+
+
+def remove_hook(hook: Tracer) -> None:
+    """Remove a hook added with ``add_hook`` (no error if it is missing)."""
+    global _default
+    if hook in _hooks:
+        _hooks.remove(hook)
+    if not _hooks:
+        _default = None
+
+
+class trace:
+    """Trace the normalizations of the current thread or task within a ``with`` block.
+
+    Without a tracer, events are collected into the list returned on
+    entering::
+
+        with trace() as events:
+            normalize_text(text)
+
+    Args:
+        tracer: Callable receiving each event (default: collect them).
+        words: Only report tokens whose clean word (or the token itself) is
+            one of these.
+    """
+
+    __slots__ = ('tracer', 'events', '_token')
+
+    def __init__(self, tracer: Optional[Tracer] = None, words: Optional[Iterable[str]] = None):
+        self.events: List[Dict[str, Any]] = []
+        tracer = tracer or self.events.append
+        if words is not None:
+            selected = frozenset(words)
+            inner = tracer
+
+            def tracer(event: Dict[str, Any]) -> None:
+                if event['word'] in selected or event['token'] in selected:
+                    inner(event)
+
+        self.tracer = tracer
+
+    def __enter__(self) -> List[Dict[str, Any]]:
+        self._token = _active.set(self.tracer)
+        return self.events
+
+    def __exit__(self, *exc_info) -> None:
+        _active.reset(self._token)
+
+
+def run_with_tracer(tracer: Optional[Tracer], func: Callable[..., T], *args: Any) -> T:
+    """Call ``func`` with ``tracer`` active; for executor threads."""
+    token = _active.set(tracer)
+    try:
+        return func(*args)
+    finally:
+        _active.reset(token)
@@ -0,0 +1,87 @@
+"""NumPy-backed letter rules for large batches of words.
+
+``apply_letter_rules_batch`` gives the same results as calling
+``apply_letter_rules`` on every word. With NumPy installed, the words are
+concatenated into a single UTF-32 codepoint array and:
+
+1. a token boundary mask marks the separators between words, and its
+   cumulative sum maps every character to its word;
+2. the per-word exception mask is spread over the characters through that
+   mapping, and گ/ق → ك is applied to every non-exception character with
+   one masked assignment;
+3. final ة → ه is applied to the characters just before each boundary.
+
+The array is then decoded and split back into words. Without NumPy, the
+pure-Python rules are used.
+"""
+
+from typing import List, Sequence
+
+from .morphology import has_exception_stem, morphology_enabled
+from .rules import apply_letter_rules, load_exceptions
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+NUMPY_AVAILABLE = np is not None
+
+# Below this many words, encoding overhead outweighs the vectorized pass
+VECTORIZE_MIN_WORDS = 1024
+
+_GAF, _QAF, _KAF = ord('گ'), ord('ق'), ord('ك')
+_TAA_MARBUTA, _HAA = ord('ة'), ord('ه')
+_SEPARATOR = ord('\n')
+
+
+def _apply_vectorized(words: Sequence[str]) -> List[str]:
+    """Apply the letter rules to ``words`` with NumPy.
+
+    Words are joined with newlines, so the boundary mask is simply the
+    separator positions.
+    """
+    text = '\n'.join(words)
+    if text.count('\n') != len(words) - 1:
+        # A word contains the separator itself
+        return [apply_letter_rules(word) for word in words]
+
+    exceptions = load_exceptions()
+    codepoints = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32).copy()
+    boundary = codepoints == _SEPARATOR
+
+    # Rule 1: گ/ق → ك outside exception words
+    replace = (codepoints == _GAF) | (codepoints == _QAF)
+    if exceptions:
+        if morphology_enabled():
+            flags = (word in exceptions or has_exception_stem(word, exceptions) for word in words)
+        else:
+            flags = map(exceptions.__contains__, words)
+        is_exception = np.fromiter(flags, dtype=bool, count=len(words))
+        if is_exception.any():
+            word_ids = np.cumsum(boundary)
+            replace &= ~is_exception[word_ids]
+    codepoints[replace] = _KAF
+
+    # Rule 2: final ة → ه on the character before each boundary and at the end
+    finals = np.append(np.flatnonzero(boundary) - 1, len(codepoints) - 1)
+    finals = finals[finals >= 0]
+    codepoints[finals[codepoints[finals] == _TAA_MARBUTA]] = _HAA
+
+    return codepoints.tobytes().decode('utf-32-le', 'surrogatepass').split('\n')
+
+
+def apply_letter_rules_batch(words: Sequence[str], min_words: int = VECTORIZE_MIN_WORDS) -> List[str]:
+    """Apply the letter rules to many words at once.
+
+    Args:
+        words: Words to normalize.
+        min_words: Smallest batch handled with NumPy; smaller batches (or
+            any batch when NumPy is not installed) use ``apply_letter_rules``.
+
+    Returns:
+        The normalized words, identical to ``[apply_letter_rules(w) for w in words]``.
+    """
+    if not NUMPY_AVAILABLE or len(words) < min_words:
+        return [apply_letter_rules(word) for word in words]
+    return _apply_vectorized(words)
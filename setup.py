@@ -46,19 +46,27 @@ setup(
     install_requires=requirements,
     extras_require={
         "dev": ["pytest>=8.2", "ruff>=0.4.1"],
+        "fast": ["numpy>=1.20"],
         "web": ["gradio>=4.0.0", "flask>=2.0.0", "flask-cors>=4.0.0"],
     },
     entry_points={
         "console_scripts": [
-            "hassaniya-normalize=cli.normalize_text:main",
+            "hassaniya-normalize=cli.client:main",
+            "hassaniya-daemon=cli.daemon:main",
+            "hassaniya-apply-delta=cli.apply_delta:main",
+            "hassaniya-compact-lexicon=cli.compact_lexicon:main",
+            "hassaniya-check-dictionary=cli.check_dictionary:main",
+            "hassaniya-differential=cli.differential:main",
+            "hassaniya-unknown-variants=cli.unknown_variants:main",
+            "hassaniya-shards=cli.shards:main",
             "hassaniya-web=web_ui.server:main",
             "hassaniya-gradio=app.gradio_ui:main",
         ],
     },
     include_package_data=True,
     package_data={
-        "normalizer": ["../data/*.json", "../data/*.jsonl"],
-        "": ["data/*.json", "data/*.jsonl"],
+        "normalizer": ["../data/*.json", "../data/*.jsonl", "../data/profiles/*.json"],
+        "": ["data/*.json", "data/*.jsonl", "data/profiles/*.json"],
     },
     zip_safe=False,
 )
\ No newline at end of file
@@ -0,0 +1,705 @@
+"""Tests for the Hassaniya normalization CLI helpers."""
+
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import normalizer
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from normalizer import clear_unknown_variants, normalize_text, refresh_data, reload_data, set_morphology
+from normalizer import normalizer as normalizer_module
+from normalizer.normalizer import load_variants
+from normalizer.profiles import register_profile, set_profile, unregister_profile
+from cli.apply_delta import apply_delta
+from cli.batch import collect_inputs, normalize_tree
+from cli.client import default_socket_path, run_remote, send_request, trusted_socket
+from cli.compression import detect_compression, open_text
+from cli import formats
+from cli.formats import normalize_delimited, normalize_jsonl, normalize_transcript, split_units
+from cli.daemon import NormalizerDaemon
+from cli.index import TokenIndex, index_units
+from cli.check_dictionary import check_dictionary
+from cli.compact_lexicon import compaction_report
+from cli import differential
+from cli.manifest import Manifest, TokenFilter, changed_keys, clean_tokens, data_snapshot
+from cli.profiling import Profiler
+from cli.shards import ShardLock, job_report, load_job, plan_job, run_job, write_json_atomic
+from cli.unknown_variants import scan_files
+from normalizer.sketch import HeavyHitters, UnknownVariantTracker
+
+
+class TestStructuredFormats:
+    """Test JSONL/CSV/TSV field normalization."""
+
+    def setup_method(self):
+        """Clear unknown variants before each test."""
+        clear_unknown_variants()
+
+    def test_jsonl_selected_field_only(self):
+        """Test that only the selected JSONL field is normalized."""
+        lines = ['{"id": "هاذا", "text": "هاذا گتاب"}\n']
+        record = json.loads(next(normalize_jsonl(lines, ["text"])))
+        assert record == {"id": "هاذا", "text": "هذا كتاب"}
+
+    def test_jsonl_unchanged_record_verbatim(self):
+        """Test that records without changes are written byte-for-byte."""
+        line = '{"text":"hello",   "n": 1.50}\r\n'
+        assert list(normalize_jsonl([line], ["text"])) == [line]
+
+    def test_jsonl_unknown_field(self):
+        """Test that per-record unknown variants are written to a new field."""
+        lines = ['{"text": "گتاب"}\n', '{"text": "هاذا"}\n']
+        records = [json.loads(out) for out in normalize_jsonl(lines, ["text"], "unknown")]
+        assert records[0]["unknown"] == ["گتاب"]
+        assert records[1]["unknown"] == []
+
+    def test_jsonl_invalid_line(self):
+        """Test that malformed JSON reports the line number."""
+        with pytest.raises(ValueError, match="Line 1"):
+            list(normalize_jsonl(["not json\n"], ["text"]))
+
+    def test_csv_quoted_multiline_field(self):
+        """Test CSV records spanning several lines."""
+        lines = ['id,text\n', '1,"هاذا\n', 'گتاب"\n', '2,ok\n']
+        output = ''.join(normalize_delimited(lines, ["text"]))
+        assert output == 'id,text\n1,هذا كتاب\n2,ok\n'
+
+    def test_tsv_unknown_column(self):
+        """Test TSV output with an unknown-variants column."""
+        lines = ['text\tid\n', 'گتاب\t1\n']
+        output = ''.join(normalize_delimited(lines, ["text"], '\t', "unknown"))
+        assert output == 'text\tid\tunknown\nكتاب\t1\tگتاب\n'
+
+    def test_csv_missing_column(self):
+        """Test that selecting a missing column raises an error."""
+        with pytest.raises(ValueError, match="missing"):
+            list(normalize_delimited(['id,text\n'], ["missing"]))
+
+    def test_matches_normalize_text(self):
+        """Test that field output matches normalize_text."""
+        text = "الي يقول هاذا الكلام گتير"
+        line = json.dumps({"text": text}, ensure_ascii=False) + '\n'
+        record = json.loads(next(normalize_jsonl([line], ["text"])))
+        assert record["text"] == normalize_text(text)
+
+
+class TestTranscriptFormats:
+    """Test SRT/WebVTT/TextGrid cue text normalization."""
+
+    def setup_method(self):
+        """Clear unknown variants before each test."""
+        clear_unknown_variants()
+
+    def test_srt_keeps_numbers_timestamps_and_markup(self):
+        """Test that only SRT cue text changes, line by line."""
+        lines = [
+            '1\r\n', '00:00:01,000 --> 00:00:02,500\r\n', 'هاذا <i>گتاب</i>\r\n', '{\\an8}hello   world\r\n',
+            '\r\n', '2\r\n', '00:00:03,000 --> 00:00:04,000\r\n', 'هاذا\r\n',
+        ]
+        output = ''.join(normalize_transcript(lines, 'srt'))
+        assert output == (
+            '1\r\n00:00:01,000 --> 00:00:02,500\r\nهذا <i>كتاب</i>\r\n{\\an8}hello   world\r\n'
+            '\r\n2\r\n00:00:03,000 --> 00:00:04,000\r\nهذا\r\n'
+        )
+
+    def test_vtt_header_and_notes_verbatim(self):
+        """Test that WebVTT header, NOTE blocks, cue settings and voice spans are kept."""
+        lines = [
+            '\ufeffWEBVTT گتاب\n', '\n', 'NOTE گتاب\n', '\n', 'intro\n',
+            '00:01.000 --> 00:02.000 align:start\n', '<v گتاب>گتاب <00:01.500>هاذا\n',
+        ]
+        output = ''.join(normalize_transcript(lines, 'vtt'))
+        assert output == (
+            '\ufeffWEBVTT گتاب\n\nNOTE گتاب\n\nintro\n'
+            '00:01.000 --> 00:02.000 align:start\n<v گتاب>كتاب <00:01.500>هذا\n'
+        )
+
+    def test_textgrid_long_format(self):
+        """Test that only interval texts change, with quotes and line breaks kept."""
+        lines = [
+            '        class = "IntervalTier"\n', '        name = "گتاب"\n', '            text = "هاذا ""گتاب""\n',
+            'هاذا" \n', '            text = ""\n',
+        ]
+        output = ''.join(normalize_transcript(lines, 'textgrid'))
+        assert output == (
+            '        class = "IntervalTier"\n        name = "گتاب"\n            text = "هذا ""كتاب""\n'
+            'هذا" \n            text = ""\n'
+        )
+
+    def test_textgrid_short_format_keeps_tier_names(self):
+        """Test that bare strings are texts except tier classes and names."""
+        lines = ['"IntervalTier"\n', '"گتاب"\n', '0\n', '1\n', '"گتاب"\n']
+        output = ''.join(normalize_transcript(lines, 'textgrid'))
+        assert output == '"IntervalTier"\n"گتاب"\n0\n1\n"كتاب"\n'
+
+    def test_batched_calls_match_normalize_text(self, monkeypatch):
+        """Test that cue texts are normalized in bounded batches."""
+        calls = []
+        monkeypatch.setattr(formats, 'TEXTS_PER_BATCH', 4)
+        monkeypatch.setattr(formats, 'normalize_batch', lambda texts: calls.append(len(texts)) or
+                            [normalize_text(text) for text in texts])
+        text = "الي يقول هاذا الكلام گتير"
+        lines = []
+        for cue in range(10):
+            lines += [f'{cue + 1}\n', '00:00:00,000 --> 00:00:01,000\n', f'{text}\n', '\n']
+        stats = {}
+        chunks = list(normalize_transcript(lines, 'srt', stats))
+        assert calls == [4, 4, 2]
+        assert all(chunk.split('\n')[2] == normalize_text(text) for chunk in chunks)
+        assert stats['tokens'] == 50
+
+    def test_output_splits_into_input_units(self):
+        """Test that normalized output lines up with its input, cue for cue."""
+        lines = ['1\n', '00:00:00,000 --> 00:00:01,000\n', 'گتاب\n', 'هاذا\n', '\n', '\n', '2\n',
+                 '00:00:01,000 --> 00:00:02,000\n', 'ok\n']
+        output = ''.join(normalize_transcript(lines, 'srt')).splitlines(keepends=True)
+        units = list(split_units(lines, 'srt'))
+        assert len(units) == len(list(split_units(output, 'srt'))) == 2
+        assert units[1] == '2\n00:00:01,000 --> 00:00:02,000\nok\n'
+
+
+class TestCompressedIO:
+    """Test transparent gzip/bz2/xz file access."""
+
+    @pytest.mark.parametrize("suffix,codec", [
+        (".gz", "gzip"),
+        (".bz2", "bz2"),
+        (".xz", "xz"),
+        (".txt", None),
+        # Legacy .lzma (FORMAT_ALONE) is not supported; never write xz under it
+        (".lzma", None),
+    ])
+    def test_round_trip(self, tmp_path, suffix, codec):
+        """Test writing by extension and reading back by magic bytes."""
+        path = tmp_path / f"data{suffix}"
+        with open_text(path, 'w') as f:
+            f.write("هاذا گتاب\n")
+        assert detect_compression(path) == codec
+        with open_text(path) as f:
+            assert f.read() == "هاذا گتاب\n"
+
+    def test_misnamed_input_detected_by_magic(self, tmp_path):
+        """Test that compressed input is detected regardless of its name."""
+        path = tmp_path / "data.gz"
+        with open_text(path, 'w') as f:
+            f.write("text")
+        renamed = path.rename(tmp_path / "data.txt")
+        assert detect_compression(renamed) == "gzip"
+        assert detect_compression(renamed, 'w') is None
+
+
+class TestManifest:
+    """Test incremental re-normalization bookkeeping."""
+
+    OPTIONS = {'format': 'text', 'fields': [], 'unknown_field': None}
+
+    def normalize_files(self, tmp_path, names):
+        """Normalize inputs and record them in a fresh manifest."""
+        manifest = Manifest(tmp_path / "manifest.json")
+        for name in names:
+            source = tmp_path / f"{name}.txt"
+            target = tmp_path / "out" / f"{name}.txt"
+            target.parent.mkdir(exist_ok=True)
+            target.write_text(normalize_text(source.read_text(encoding='utf-8')), encoding='utf-8')
+            manifest.record(source, target, self.OPTIONS)
+        manifest.save()
+
+    def is_current(self, tmp_path, name, options=None):
+        manifest = Manifest(tmp_path / "manifest.json")
+        return manifest.is_current(tmp_path / f"{name}.txt", tmp_path / "out" / f"{name}.txt",
+                                   options or self.OPTIONS)
+
+    def test_unchanged_input_is_current(self, tmp_path):
+        """Test that unchanged inputs are skipped."""
+        (tmp_path / "a.txt").write_text("هاذا گتاب", encoding='utf-8')
+        self.normalize_files(tmp_path, ["a"])
+        assert self.is_current(tmp_path, "a")
+
+    def test_changed_input_or_options(self, tmp_path):
+        """Test that content and option changes trigger re-normalization."""
+        (tmp_path / "a.txt").write_text("هاذا گتاب", encoding='utf-8')
+        self.normalize_files(tmp_path, ["a"])
+        assert not self.is_current(tmp_path, "a", {**self.OPTIONS, 'format': 'jsonl'})
+        (tmp_path / "a.txt").write_text("هاذا قلم", encoding='utf-8')
+        assert not self.is_current(tmp_path, "a")
+
+    def test_missing_output(self, tmp_path):
+        """Test that deleted outputs are rebuilt."""
+        (tmp_path / "a.txt").write_text("هاذا", encoding='utf-8')
+        self.normalize_files(tmp_path, ["a"])
+        (tmp_path / "out" / "a.txt").unlink()
+        assert not self.is_current(tmp_path, "a")
+
+    def test_dictionary_change_only_affects_matching_files(self, tmp_path):
+        """Test that a new variant only invalidates files containing it."""
+        (tmp_path / "a.txt").write_text("هاذا گتاب", encoding='utf-8')
+        (tmp_path / "b.txt").write_text("قلم، مدرسة", encoding='utf-8')
+        self.normalize_files(tmp_path, ["a", "b"])
+
+        variants = load_variants()
+        variants["قلم"] = "القلم"
+        try:
+            assert self.is_current(tmp_path, "a")
+            assert not self.is_current(tmp_path, "b")
+        finally:
+            del variants["قلم"]
+
+    def test_token_filter_round_trip(self):
+        """Test Bloom filter membership after serialization."""
+        token_filter = TokenFilter.from_dict(TokenFilter.from_tokens({"هذا", "كتاب"}).to_dict())
+        assert "هذا" in token_filter
+        assert token_filter.intersects(["x", "كتاب"])
+        assert not token_filter.intersects(["قلم"])
+
+
+class TestBatchMode:
+    """Test directory and glob batch normalization."""
+
+    def make_corpus(self, tmp_path):
+        corpus = tmp_path / "corpus"
+        (corpus / "a" / "b").mkdir(parents=True)
+        (corpus / "one.txt").write_text("هاذا گتاب", encoding='utf-8')
+        (corpus / "a" / "two.txt").write_text("الي قلم", encoding='utf-8')
+        with open_text(corpus / "a" / "b" / "three.txt.gz", 'w') as f:
+            f.write("مدرسة")
+        return corpus
+
+    def test_collect_inputs_glob_base(self, tmp_path):
+        """Test that glob patterns mirror from their static prefix."""
+        corpus = self.make_corpus(tmp_path)
+        base, files = collect_inputs(str(corpus / "**" / "*.txt"))
+        assert base == corpus
+        assert [path.name for path in files] == ["two.txt", "one.txt"]
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_mirrored_tree_and_report(self, tmp_path, workers):
+        """Test output layout, compression and report counts."""
+        corpus = self.make_corpus(tmp_path)
+        out = tmp_path / "out"
+        options = {'format': 'text', 'fields': [], 'unknown_field': None}
+        report = normalize_tree(str(corpus), out, options, workers=workers)
+
+        assert (out / "one.txt").read_text(encoding='utf-8') == "هذا كتاب"
+        assert (out / "a" / "two.txt").read_text(encoding='utf-8') == "اللي كلم"
+        with open_text(out / "a" / "b" / "three.txt.gz") as f:
+            assert f.read() == "مدرسه"
+        assert report['files'] == report['processed'] == 3
+        assert report['tokens'] == 5
+        assert report['changed_tokens'] == 5
+        assert sorted(report['unknown_variants']) == sorted(["گتاب", "قلم", "مدرسة"])
+
+    def test_errors_reported_without_partial_output(self, tmp_path):
+        """Test that failing files are reported and leave no output."""
+        corpus = tmp_path / "corpus"
+        corpus.mkdir()
+        (corpus / "bad.jsonl").write_text('{"text": "هاذا"}\nnot json\n', encoding='utf-8')
+        out = tmp_path / "out"
+        options = {'format': 'jsonl', 'fields': ['text'], 'unknown_field': None}
+        report = normalize_tree(str(corpus), out, options)
+
+        assert report['failed'] == 1
+        assert "Line 2" in report['errors'][0]['error']
+        assert list(out.iterdir()) == []
+
+
+class TestTokenIndex:
+    """Test the inverted token index and targeted delta application."""
+
+    def make_corpus(self, tmp_path):
+        corpus = tmp_path / "corpus"
+        corpus.mkdir()
+        (corpus / "records.jsonl").write_text(
+            '{"text":"هاذا گتاب"}\n{"text":"قلم","id":"قلم"}\n{"text":"الي"}\n', encoding='utf-8')
+        (corpus / "rows.csv").write_text('id,text\n1,هاذا\n2,"قلم,\nمدرسة"\n', encoding='utf-8')
+        return corpus
+
+    def test_index_units_uses_selected_fields(self, tmp_path):
+        """Test that postings come from decoded field values only."""
+        corpus = self.make_corpus(tmp_path)
+        options = {'format': 'jsonl', 'fields': ['text'], 'unknown_field': None}
+        postings = index_units(corpus / "records.jsonl", options)
+        assert postings == {"هاذا": [0], "گتاب": [0], "قلم": [1], "الي": [2]}
+
+    def test_apply_delta_patches_affected_units(self, tmp_path):
+        """Test that only units containing changed words are re-normalized."""
+        corpus = self.make_corpus(tmp_path)
+        out = tmp_path / "out"
+        index_path = tmp_path / "corpus.idx"
+        for fmt, name in (('jsonl', 'records.jsonl'), ('csv', 'rows.csv')):
+            options = {'format': fmt, 'fields': ['text'], 'unknown_field': None}
+            with TokenIndex(index_path) as index:
+                normalize_tree(str(corpus / name), out, options, index=index)
+
+        variants = load_variants()
+        variants["قلم"] = "القلم"
+        try:
+            with TokenIndex(index_path) as index:
+                report = apply_delta(index)
+            with TokenIndex(index_path) as index:
+                second = apply_delta(index)
+        finally:
+            del variants["قلم"]
+
+        assert report['patched_files'] == 2
+        assert report['patched_units'] == 2
+        assert report['renormalized_files'] == 0
+        assert second['outdated'] == 0
+        assert (out / "records.jsonl").read_text(encoding='utf-8').splitlines() == [
+            '{"text": "هذا كتاب"}', '{"text": "القلم", "id": "قلم"}', '{"text": "اللي"}'
+        ]
+        assert (out / "rows.csv").read_text(encoding='utf-8') == 'id,text\n1,هذا\n2,"القلم, مدرسه"\n'
+
+    def test_apply_delta_keeps_profile(self, tmp_path):
+        """Test that files indexed under a profile are patched with that profile."""
+        corpus = self.make_corpus(tmp_path)
+        out = tmp_path / "out"
+        index_path = tmp_path / "corpus.idx"
+        options = {'format': 'jsonl', 'fields': ['text'], 'unknown_field': None,
+                   'morphology': False, 'profile': 'no-hatha'}
+        register_profile("no-hatha", {"remove_variants": ["هاذا"]})
+        variants = load_variants()
+        try:
+            set_profile("no-hatha")
+            try:
+                with TokenIndex(index_path) as index:
+                    normalize_tree(str(corpus / "records.jsonl"), out, options, index=index)
+            finally:
+                set_profile(None)
+
+            # The run itself uses the base data, as apply-delta does
+            variants["قلم"] = "القلم"
+            with TokenIndex(index_path) as index:
+                report = apply_delta(index)
+        finally:
+            variants.pop("قلم", None)
+            unregister_profile("no-hatha")
+
+        assert report['errors'] == []
+        assert (report['patched_files'], report['patched_units']) == (1, 1)
+        assert (out / "records.jsonl").read_text(encoding='utf-8').splitlines() == [
+            '{"text": "هاذا كتاب"}', '{"text": "القلم", "id": "قلم"}', '{"text": "اللي"}'
+        ]
+
+
+class TestProfiler:
+    """Test the --profile instrumentation."""
+
+    def setup_method(self):
+        """Clear unknown variants before each test."""
+        clear_unknown_variants()
+
+    @pytest.mark.parametrize("text", [
+        "الي يقول هاذا الكلام گتير گتير",
+        "(الي) \"رايك\" الان. مدرسة؟ ... قرآن",
+        "",
+    ])
+    def test_normalize_matches_normalize_text(self, text):
+        """Test that the instrumented path gives identical results."""
+        expected_unknowns, unknowns = [], []
+        profiler = Profiler()
+        assert profiler.normalize(text, unknowns) == normalize_text(text, expected_unknowns)
+        assert unknowns == expected_unknowns
+        assert profiler.tokens == len(text.split())
+
+    def test_structured_phases_and_report(self, tmp_path):
+        """Test per-phase timings, throughput and cProfile output."""
+        lines = ['{"text": "هاذا گتاب"}\n', '{"text": "قلم"}\n']
+        stats_path = tmp_path / "run.prof"
+        profiler = Profiler(stats_path)
+        profiler.start()
+        output = list(normalize_jsonl(profiler.reader(lines), ["text"], normalize=profiler.normalize))
+        profiler.stop()
+
+        assert output == list(normalize_jsonl(lines, ["text"]))
+        report = profiler.report()
+        assert list(report['phases']) == ['read', 'tokenize', 'prefilter', 'lookup', 'rules', 'other']
+        assert report['tokens'] == 3
+        assert report['skip_rate'] == 0.0
+        assert report['peak_memory_bytes'] > 0
+        assert report['hotspots'] and stats_path.exists()
+        assert 'PROFILE:' in profiler.format_summary()
+
+
+class TestMorphologyTools:
+    """Test morphology support in the manifest and the compaction report."""
+
+    def teardown_method(self):
+        """Restore the default setting."""
+        set_morphology(False)
+
+    def test_snapshot_records_morphology(self):
+        """Test that toggling morphology invalidates every output."""
+        plain = data_snapshot()
+        set_morphology(True)
+        with_morphology = data_snapshot()
+        assert 'morphology' not in plain
+        assert changed_keys(plain, with_morphology) is None
+        assert changed_keys(with_morphology, with_morphology) == set()
+
+    def test_clean_tokens_include_stems(self):
+        """Test that stems are indexed so stem changes reach inflected forms."""
+        assert clean_tokens(["والي."]) == {"والي"}
+        set_morphology(True)
+        assert {"والي", "الي"} <= clean_tokens(["والي."])
+
+    def test_compaction_report(self):
+        """Test counts of the compaction report."""
+        report = compaction_report()
+        exceptions = report['exceptions']
+        assert exceptions['kept'] + exceptions['removed'] == exceptions['entries']
+        assert len(report['kept_exceptions']) == exceptions['kept']
+        assert exceptions['bytes_after'] <= exceptions['bytes_before']
+
+
+class TestCheckDictionary:
+    """Test the variant data validation report."""
+
+    def test_shipped_data_has_no_errors(self):
+        """Test that the shipped variant file compiles."""
+        with open(Path(__file__).parent.parent / 'data' / 'hassaniya_variants.jsonl', encoding='utf-8') as f:
+            report = check_dictionary([json.loads(line) for line in f if line.strip()])
+        assert report['errors'] == []
+        assert report['compiled'] > report['variants']
+
+    def test_report_counts_chains_and_errors(self):
+        """Test collapsed chains and conflicts in the report."""
+        chained = [
+            {"canonical": "هذا", "variants": ["هاذا"]},
+            {"canonical": "هاذا", "variants": ["هاذ"]},
+        ]
+        assert check_dictionary(chained)['collapsed'] == 1
+        report = check_dictionary(chained + [{"canonical": "هاذ", "variants": ["هاذا"]}])
+        assert report['errors'] and report['compiled'] == 0
+
+
+class TestDifferential:
+    """Test the engine vs reference fuzzing harness."""
+
+    def test_engines_match_reference(self):
+        """Test a short fixed-seed run without mismatches."""
+        assert differential.run_fuzz(40, seed=5) == []
+
+    def test_reference_semantics(self):
+        """Test the reference on exceptions, variants and clitic stems."""
+        from normalizer.reference import reference_normalize_text
+        variants = {'هاذ': 'هذا'}
+        exceptions = {'قال'}
+        assert reference_normalize_text('«هاذ» قال قلب مدرسة', variants, exceptions) == (
+            '«هاذ» قال كلب مدرسه', ['قلب', 'مدرسة']
+        )
+        assert reference_normalize_text('وهاذ, وقال', variants, exceptions, morphology=True) == (
+            'وهذا, وقال', []
+        )
+
+    def test_mismatch_is_shrunk(self, monkeypatch):
+        """Test that a disagreement is reduced to a minimal case."""
+        def buggy(texts):
+            outputs, unknowns, merged = differential.reference_engine(texts)
+            return [text.replace('ه', 'ة') for text in outputs], unknowns, merged
+
+        monkeypatch.setitem(differential.ENGINES, 'buggy', (buggy, differential.reference_engine))
+        mismatches = differential.run_fuzz(20, seed=3, engines=['buggy'], morphology=(False,))
+        assert len(mismatches) == 1
+        case = mismatches[0]['case']
+        assert len(case) == 1 and len(case[0]) == 1
+        assert 'ه' in differential.reference_engine(case)[0][0]
+
+
+class TestUnknownVariantScan:
+    """Test counting the unknown variants of text files."""
+
+    def test_scan_counts_lines(self, tmp_path):
+        """Test that each line counts a word once."""
+        source = tmp_path / "corpus.txt"
+        source.write_text("قلب قلب\nقلب\nهذا\n", encoding="utf-8")
+        sketch = tmp_path / "unknowns.json"
+        assert scan_files([str(source)], UnknownVariantTracker(sketch)) == 3
+        assert HeavyHitters.load(sketch).top() == [("قلب", 2, 0)]
+
+
+class TestShardedJobs:
+    """Test resumable sharded jobs with lock files and checkpoints."""
+
+    OPTIONS = {'format': 'text', 'fields': [], 'unknown_field': None}
+
+    def make_job(self, tmp_path, files=4):
+        corpus = tmp_path / "corpus"
+        corpus.mkdir()
+        for number in range(files):
+            (corpus / f"{number}.txt").write_text(f"هاذا گتاب {number}", encoding='utf-8')
+        job = tmp_path / "job"
+        plan_job(job, str(corpus), tmp_path / "out", self.OPTIONS, shard_bytes=40)
+        return job
+
+    def test_plan_is_idempotent(self, tmp_path):
+        """Test shard splitting and re-planning the same corpus."""
+        job = self.make_job(tmp_path)
+        plan = load_job(job)
+        assert [len(shard['files']) for shard in plan['shards']] == [2, 2]
+        assert plan_job(job, str(tmp_path / "corpus"), tmp_path / "out", self.OPTIONS, shard_bytes=40) == plan
+        with pytest.raises(ValueError):
+            plan_job(job, str(tmp_path / "corpus"), tmp_path / "out", self.OPTIONS, shard_bytes=1000)
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_run_checkpoints_and_resumes(self, tmp_path, workers):
+        """Test that a second run skips checkpointed shards."""
+        job = self.make_job(tmp_path)
+        result = run_job(job, workers=workers)
+        assert sorted(result['shards']) == ["shard-00000", "shard-00001"]
+        assert (tmp_path / "out" / "3.txt").read_text(encoding='utf-8') == "هذا كتاب 3"
+        assert list((job / "locks").iterdir()) == []
+
+        report = result['report']
+        assert report['done'] == 2 and report['pending'] == 0
+        assert report['tokens'] == 12 and report['changed_tokens'] == 8
+        assert report['unknown_variants'] == [{'word': "گتاب", 'files': 4, 'error': 0}]
+        assert run_job(job)['shards'] == []
+
+    def test_live_and_stale_locks(self, tmp_path):
+        """Test that live claims are skipped and dead workers' claims taken over."""
+        job = self.make_job(tmp_path)
+        live = ShardLock.acquire(job / "locks" / "shard-00000.lock")
+        stale = ShardLock.acquire(job / "locks" / "shard-00001.lock")
+        os.utime(stale.path, (time.time() - 120, time.time() - 120))
+
+        assert ShardLock.acquire(live.path, lease=60) is None
+        result = run_job(job, lease=60)
+        assert result['shards'] == ["shard-00001"]
+        assert not stale.owned()
+        assert job_report(job, lease=60)['running'] == 1
+
+        # Only one worker takes over a given stale claim
+        os.utime(live.path, (time.time() - 120, time.time() - 120))
+        live.path.with_name(f"{live.path.name}.takeover-{live.token}").touch()
+        assert ShardLock.acquire(live.path, lease=60) is None
+        assert live.owned()
+
+    def test_takeover_leaves_no_markers(self, tmp_path, monkeypatch):
+        """Test that a takeover removes its marker and is not repeated."""
+        job = self.make_job(tmp_path)
+        stale = ShardLock.acquire(job / "locks" / "shard-00000.lock")
+        os.utime(stale.path, (time.time() - 120, time.time() - 120))
+
+        first = ShardLock.acquire(stale.path, lease=60)
+        assert first is not None and first.owned()
+        assert list((job / "locks").glob("*.takeover-*")) == []
+
+        # A worker that read the dead owner's token before the takeover
+        # finds its marker free again, but must not replace the new claim
+        owners = iter([stale.token])
+        owner = ShardLock._owner
+        monkeypatch.setattr(ShardLock, '_owner', staticmethod(lambda path: next(owners, None) or owner(path)))
+        assert ShardLock._take_over(stale.path, "late", "{}", lease=0) is None
+        assert first.owned()
+        assert list((job / "locks").glob("*.takeover-*")) == []
+
+    def test_failed_shard_is_retried(self, tmp_path):
+        """Test that a failing shard is not checkpointed and runs again."""
+        job = self.make_job(tmp_path)
+        bad = tmp_path / "corpus" / "0.txt"
+        bad.write_bytes(b"\xff\xfe\x00broken")
+        result = run_job(job)
+        assert result['shards'] == ["shard-00001"] and len(result['errors']) == 1
+        bad.write_text("قلم", encoding='utf-8')
+        assert run_job(job)['shards'] == ["shard-00000"]
+
+    def test_data_mismatch_refused(self, tmp_path):
+        """Test that a worker with different data refuses to run."""
+        job = self.make_job(tmp_path)
+        plan = load_job(job)
+        plan['data'] = "0" * 64
+        write_json_atomic(job / "job.json", plan)
+        with pytest.raises(ValueError):
+            run_job(job)
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="needs Unix domain sockets")
+class TestDaemon:
+    """Test the warm daemon and its thin client."""
+
+    @pytest.fixture
+    def daemon(self):
+        path = tempfile.mktemp(prefix='hn-', suffix='.sock', dir='/tmp')
+        server = NormalizerDaemon(path)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield path
+        server.shutdown()
+        server.server_close()
+
+    def test_runs_cli_invocations(self, daemon, tmp_path, capsys, monkeypatch):
+        """Test output files, replayed output and exit status."""
+        source = tmp_path / "in.txt"
+        source.write_text("هاذا قلم", encoding='utf-8')
+        monkeypatch.chdir(tmp_path)
+        assert run_remote(['--in', 'in.txt', '--out', 'out.txt'], daemon) == 0
+        assert (tmp_path / "out.txt").read_text(encoding='utf-8') == "هذا كلم"
+        assert "Normalized text written" in capsys.readouterr().out
+
+        assert run_remote(['--in', 'missing.txt', '--out', 'out.txt'], daemon) == 1
+        assert "does not exist" in capsys.readouterr().err
+        assert run_remote(['--bogus'], daemon) == 2
+
+    def test_single_daemon_and_fallback(self, daemon, tmp_path):
+        """Test that a second daemon is refused and a missing one is detected."""
+        with pytest.raises(ValueError):
+            NormalizerDaemon(daemon)
+        assert send_request({'op': 'status'}, daemon)['pid'] == os.getpid()
+        assert send_request({'op': 'status'}, str(tmp_path / "none.sock")) is None
+        assert run_remote(['--help'], str(tmp_path / "none.sock")) is None
+
+    def test_untrusted_sockets_are_ignored(self, daemon, tmp_path):
+        """Test that only the user's own private socket is connected to."""
+        assert trusted_socket(daemon)
+        os.chmod(daemon, 0o666)
+        assert send_request({'op': 'status'}, daemon) is None
+        os.chmod(daemon, 0o600)
+        assert send_request({'op': 'status'}, daemon)['pid'] == os.getpid()
+        if os.getuid() == 0:
+            os.chown(daemon, 65534, -1)
+            assert not trusted_socket(daemon)
+            os.chown(daemon, 0, -1)
+
+        # Not a socket, and a socket in a directory others can write to
+        fake = tmp_path / "fake.sock"
+        fake.write_text("", encoding='utf-8')
+        fake.chmod(0o600)
+        assert not trusted_socket(str(fake))
+        shared = tmp_path / "shared"
+        shared.mkdir()
+        link = shared / "daemon.sock"
+        os.symlink(daemon, link)
+        assert not trusted_socket(str(link))
+        shared.chmod(0o777)
+        with pytest.raises(ValueError):
+            NormalizerDaemon(str(shared / "other.sock"))
+
+    def test_default_socket_directory(self, tmp_path, monkeypatch):
+        """Test that the fallback socket is in a private per-user directory."""
+        monkeypatch.delenv('HASSANIYA_SOCKET', raising=False)
+        monkeypatch.delenv('XDG_RUNTIME_DIR', raising=False)
+        monkeypatch.setenv('TMPDIR', str(tmp_path))
+        path = default_socket_path()
+        assert os.path.dirname(path) == str(tmp_path / f"hassaniya-normalizer-{os.getuid()}")
+        server = NormalizerDaemon(path)
+        try:
+            assert os.stat(os.path.dirname(path)).st_mode & 0o777 == 0o700
+            assert trusted_socket(path)
+        finally:
+            server.server_close()
+
+    def test_refresh_data_only_on_change(self, monkeypatch):
+        """Test that the data is reloaded only when the files change."""
+        reload_data()
+        assert refresh_data() is False
+        monkeypatch.setattr(normalizer_module, '_loaded_signature', ())
+        assert refresh_data() is True
+        assert refresh_data() is False
@@ -0,0 +1,66 @@
+"""Tests for the live editor's per-session paragraph cache."""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import the cache
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from normalizer import normalize_batch
+from web_ui.incremental import SessionCache
+
+
+class _CountingNormalizer:
+    """Batch normalizer recording the paragraphs it is asked for."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        unknowns = []
+        normalized = normalize_batch(texts, unknowns)
+        return [
+            {'normalized_text': text, 'unknown_variants': variants}
+            for text, variants in zip(normalized, unknowns)
+        ]
+
+
+class TestSessionCache:
+    """Test incremental normalization of changed paragraphs."""
+
+    def test_only_new_paragraphs_are_normalized(self):
+        """Test that unchanged paragraphs are served from the cache."""
+        cache = SessionCache()
+        normalize = _CountingNormalizer()
+        first = cache.update('s', 'v1', ['a', 'b'], {'a': 'هاذا گتاب', 'b': 'مدرسة'}, [], normalize)
+        assert first['results']['a']['normalized_text'] == 'هذا كتاب'
+        assert first['unknown_variants'] == ['گتاب', 'مدرسة']
+        assert first['missing'] == []
+
+        second = cache.update('s', 'v1', ['a', 'c'], {'c': 'قلم'}, [], normalize)
+        assert list(second['results']) == ['c']
+        assert second['unknown_variants'] == ['گتاب', 'قلم']
+        assert normalize.calls == [['هاذا گتاب', 'مدرسة'], ['قلم']]
+
+    def test_want_and_diff_use_the_cache(self):
+        """Test that results can be fetched again, with diffs, without normalizing."""
+        cache = SessionCache()
+        normalize = _CountingNormalizer()
+        cache.update('s', 'v1', ['a'], {'a': 'گتاب'}, [], normalize)
+        page = cache.update('s', 'v1', ['a'], {}, ['a'], normalize, lambda old, new: f'{old}→{new}')
+        assert page['results'] == {'a': {'normalized_text': 'كتاب', 'unknown_variants': ['گتاب'], 'diff_html': 'گتاب→كتاب'}}
+        assert len(normalize.calls) == 1
+
+    def test_version_change_and_eviction_report_missing(self):
+        """Test that paragraphs the server lost are reported for resending."""
+        cache = SessionCache(max_sessions=1, max_paragraphs=2)
+        normalize = _CountingNormalizer()
+        cache.update('s', 'v1', ['a', 'b'], {'a': 'قال', 'b': 'قلم'}, [], normalize)
+        assert cache.update('s', 'v2', ['a', 'b'], {}, ['a'], normalize)['missing'] == ['a', 'b']
+
+        cache.update('s', 'v2', ['a', 'b', 'c'], {'a': 'قال', 'b': 'قلم', 'c': 'گال'}, [], normalize)
+        assert cache.update('s', 'v2', ['a', 'b', 'c'], {}, [], normalize)['missing'] == ['a']
+
+        cache.update('other', 'v2', ['a'], {'a': 'قال'}, [], normalize)
+        assert cache.update('s', 'v2', ['c'], {}, [], normalize)['missing'] == ['c']
@@ -0,0 +1,84 @@
+"""Tests for background normalization jobs."""
+
+import io
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import the job manager
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from normalizer import normalize_batch
+from web_ui.jobs import CANCELLED, DONE, JobManager, QueueFullError
+
+
+def _blocking_normalize(release):
+    """Return a batch normalizer that waits for ``release`` to be set."""
+    def normalize(lines, unknowns):
+        release.wait(5)
+        return normalize_batch(lines, unknowns)
+    return normalize
+
+
+class TestJobManager:
+    """Test chunked background jobs, progress and expiry."""
+
+    def test_job_runs_in_chunks(self, tmp_path):
+        """Test progress events, partial output reads and the result."""
+        manager = JobManager(tmp_path, normalize_batch, chunk_lines=2)
+        text = 'هاذا گتاب\nالي قال\n\nمدرسة'
+        job = manager.submit(io.BytesIO(text.encode('utf-8')), 'doc.txt')
+        events = list(manager.events(job))
+
+        assert events[-1]['status'] == DONE
+        assert events[-1]['progress'] == 1.0 and events[-1]['lines'] == 4
+        assert job.output_path.read_text(encoding='utf-8') == 'هذا كتاب\nاللي كال\n\nمدرسه'
+        assert manager.unknown_variants(job) == ['گتاب', 'قال', 'مدرسة']
+        assert manager.read_output(job, 0, 20) == 'هذا كتاب\n'.encode('utf-8')
+        assert manager.read_output(job, job.output_bytes) == b''
+        manager.shutdown()
+
+    def test_bounded_queue_and_cancel(self, tmp_path):
+        """Test that submissions beyond the limit are refused and jobs can be cancelled."""
+        release = threading.Event()
+        manager = JobManager(tmp_path, _blocking_normalize(release), workers=1, max_pending=2)
+        running = manager.submit(io.BytesIO('قال'.encode('utf-8')))
+        queued = manager.submit(io.BytesIO('قال'.encode('utf-8')))
+        with pytest.raises(QueueFullError):
+            manager.submit(io.BytesIO(b'x'))
+
+        assert manager.cancel(queued.id)
+        assert queued.status == CANCELLED and not queued.directory.exists()
+        assert manager.get(queued.id) is None
+        release.set()
+        assert list(manager.events(running))[-1]['status'] == DONE
+        manager.shutdown()
+
+    def test_expiry_and_shutdown_cleanup(self, tmp_path):
+        """Test that finished jobs expire and shutdown removes the spool directory."""
+        manager = JobManager(tmp_path, normalize_batch, ttl=0)
+        job = manager.submit(io.BytesIO(b'abc'))
+        list(manager.events(job))
+        job.finished -= 1
+        assert manager.get(job.id) is None
+        assert not job.directory.exists()
+        manager.shutdown()
+        assert not manager.spool_dir.exists()
+        assert tmp_path.exists()
+
+    def test_instances_sharing_a_root(self, tmp_path):
+        """Test that a second manager on the same root leaves the first one's jobs alone."""
+        release = threading.Event()
+        first = JobManager(tmp_path, _blocking_normalize(release), workers=1)
+        job = first.submit(io.BytesIO('قال'.encode('utf-8')))
+        second = JobManager(tmp_path, normalize_batch)
+        second.shutdown()
+
+        assert first.spool_dir != second.spool_dir
+        assert job.input_path.exists()
+        release.set()
+        assert list(first.events(job))[-1]['status'] == DONE
+        assert job.output_path.read_text(encoding='utf-8') == 'كال'
+        first.shutdown()
@@ -0,0 +1,116 @@
+"""Tests for the web API load-test harness."""
+
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import the harness
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from web_ui.loadtest import (
+    RequestFactory,
+    format_comparison,
+    latency_summary,
+    parse_mix,
+    percentile,
+    run_load,
+)
+
+
+class _APIHandler(BaseHTTPRequestHandler):
+    """Minimal stand-in for the API: answers normalize requests, fails others."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if self.path == '/api/normalize':
+            status, payload = 200, {'normalized_text': body['text'], 'unknown_variants': []}
+        else:
+            status, payload = 500, {'error': 'boom'}
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api_url():
+    """Run the stand-in API on a free port."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _APIHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestHelpers:
+    """Test mix parsing and latency statistics."""
+
+    def test_parse_mix(self):
+        """Test weights, defaults and invalid kinds."""
+        assert parse_mix("normalize=8,batch=1,add-variant") == {'normalize': 8, 'batch': 1, 'add-variant': 1}
+        with pytest.raises(ValueError):
+            parse_mix("search=1")
+        with pytest.raises(ValueError):
+            parse_mix("normalize=0")
+
+    def test_percentile(self):
+        """Test interpolated percentiles."""
+        values = [float(i) for i in range(1, 101)]
+        assert percentile(values, 50) == pytest.approx(50.5)
+        assert percentile(values, 99) == pytest.approx(99.01)
+        assert percentile([], 95) == 0.0
+        assert latency_summary([0.001, 0.003])['max'] == 3.0
+
+    def test_factory_follows_mix(self):
+        """Test that only weighted kinds are produced, with valid payloads."""
+        factory = RequestFactory({'batch': 1}, ["هاذا", "قلم"], batch_size=3)
+        kind, path, body = factory.next()
+        assert (kind, path) == ('batch', '/api/normalize-batch')
+        assert len(json.loads(body)['texts']) == 3
+
+
+class TestRunLoad:
+    """Test load generation against a local server."""
+
+    def test_closed_loop(self, api_url):
+        """Test request counts and per-endpoint error rates."""
+        factory = RequestFactory({'normalize': 3, 'add-variant': 1}, ["هاذا الكلام"])
+        report = run_load(api_url, factory, concurrency=4, duration=30, max_requests=40)
+
+        assert report['requests'] == 40
+        endpoints = report['endpoints']
+        assert endpoints['normalize']['errors'] == 0
+        assert endpoints['add-variant']['errors'] == endpoints['add-variant']['requests']
+        assert endpoints['add-variant']['error_samples'][0].startswith('HTTP 500')
+        assert report['errors'] == endpoints['add-variant']['requests']
+        assert report['latency_ms']['p50'] <= report['latency_ms']['p99'] <= report['latency_ms']['max']
+
+    def test_target_rate(self, api_url):
+        """Test that requests are spread over time at the target rate."""
+        factory = RequestFactory({'normalize': 1}, ["هاذا"])
+        report = run_load(api_url, factory, concurrency=2, rate=100, duration=30, max_requests=20)
+
+        assert report['requests'] == 20
+        assert report['errors'] == 0
+        assert report['seconds'] >= 0.19
+
+    def test_comparison_table(self, api_url):
+        """Test that reports render side by side."""
+        factory = RequestFactory({'normalize': 1}, ["هاذا"])
+        report = run_load(api_url, factory, concurrency=1, max_requests=5)
+        report['label'] = 'baseline'
+        table = format_comparison([report, dict(report, label='cached')])
+        assert 'baseline' in table and 'cached' in table and 'p99 (ms)' in table
@@ -4,6 +4,7 @@ This module contains comprehensive tests for the normalization functionality,
 including letter rules, variant mappings, and exception handling.
 """
 
+import asyncio
 import pytest
 import sys
 from pathlib import Path
@@ -11,8 +12,38 @@ from pathlib import Path
 # Add parent directory to path to import normalizer
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from normalizer import normalize_text, normalize_word, clear_unknown_variants
-from normalizer.rules import apply_letter_rules
+from normalizer import (
+    normalize_text,
+    normalize_word,
+    normalize_batch,
+    normalize_parallel,
+    normalize_text_bulk,
+    anormalize_text,
+    anormalize_batch,
+    anormalize_lines,
+    clear_unknown_variants,
+    set_morphology,
+    unknown_variants,
+    DictionaryError,
+    register_profile,
+    use_profile,
+    prefilter_stats,
+    reset_prefilter_stats,
+    set_prefilter,
+    trace,
+    add_hook,
+    remove_hook,
+)
+from normalizer import parallel
+from normalizer.compiler import compile_variants
+from normalizer.morphology import compact_exceptions, splits
+from normalizer.normalizer import load_variants
+from normalizer.prefilter import passes, variant_filter
+from normalizer.profiles import get_profile, unregister_profile
+from normalizer.rules import apply_letter_rules, load_exceptions
+from normalizer.search import IndexCache, LexiconIndex
+from normalizer.sketch import HeavyHitters, UnknownVariantTracker
+from normalizer.vectorized import apply_letter_rules_batch
 
 
 class TestLetterRules:
@@ -83,6 +114,17 @@ class TestVariantMappings:
         assert normalize_word('"رايك"') == '"رأيك"'
         assert normalize_word("الان.") == "الآن."
 
+    def test_arabic_punctuation_preservation(self):
+        """Test that Arabic comma, semicolon and question mark are stripped for lookup and kept."""
+        assert normalize_word("هاذا،") == "هذا،"
+        assert normalize_word("الي؛") == "اللي؛"
+        assert normalize_word("؟هاذا؟") == "؟هذا؟"
+        assert normalize_word("گتاب،") == "كتاب،"
+        text = "هاذا، الي؟ گتاب؛"
+        assert normalize_text(text) == "هذا، اللي؟ كتاب؛"
+        assert normalize_text_bulk(text) == normalize_text(text)
+        assert normalize_batch([text]) == [normalize_text(text)]
+
 
 class TestTextNormalization:
     """Test full text normalization."""
@@ -126,6 +168,538 @@ class TestTextNormalization:
         assert normalize_text(text) == expected
 
 
+class TestBatchNormalization:
+    """Test batched normalization."""
+    
+    def setup_method(self):
+        """Clear unknown variants before each test."""
+        clear_unknown_variants()
+    
+    def test_batch_matches_normalize_text(self):
+        """Test that batch results match per-text normalization."""
+        texts = ["الي يقول هاذا الكلام گتير", "", "هاذا، گتاب!", "   ", "Hello هاذا"]
+        assert normalize_batch(texts) == [normalize_text(text) for text in texts]
+    
+    def test_batch_unknowns_per_text(self):
+        """Test that unknown variants are reported per text."""
+        unknowns = []
+        normalize_batch(["گتاب قلم", "هاذا", "قلم"], unknowns)
+        assert unknowns == [["گتاب", "قلم"], [], ["قلم"]]
+        assert unknown_variants == []
+    
+    def test_batch_tracks_global_unknowns_by_default(self):
+        """Test that the global list is used when no collector is given."""
+        normalize_batch(["گتاب", "گتاب قلم"])
+        assert unknown_variants == ["گتاب", "قلم"]
+
+
+class TestBulkEngine:
+    """Test that the bulk engine matches the reference path."""
+    
+    @pytest.mark.parametrize("text", [
+        "الي يقول هاذا الكلام گتير",
+        "هاذا، الي يقول كذا!",
+        "(الي) \"رايك\" الان. مدرسة؟ ة. .ة ة.x",
+        "!@#$%^&*() ... ؟",
+        "هاذا\nكتاب\tجميل\u00a0قلم\u2028مدرسة\x1c",
+        "قرآن گتابة",
+        "",
+        "   ",
+    ])
+    def test_matches_normalize_text(self, text: str):
+        """Test identical output and unknown variants."""
+        expected_unknowns, unknowns = [], []
+        assert normalize_text_bulk(text, unknowns) == normalize_text(text, expected_unknowns)
+        assert unknowns == expected_unknowns
+    
+    def test_tracks_global_unknowns_by_default(self):
+        """Test that the global list is used when no collector is given."""
+        clear_unknown_variants()
+        normalize_text_bulk("گتاب قلم گتاب.")
+        assert unknown_variants == ["گتاب", "قلم"]
+
+
+class TestVectorizedRules:
+    """Test the batch letter rules against the per-word rules."""
+    
+    WORDS = ["گتاب", "قلم", "مدرسة", "ة", "", "ةة", "Hello", "قة", "كتاب", "x\ud800ة"]
+    
+    def test_batch_matches_apply_letter_rules(self):
+        """Test identical results on the path available here."""
+        words = self.WORDS + sorted(load_exceptions())
+        assert apply_letter_rules_batch(words, min_words=0) == [apply_letter_rules(w) for w in words]
+    
+    def test_numpy_path_matches_apply_letter_rules(self):
+        """Test the NumPy codepoint path directly."""
+        pytest.importorskip("numpy")
+        from normalizer.vectorized import _apply_vectorized
+        words = (self.WORDS + sorted(load_exceptions())) * 3
+        assert _apply_vectorized(words) == [apply_letter_rules(w) for w in words]
+        # Words containing the separator fall back to the per-word rules
+        assert _apply_vectorized(["قلم\nة", "گ"]) == ["كلم\nه", "ك"]
+    
+    def test_small_batches(self):
+        """Test that empty and single-word batches are handled."""
+        assert apply_letter_rules_batch([], min_words=0) == []
+        assert apply_letter_rules_batch(["مدرسة"], min_words=0) == ["مدرسه"]
+
+
+class TestParallelNormalization:
+    """Test parallel normalization with different executors."""
+    
+    TEXTS = ["الي يقول هاذا الكلام گتير", "", "قلم مدرسة", "Hello هاذا"] * 20
+    
+    def setup_method(self):
+        """Clear unknown variants before each test."""
+        clear_unknown_variants()
+    
+    @pytest.mark.parametrize("executor", ["auto", "inline", "thread", "process"])
+    def test_matches_normalize_text(self, executor: str):
+        """Test that every executor preserves order and output."""
+        expected = [normalize_text(text, []) for text in self.TEXTS]
+        result = normalize_parallel(self.TEXTS, workers=2, chunksize=7, executor=executor)
+        assert result == expected
+    
+    def test_unknowns_aggregated(self):
+        """Test that unknown variants from all workers are collected."""
+        unknowns = []
+        normalize_parallel(self.TEXTS, workers=2, unknowns=unknowns, executor="process")
+        assert sorted(unknowns) == sorted(["گتير", "يقول", "قلم", "مدرسة"])
+        assert unknown_variants == []
+    
+    def test_invalid_executor(self):
+        """Test that unknown executor names are rejected."""
+        with pytest.raises(ValueError):
+            normalize_parallel(self.TEXTS, executor="gpu")
+
+    def test_explicit_executor_chunksize_from_cost(self, monkeypatch):
+        """Test that an explicit executor gets a chunk size derived from the measured cost."""
+        calls = []
+        auto_chunksize = parallel._auto_chunksize
+        monkeypatch.setattr(parallel, '_auto_chunksize',
+                            lambda *args: calls.append(args) or auto_chunksize(*args))
+        texts = self.TEXTS * 2
+        expected = [normalize_text(text, []) for text in texts]
+        assert normalize_parallel(texts, workers=2, executor="thread") == expected
+        (per_item, remaining, workers), = calls
+        assert per_item > 0
+        assert (remaining, workers) == (len(texts) - parallel.SAMPLE_SIZE, 2)
+
+
+class TestAsyncNormalization:
+    """Test the asyncio interface."""
+    
+    def setup_method(self):
+        """Clear unknown variants before each test."""
+        clear_unknown_variants()
+    
+    def test_anormalize_text(self):
+        """Test that async results match normalize_text, with unknowns per call."""
+        text = "الي يقول هاذا الكلام گتير"
+        normalized, unknowns = asyncio.run(anormalize_text(text))
+        assert normalized == normalize_text(text, [])
+        assert unknowns == ["يقول", "گتير"]
+        assert unknown_variants == []
+    
+    def test_anormalize_text_chunked(self):
+        """Test that chunking large texts does not change the output."""
+        text = "هاذا  گتاب\nقلم\t" * 50 + "   "
+        normalized, unknowns = asyncio.run(anormalize_text(text, chunk_chars=16))
+        assert normalized == normalize_text(text, [])
+        assert unknowns == ["گتاب", "قلم"]
+    
+    def test_anormalize_batch(self):
+        """Test batched async normalization preserves order."""
+        texts = ["هاذا گتاب", "", "قلم"] * 5
+        results, unknowns = asyncio.run(anormalize_batch(texts, batch_size=4))
+        assert results == [normalize_text(text, []) for text in texts]
+        assert unknowns == [["گتاب"], [], ["قلم"]] * 5
+    
+    def test_anormalize_lines(self):
+        """Test streaming normalization over an async iterator."""
+        lines = ["هاذا گتاب", "Hello الي", "قلم"] * 3
+        
+        async def source():
+            for line in lines:
+                yield line
+        
+        async def collect():
+            return [item async for item in anormalize_lines(source(), batch_size=2)]
+        
+        results = asyncio.run(collect())
+        assert [text for text, _ in results] == [normalize_text(line, []) for line in lines]
+        assert [found for _, found in results] == [["گتاب"], [], ["قلم"]] * 3
+
+
+class TestMorphology:
+    """Test clitic-aware variant and exception lookups."""
+    
+    def setup_method(self):
+        """Enable morphology for each test."""
+        clear_unknown_variants()
+        set_morphology(True)
+    
+    def teardown_method(self):
+        """Restore the default setting."""
+        set_morphology(False)
+    
+    def test_splits_prefer_fewest_stripped_characters(self):
+        """Test trie-based analyses and their order."""
+        analyses = list(splits("وبالكتابها"))
+        assert analyses[0] == ("و", "بالكتابها", "")
+        assert ("وبال", "كتاب", "ها") in analyses
+        assert all(len(stem) >= 3 for _, stem, _ in analyses)
+        assert ("لل", "مدرسة", "") in splits("للمدرسة")
+    
+    def test_variant_stem_with_affixes(self):
+        """Test that affixes are reattached to the canonical form."""
+        assert normalize_word("والي") == "واللي"
+        assert normalize_word("(بهاذا،") == "(بهذا،"
+        assert normalize_text("فرايك") == "فرأيك"
+        assert unknown_variants == []
+    
+    def test_exception_stem(self):
+        """Test that an exception stem protects inflected forms."""
+        assert normalize_word("بالقرآن") == "بالقرآن"
+        assert normalize_word("والقرانها") == "والقرانها"
+    
+    def test_disabled_by_default_and_exact_entries_first(self):
+        """Test that exact entries win and disabling restores whole-word matching."""
+        assert normalize_word("لي") == "اللي"
+        set_morphology(False)
+        assert normalize_word("والي") == "والي"
+        assert normalize_word("بالقرآن") == "بالكرآن"
+    
+    def test_engines_agree(self):
+        """Test that the batch and bulk engines honour morphology."""
+        texts = ["والي بالقرآن گتابكم", "فهاذا ولي وقلمها"]
+        expected = [normalize_text(text, []) for text in texts]
+        assert normalize_batch(texts, []) == expected
+        assert [normalize_text_bulk(text, []) for text in texts] == expected
+    
+    def test_compacted_exceptions_keep_behaviour(self):
+        """Test that compacted exceptions protect every removed form."""
+        exceptions = {"قران", "القران", "بالقرانكم", "قلبي"}
+        kept, removed = compact_exceptions(exceptions)
+        assert kept == ["قران", "قلبي"]
+        assert removed == {"القران": "قران", "بالقرانكم": "قران"}
+
+
+class TestDictionaryCompiler:
+    """Test validation and compilation of the variant data."""
+    
+    def test_chains_collapse_to_final_form(self):
+        """Test that every variant maps directly to the end of its chain."""
+        entries = [
+            {"canonical": "هذا", "variants": ["هاذا"]},
+            {"canonical": "هاذ", "variants": ["هاد"]},
+            {"canonical": "هاذا", "variants": ["هاذ"]},
+        ]
+        compiled, warnings = compile_variants(entries)
+        assert compiled == {"هاذا": "هذا", "هاذ": "هذا", "هاد": "هذا", "هذا": "هذا"}
+        assert warnings == []
+    
+    def test_canonical_forms_map_to_themselves(self):
+        """Test that canonical forms are served as is, never rewritten by the rules."""
+        compiled, warnings = compile_variants([{"canonical": "قال", "variants": ["گال"]}])
+        assert compiled["قال"] == "قال"
+        assert warnings == ["canonical 'قال' would be rewritten by the letter rules; kept as is"]
+        assert normalize_word("هذا") == "هذا"
+    
+    def test_conflicts_and_cycles_fail_fast(self):
+        """Test that ambiguous data raises DictionaryError listing every problem."""
+        entries = [
+            {"canonical": "اللي", "variants": ["الي"]},
+            {"canonical": "ألي", "variants": ["الي"]},
+            {"canonical": "أ", "variants": ["ب"]},
+            {"canonical": "ب", "variants": ["أ"]},
+        ]
+        with pytest.raises(DictionaryError) as error:
+            compile_variants(entries)
+        assert error.value.problems == [
+            "'الي' is a variant of both 'اللي' and 'ألي'",
+            "cycle: ب → أ → ب",
+        ]
+    
+    def test_warnings(self):
+        """Test overlaps with exceptions and unmatchable variants."""
+        entries = [{"canonical": "غير", "variants": ["قير", "قير.", "غير"]}]
+        compiled, warnings = compile_variants(entries, {"قير"}, '.')
+        assert compiled == {"قير": "غير", "قير.": "غير", "غير": "غير"}
+        assert warnings == [
+            "'قير' is both a variant and an exception word; the variant wins",
+            "'قير.' can never match a word",
+            "'غير' is listed as a variant of itself",
+        ]
+
+
+class TestDictionarySearch:
+    """Test the paginated dictionary search index."""
+    
+    @staticmethod
+    def make_index():
+        return LexiconIndex(
+            [{"canonical": "اللي", "variants": ["الي", "ألي"]}],
+            [{"separated": "في ما", "linked": "فيما"}],
+            ["القرآن", "قرآن", "الي"],
+        )
+    
+    def test_prefix_and_substring(self):
+        """Test matching across entry types, ordered by form then type."""
+        index = self.make_index()
+        page = index.search("ال")
+        assert [(r["form"], r["type"]) for r in page["results"]] == [
+            ("القرآن", "exception"),
+            ("اللي", "canonical"),
+            ("الي", "variant"),
+            ("الي", "exception"),
+        ]
+        assert page["next_cursor"] is None
+        assert [r["form"] for r in index.search("رآ", "substring")["results"]] == ["القرآن", "قرآن"]
+        assert [r["form"] for r in index.search("قرآن", "substring")["results"]] == ["القرآن", "قرآن"]
+        separations = index.search("فيم", types=["separation"])["results"]
+        assert separations == [{"type": "separation", "form": "فيما", "separated": "في ما", "linked": "فيما"}]
+    
+    def test_cursor_pagination(self):
+        """Test that pages chain without gaps or repeats."""
+        index = self.make_index()
+        everything = index.search(limit=100)["results"]
+        forms, cursor = [], None
+        while True:
+            page = index.search(limit=2, cursor=cursor)
+            forms += [(r["form"], r["type"]) for r in page["results"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert forms == [(r["form"], r["type"]) for r in everything]
+        assert len(forms) == 8
+    
+    def test_invalid_arguments(self):
+        """Test that bad parameters raise ValueError."""
+        index = self.make_index()
+        for kwargs in ({"mode": "regex"}, {"types": ["word"]}, {"limit": 0}, {"cursor": "x"}):
+            with pytest.raises(ValueError):
+                index.search("ال", **kwargs)
+    
+    def test_cache_rebuilds_on_change(self, tmp_path):
+        """Test that the cached index follows the data files."""
+        variants = tmp_path / "variants.jsonl"
+        variants.write_text('{"canonical": "هذا", "variants": ["هاذا"]}\n', encoding="utf-8")
+        cache = IndexCache(str(variants), str(tmp_path / "missing.jsonl"), str(tmp_path / "missing.json"))
+        assert cache.get().counts() == {"canonical": 1, "variant": 1, "separation": 0, "exception": 0}
+        assert cache.get() is cache.get()
+        variants.write_text('{"canonical": "هذا", "variants": ["هاذا", "هاذ"]}\n', encoding="utf-8")
+        assert cache.get().counts()["variant"] == 2
+
+
+class TestUnknownVariantSketch:
+    """Test the top-K unknown variant summary."""
+
+    def test_counts_are_bounded(self):
+        """Test capacity, error bounds and the frequent-item guarantee."""
+        stream = ["a"] * 50 + ["b"] * 30 + [f"rare{i}" for i in range(100)] + ["c"] * 20
+        summary = HeavyHitters(capacity=5)
+        summary.update(stream)
+        assert len(summary) == 5 and summary.total == len(stream)
+        for word, count, error in summary.top():
+            assert count - error <= stream.count(word) <= count
+        # Words seen more than total / capacity times are always kept
+        assert "a" in summary
+
+    def test_merge_and_persistence(self, tmp_path):
+        """Test merging summaries and trackers sharing a file."""
+        first, second = HeavyHitters(3), HeavyHitters(3)
+        first.update(["x", "x", "y", "z", "w"])
+        second.update(["x", "y", "y", "v"])
+        first.merge(second)
+        assert "x" in first and first.total == 9
+        for word, count, error in first.top():
+            assert count - error <= ["x", "x", "y", "z", "w", "x", "y", "y", "v"].count(word) <= count
+
+        path = tmp_path / "unknowns.json"
+        workers = [UnknownVariantTracker(path, capacity=10, interval=3600) for _ in range(2)]
+        workers[0].record(["قلب", "مدرسة"])
+        workers[1].record(["قلب"])
+        assert workers[0].snapshot().top(1)[0][:2] == ("قلب", 1)
+        for worker in workers:
+            worker.flush()
+        stored = HeavyHitters.load(path)
+        assert stored.top() == [("قلب", 2, 0), ("مدرسة", 1, 0)]
+        assert HeavyHitters.from_dict(stored.to_dict(), capacity=1).top() == [("قلب", 2, 0)]
+
+    def test_failed_periodic_flush_does_not_raise(self, tmp_path, caplog):
+        """Test that record() logs a failed merge and keeps the counts."""
+        path = tmp_path / "unknowns.json"
+        path.write_text("not json", encoding="utf-8")
+        tracker = UnknownVariantTracker(path, capacity=10, interval=0)
+        tracker.record(["قلب"])
+        tracker.record(["قلب", "مدرسة"])
+        assert "Could not merge" in caplog.text
+        with pytest.raises(ValueError):
+            tracker.flush()
+
+        path.unlink()
+        tracker.flush()
+        assert HeavyHitters.load(path).top() == [("قلب", 2, 0), ("مدرسة", 1, 0)]
+
+
+class TestProfiles:
+    """Test dictionary profiles layered on the base data."""
+
+    TEXT = "هاذا قلب قمر مدرسة"
+
+    def setup_method(self):
+        """Register a profile and one extending it."""
+        register_profile("north", {
+            "description": "Test profile",
+            "variants": [{"canonical": "كلب", "variants": ["قلب", "گلب"]}],
+            "remove_variants": ["هاذا"],
+        })
+        register_profile("north-city", {"extends": "north", "remove_exceptions": ["قمر"]})
+
+    def teardown_method(self):
+        """Remove the test profiles."""
+        for name in ("north", "north-city", "loop-a", "loop-b", "conflict"):
+            unregister_profile(name)
+
+    def test_overlay_changes(self):
+        """Test added, removed and inherited entries without touching the base."""
+        base = normalize_text(self.TEXT, [])
+        assert base == "هذا كلب قمر مدرسه"
+        assert normalize_text(self.TEXT, [], profile="north") == "هاذا كلب قمر مدرسه"
+        assert normalize_text(self.TEXT, [], profile="north-city") == "هاذا كلب كمر مدرسه"
+        assert normalize_text(self.TEXT, []) == base
+
+        stats = get_profile("north").stats()
+        assert stats["added_variants"] == 3 and stats["removed_variants"] == 1
+
+    def test_engines_follow_profile(self):
+        """Test that every engine uses the selected profile."""
+        with use_profile("north-city"):
+            expected = normalize_text(self.TEXT, [])
+            assert normalize_batch([self.TEXT], []) == [expected]
+            assert normalize_text_bulk(self.TEXT, []) == expected
+            assert normalize_parallel([self.TEXT] * 40, workers=2, unknowns=[], executor="thread") == [expected] * 40
+            results, _ = asyncio.run(anormalize_batch([self.TEXT]))
+            assert results == [expected]
+        assert normalize_text(self.TEXT, []) != expected
+
+    def test_invalid_profiles(self):
+        """Test unknown, cyclic and conflicting profiles."""
+        with pytest.raises(ValueError):
+            normalize_text(self.TEXT, profile="missing")
+        register_profile("loop-a", {"extends": "loop-b"})
+        register_profile("loop-b", {"extends": "loop-a"})
+        with pytest.raises(ValueError):
+            get_profile("loop-a")
+        register_profile("conflict", {"variants": [
+            {"canonical": "كلب", "variants": ["قلب"]},
+            {"canonical": "قلب", "variants": ["كلب"]},
+        ]})
+        with pytest.raises(DictionaryError):
+            get_profile("conflict")
+
+
+class TestPrefilter:
+    """Test the fast path for texts normalization cannot change."""
+
+    TEXTS = ["السلام   عليكم يا خوي", "هاذا، زين", "(هاذا)", "زين قلب", "...", "مدرسة كبيرة", "ابل"]
+
+    def setup_method(self):
+        """Start from empty counters."""
+        reset_prefilter_stats()
+
+    def teardown_method(self):
+        """Restore the defaults."""
+        set_prefilter(True)
+        set_morphology(False)
+        unregister_profile("no-hatha")
+
+    def test_same_output_as_full_path(self):
+        """Test that every engine gives the same result with and without the fast path."""
+        expected = [normalize_text(text, []) for text in self.TEXTS]
+        set_prefilter(False)
+        assert [normalize_text(text, []) for text in self.TEXTS] == expected
+        set_prefilter(True)
+        assert normalize_batch(self.TEXTS, []) == expected
+        assert [normalize_text_bulk(text, []) for text in self.TEXTS] == expected
+        assert expected[0] == "السلام عليكم يا خوي"
+
+    def test_skip_stats(self):
+        """Test that only texts without rule characters or variants are skipped."""
+        normalize_batch(self.TEXTS, [])
+        stats = prefilter_stats()
+        assert stats["texts"] == len(self.TEXTS)
+        assert stats["texts_skipped"] == 3
+        assert stats["tokens_skipped"] == 6
+        assert stats["skip_rate"] == pytest.approx(6 / stats["tokens"])
+        reset_prefilter_stats()
+        assert prefilter_stats()["skip_rate"] == 0.0
+
+    def test_profile_and_morphology(self):
+        """Test the filter follows the active profile and is off with morphology."""
+        register_profile("no-hatha", {"remove_variants": ["هاذا"]})
+        assert passes("هاذا زين", ["هاذا", "زين"], load_variants()) is False
+        with use_profile("no-hatha"):
+            assert passes("هاذا زين", ["هاذا", "زين"], load_variants()) is True
+        set_morphology(True)
+        assert passes("زين", ["زين"], load_variants()) is False
+
+    def test_filter_keys(self):
+        """Test that only variants mapping to another word are kept."""
+        keys = variant_filter({"هاذا": "هذا", "هذا": "هذا"})
+        assert keys == frozenset({"هاذا"})
+
+
+class TestTracing:
+    """Test per-token decision tracing."""
+
+    def teardown_method(self):
+        """Restore the defaults."""
+        set_morphology(False)
+
+    def test_decisions(self):
+        """Test one event per token explaining its output."""
+        with trace() as events:
+            result = normalize_text("هاذا، قلم القرآن مدرسة زين ...", [])
+        assert result == "هذا، كلم القرآن مدرسه زين ..."
+        assert [(event['word'], event['decision']) for event in events] == [
+            ("هاذا", "variant"), ("قلم", "rules"), ("القرآن", "exception"),
+            ("مدرسة", "rules"), ("زين", "unchanged"), ("", "unchanged"),
+        ]
+        assert events[0]['canonical'] == "هذا" and events[0]['output'] == "هذا،"
+        assert events[1]['rules'] == ["gaf_qaf"] and events[3]['rules'] == ["final_taa"]
+
+    def test_engines_and_filter(self):
+        """Test tracing through every engine, with stems and a word filter."""
+        set_morphology(True)
+        texts = ["والي بالقرآن", "هذا قلم"]
+        expected = normalize_batch(texts, [])
+        with trace(words=["والي", "بالقرآن", "قلم"]) as events:
+            assert normalize_batch(texts, []) == expected
+            assert [normalize_text_bulk(text, []) for text in texts] == expected
+            assert normalize_parallel(texts, workers=2, unknowns=[], executor="thread") == expected
+        assert [event['decision'] for event in events[:3]] == ["stem", "exception", "rules"]
+        assert events[0]['stem'] == "الي" and events[1]['exception'] == "القرآن"
+        assert [event['text'] for event in events[:3]] == [0, 0, 1]
+        assert len(events) == 9
+
+    def test_async_and_hooks(self):
+        """Test that async jobs see the caller's tracer and hooks see everything."""
+        with trace() as events:
+            asyncio.run(anormalize_text("قلم"))
+        assert [event['word'] for event in events] == ["قلم"]
+
+        seen = []
+        add_hook(seen.append)
+        try:
+            normalize_word("قلم")
+        finally:
+            remove_hook(seen.append)
+        normalize_word("قلم")
+        assert len(seen) == 1 and seen[0]['decision'] == "rules"
+
+
 class TestExceptionHandling:
     """Test exception word handling for letter rules."""
     
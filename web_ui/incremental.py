@@ -0,0 +1,136 @@
+"""Per-session paragraph cache for incremental live normalization.
+
+The web editor splits its text into paragraphs (lines) and identifies each by
+a hash computed in the browser. A request lists the hashes of the whole
+document in order, the text of paragraphs the server has not seen yet
+(``texts``) and the hashes whose results the client still needs (``want``).
+Only new paragraphs are normalized, in one batch; everything else is served
+from the session's cache, so payload size and CPU time follow the edit rather
+than the document.
+
+Each session keeps at most ``max_paragraphs`` paragraphs (least recently used
+are evicted) and the cache is dropped when the dictionary version changes.
+Hashes the server no longer has are returned as ``missing`` and the client
+resends their text.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+# Session and paragraph limits
+MAX_SESSIONS = 64
+MAX_PARAGRAPHS = 4096
+
+# Normalizes a list of paragraph texts, returning one result dict each
+# (``normalized_text`` and ``unknown_variants``)
+BatchNormalize = Callable[[List[str]], List[Dict[str, Any]]]
+
+# Returns the diff HTML of (original, normalized)
+Differ = Callable[[str, str], str]
+
+
+class _Session:
+    """Paragraph cache of one editor session."""
+
+    def __init__(self, version: str):
+        self.version = version
+        self.paragraphs: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+
+
+class SessionCache:
+    """Bounded, thread-safe paragraph caches for editor sessions.
+
+    Args:
+        max_sessions: Sessions kept; the least recently used is dropped.
+        max_paragraphs: Paragraphs kept per session.
+    """
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, max_paragraphs: int = MAX_PARAGRAPHS):
+        self.max_sessions = max_sessions
+        self.max_paragraphs = max_paragraphs
+        self._sessions: 'OrderedDict[str, _Session]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _session(self, session_id: str, version: str) -> _Session:
+        session = self._sessions.get(session_id)
+        if session is None or session.version != version:
+            session = _Session(version)
+            self._sessions[session_id] = session
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return session
+
+    def update(
+        self,
+        session_id: str,
+        version: str,
+        hashes: List[str],
+        texts: Dict[str, str],
+        want: List[str],
+        normalize: BatchNormalize,
+        diff: Optional[Differ] = None,
+    ) -> Dict[str, Any]:
+        """Normalize new paragraphs and return the results the client needs.
+
+        Args:
+            session_id: Editor session identifier.
+            version: Dictionary version; a new version empties the cache.
+            hashes: Hashes of every paragraph of the document, in order.
+            texts: Text of the paragraphs the client has not sent before.
+            want: Hashes whose results the client needs without resending.
+            normalize: Batch normalization of paragraph texts.
+            diff: Optional function adding ``diff_html`` to returned results.
+
+        Returns:
+            Dict with the dictionary ``version``, ``results`` (hash → result
+            for ``texts`` and ``want``), ``missing`` (wanted or listed hashes
+            the server does not have) and the document's ``unknown_variants``
+            in order of first appearance.
+        """
+        with self._lock:
+            session = self._session(session_id, version)
+            new = [h for h in dict.fromkeys(texts) if h not in session.paragraphs]
+
+        # Normalize outside the lock so that sessions do not wait for each other
+        batch = normalize([texts[h] for h in new]) if new else []
+
+        with self._lock:
+            cached = session.paragraphs
+            for h, result in zip(new, batch):
+                cached[h] = {'text': texts[h], **result}
+
+            results: Dict[str, Dict[str, Any]] = {}
+            missing: List[str] = []
+            for h in list(texts) + list(want):
+                entry = cached.get(h)
+                if entry is None:
+                    missing.append(h)
+                    continue
+                if diff is not None and 'diff_html' not in entry:
+                    entry['diff_html'] = diff(entry['text'], entry['normalized_text'])
+                result = {'normalized_text': entry['normalized_text'], 'unknown_variants': entry['unknown_variants']}
+                if diff is not None:
+                    result['diff_html'] = entry['diff_html']
+                results[h] = result
+
+            unknowns: Dict[str, None] = {}
+            for h in hashes:
+                entry = cached.get(h)
+                if entry is None:
+                    if h not in results:
+                        missing.append(h)
+                    continue
+                cached.move_to_end(h)
+                unknowns.update(dict.fromkeys(entry['unknown_variants']))
+
+            while len(cached) > self.max_paragraphs:
+                cached.popitem(last=False)
+
+        return {
+            'version': version,
+            'results': results,
+            'missing': list(dict.fromkeys(missing)),
+            'unknown_variants': list(unknowns),
+        }
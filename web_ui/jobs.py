@@ -0,0 +1,292 @@
+"""Background normalization jobs for large documents.
+
+A submitted document is spooled to ``<spool>/<job id>/input.txt`` and
+queued on a bounded pool of worker threads. A worker normalizes it in chunks
+of lines with one ``normalize_batch`` call each, appending every chunk to
+``output.txt`` and updating the job's progress, so clients can poll the
+status, stream progress events and read the output written so far while the
+job runs. Line breaks are preserved.
+
+Each manager spools to a directory of its own, created under the spool root,
+so several server processes can share the root. Finished jobs (and their
+spool directories) are removed ``ttl`` seconds after they end, and the
+manager's directory is removed on shutdown; nothing is kept across server
+restarts.
+"""
+
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional
+
+# Worker threads, pending job limit, lines per chunk and result lifetime
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_PENDING = 32
+DEFAULT_CHUNK_LINES = 500
+DEFAULT_TTL = 3600
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+
+# Normalizes a list of lines, appending one list of unknown variants per line
+BatchNormalize = Callable[[List[str], List[List[str]]], List[str]]
+
+
+class QueueFullError(RuntimeError):
+    """Raised when too many jobs are queued or running."""
+
+
+class Job:
+    """State of one normalization job."""
+
+    def __init__(self, job_id: str, directory: Path, name: str, total_bytes: int):
+        self.id = job_id
+        self.directory = directory
+        self.name = name
+        self.status = QUEUED
+        self.total_bytes = total_bytes
+        self.processed_bytes = 0
+        self.lines = 0
+        self.output_bytes = 0
+        self.unknown_variants: Dict[str, None] = {}
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.cancel_requested = False
+        # Overrides the manager's normalization function for this job
+        self.normalize: Optional[BatchNormalize] = None
+
+    @property
+    def input_path(self) -> Path:
+        return self.directory / 'input.txt'
+
+    @property
+    def output_path(self) -> Path:
+        return self.directory / 'output.txt'
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the job status as a JSON-serializable dict."""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'status': self.status,
+            'progress': (
+                round(self.processed_bytes / self.total_bytes, 4) if self.total_bytes
+                else float(self.status == DONE)
+            ),
+            'processed_bytes': self.processed_bytes,
+            'total_bytes': self.total_bytes,
+            'lines': self.lines,
+            'output_bytes': self.output_bytes,
+            'unknown_variant_count': len(self.unknown_variants),
+            'error': self.error,
+            'created': self.created,
+            'finished': self.finished,
+        }
+
+
+class JobManager:
+    """Queue, run and expire normalization jobs.
+
+    Args:
+        spool_root: Directory in which the manager creates its spool
+            directory (default: the system temporary directory).
+        normalize: Batch normalization function (``normalize_batch``).
+        workers: Jobs processed at the same time.
+        max_pending: Jobs queued or running before submissions are refused.
+        chunk_lines: Lines normalized per batch call.
+        ttl: Seconds a finished job is kept.
+    """
+
+    def __init__(
+        self,
+        spool_root: Optional[Path],
+        normalize: BatchNormalize,
+        workers: int = DEFAULT_WORKERS,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        chunk_lines: int = DEFAULT_CHUNK_LINES,
+        ttl: float = DEFAULT_TTL,
+    ):
+        if spool_root is not None:
+            Path(spool_root).mkdir(parents=True, exist_ok=True)
+        # Only this manager's directory is ever cleaned up
+        self.spool_dir = Path(tempfile.mkdtemp(prefix='hassaniya-jobs-', dir=spool_root))
+        self.normalize = normalize
+        self.max_pending = max_pending
+        self.chunk_lines = chunk_lines
+        self.ttl = ttl
+        self._jobs: Dict[str, Job] = {}
+        self._changed = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hassaniya-job')
+
+    def submit(self, source: BinaryIO, name: str = 'document.txt',
+               normalize: Optional[BatchNormalize] = None) -> Job:
+        """Spool a UTF-8 document and queue it.
+
+        Args:
+            source: Binary file object with the document.
+            name: Name reported in the status and used for the download.
+            normalize: Normalization function for this job only (default:
+                the manager's).
+
+        Returns:
+            The queued job.
+
+        Raises:
+            QueueFullError: If ``max_pending`` jobs are queued or running.
+        """
+        self.purge_expired()
+        with self._changed:
+            pending = sum(1 for job in self._jobs.values() if job.status not in FINISHED)
+            if pending >= self.max_pending:
+                raise QueueFullError(f"Too many jobs in progress ({pending}); try again later")
+            job_id = uuid.uuid4().hex
+            directory = self.spool_dir / job_id
+            directory.mkdir()
+            job = Job(job_id, directory, name, 0)
+            job.normalize = normalize
+            self._jobs[job_id] = job
+
+        with open(job.input_path, 'wb') as f:
+            shutil.copyfileobj(source, f)
+        job.total_bytes = job.input_path.stat().st_size
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job, or None if it is unknown or expired."""
+        self.purge_expired()
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job and delete its files.
+
+        Returns:
+            False if the job is unknown or expired.
+        """
+        with self._changed:
+            job = self._jobs.pop(job_id, None)
+            if job is None:
+                return False
+            job.cancel_requested = True
+            if job.status not in FINISHED:
+                self._finish(job, CANCELLED)
+        shutil.rmtree(job.directory, ignore_errors=True)
+        return True
+
+    def read_output(self, job: Job, offset: int = 0, limit: int = 1 << 20) -> bytes:
+        """Return output written so far, from byte ``offset``.
+
+        At most ``limit`` bytes are returned, ending at a line break when
+        more output follows.
+        """
+        end = min(job.output_bytes, offset + limit)
+        if offset >= end:
+            return b''
+        with open(job.output_path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(end - offset)
+        if end < job.output_bytes:
+            if b'\n' in data:
+                data = data[:data.rindex(b'\n') + 1]
+            else:
+                # Never split a UTF-8 character
+                data = data.decode('utf-8', 'ignore').encode('utf-8')
+        return data
+
+    def unknown_variants(self, job: Job) -> List[str]:
+        """Return the unknown variants found so far, in order of appearance."""
+        with self._changed:
+            return list(job.unknown_variants)
+
+    def events(self, job: Job, timeout: float = 15.0) -> Iterator[Dict[str, Any]]:
+        """Yield the job status whenever it changes, until the job finishes.
+
+        A status is also yielded every ``timeout`` seconds without changes,
+        which keeps idle connections alive.
+        """
+        last = None
+        while True:
+            with self._changed:
+                status = job.to_dict()
+                if status == last:
+                    self._changed.wait(timeout)
+                    status = job.to_dict()
+            last = status
+            yield status
+            if status['status'] in FINISHED:
+                return
+
+    def purge_expired(self) -> None:
+        """Delete jobs that finished more than ``ttl`` seconds ago."""
+        now = time.time()
+        with self._changed:
+            expired = [
+                job for job in self._jobs.values()
+                if job.finished is not None and now - job.finished > self.ttl
+            ]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            shutil.rmtree(job.directory, ignore_errors=True)
+
+    def shutdown(self) -> None:
+        """Stop the workers after the running jobs and delete the spool directory."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None) -> None:
+        job.status = status
+        job.error = error
+        job.finished = time.time()
+        self._changed.notify_all()
+
+    def _run(self, job: Job) -> None:
+        """Normalize a job chunk by chunk."""
+        with self._changed:
+            if job.cancel_requested:
+                return
+            job.status = RUNNING
+            self._changed.notify_all()
+        normalize = job.normalize or self.normalize
+        try:
+            with open(job.input_path, 'rb') as source, open(job.output_path, 'wb') as output:
+                while not job.cancel_requested:
+                    raw = [line for _, line in zip(range(self.chunk_lines), source)]
+                    if not raw:
+                        break
+                    lines = [line.decode('utf-8').rstrip('\r\n') for line in raw]
+                    unknowns: List[List[str]] = []
+                    normalized = normalize(lines, unknowns)
+                    data = ''.join(
+                        text + ('\n' if line.endswith(b'\n') else '')
+                        for text, line in zip(normalized, raw)
+                    ).encode('utf-8')
+                    output.write(data)
+                    output.flush()
+                    with self._changed:
+                        job.processed_bytes += sum(len(line) for line in raw)
+                        job.lines += len(raw)
+                        job.output_bytes += len(data)
+                        for variants in unknowns:
+                            job.unknown_variants.update(dict.fromkeys(variants))
+                        self._changed.notify_all()
+        except Exception as e:
+            # Cancelling deletes the files under a running job
+            with self._changed:
+                if not job.cancel_requested:
+                    self._finish(job, FAILED, str(e))
+            return
+
+        with self._changed:
+            if not job.cancel_requested:
+                self._finish(job, DONE)
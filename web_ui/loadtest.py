@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+Load-test harness for the Hassaniya Text Normalizer web API.
+
+Starts the server locally (or targets a running one with --url), replays a
+weighted mix of normalize, batch and add-variant requests at a fixed
+concurrency or a target request rate, and reports throughput, latency
+percentiles and error rates as JSON.
+
+Usage:
+    python web_ui/loadtest.py --concurrency 8 --duration 10
+    python web_ui/loadtest.py --rate 50 --mix normalize=8,batch=1,add-variant=1
+    python web_ui/loadtest.py --env HASSANIYA_RELOAD_DATA=change --label cached -o cached.json
+    python web_ui/loadtest.py --compare default.json cached.json
+
+In rate mode, latency is measured from each request's scheduled start, so
+time spent queueing behind a slow server counts against it.
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import os
+import random
+import shlex
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+ROOT_DIR = Path(__file__).parent.parent
+SERVER_SCRIPT = Path(__file__).parent / 'server.py'
+DEFAULT_CORPUS = ROOT_DIR / 'demo_input.txt'
+
+ENDPOINTS = {
+    'normalize': '/api/normalize',
+    'batch': '/api/normalize-batch',
+    'add-variant': '/api/add-variant',
+}
+DEFAULT_MIX = 'normalize=8,batch=1,add-variant=1'
+
+# Error responses kept in the report, per endpoint
+MAX_ERROR_SAMPLES = 5
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    """Parse a request mix such as ``normalize=8,batch=1``.
+
+    Raises:
+        ValueError: If a kind is unknown or a weight is not a positive integer.
+    """
+    mix = {}
+    for item in spec.split(','):
+        kind, _, weight = item.strip().partition('=')
+        if kind not in ENDPOINTS:
+            raise ValueError(f"Unknown request kind '{kind}' (expected one of {', '.join(ENDPOINTS)})")
+        try:
+            mix[kind] = int(weight or 1)
+        except ValueError:
+            raise ValueError(f"Invalid weight for '{kind}': {weight}") from None
+        if mix[kind] < 1:
+            raise ValueError(f"Weight for '{kind}' must be positive")
+    return mix
+
+
+def load_corpus(path: Path) -> List[str]:
+    """Load the non-empty lines of a text file used as request payloads."""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = [line.strip() for line in f if line.strip()]
+    if not lines:
+        raise ValueError(f"Corpus '{path}' is empty")
+    return lines
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Return the ``p``-th percentile of sorted values (linear interpolation)."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    """Summarize latencies in seconds as milliseconds."""
+    values = sorted(latencies)
+    if not values:
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'mean': 0.0, 'max': 0.0}
+    return {
+        'p50': round(percentile(values, 50) * 1000, 2),
+        'p95': round(percentile(values, 95) * 1000, 2),
+        'p99': round(percentile(values, 99) * 1000, 2),
+        'mean': round(sum(values) / len(values) * 1000, 2),
+        'max': round(values[-1] * 1000, 2),
+    }
+
+
+class RequestFactory:
+    """Build request payloads following a weighted mix.
+
+    Args:
+        mix: Request kind to relative weight.
+        corpus: Texts sampled for normalize and batch requests.
+        batch_size: Number of texts per batch request.
+        seed: Seed of the random generator.
+    """
+
+    def __init__(self, mix: Dict[str, int], corpus: List[str], batch_size: int = 16, seed: int = 0):
+        self.kinds = list(mix)
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.corpus = corpus
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        # Unique words for add-variant, distinct between runs
+        self.run_id = f"{int(time.time()):x}{os.getpid():x}"
+        self.counter = itertools.count()
+
+    def next(self) -> Tuple[str, str, bytes]:
+        """Return (kind, path, JSON body) of the next request."""
+        with self.lock:
+            kind = self.random.choices(self.kinds, self.weights)[0]
+            if kind == 'normalize':
+                payload = {'text': self.random.choice(self.corpus)}
+            elif kind == 'batch':
+                payload = {'texts': self.random.choices(self.corpus, k=self.batch_size)}
+            else:
+                canonical = f"loadtest{self.run_id}x{next(self.counter)}"
+                payload = {'canonical': canonical, 'variants': [canonical + 'v']}
+        return kind, ENDPOINTS[kind], json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+
+class Recorder:
+    """Thread-safe collection of request outcomes."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.samples: Dict[str, List[str]] = {}
+
+    def record(self, kind: str, latency: float, error: Optional[str] = None) -> None:
+        with self.lock:
+            self.latencies.setdefault(kind, []).append(latency)
+            if error is not None:
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+                samples = self.samples.setdefault(kind, [])
+                if len(samples) < MAX_ERROR_SAMPLES:
+                    samples.append(error)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        """Build the report for a run that took ``elapsed`` seconds."""
+        all_latencies = [latency for values in self.latencies.values() for latency in values]
+        requests = len(all_latencies)
+        errors = sum(self.errors.values())
+        report: Dict[str, Any] = {
+            'requests': requests,
+            'errors': errors,
+            'error_rate': round(errors / requests, 4) if requests else 0.0,
+            'seconds': round(elapsed, 3),
+            'throughput': round(requests / elapsed, 1) if elapsed else 0.0,
+            'latency_ms': latency_summary(all_latencies),
+            'endpoints': {},
+        }
+        for kind, values in sorted(self.latencies.items()):
+            kind_errors = self.errors.get(kind, 0)
+            report['endpoints'][kind] = {
+                'requests': len(values),
+                'errors': kind_errors,
+                'error_rate': round(kind_errors / len(values), 4),
+                'latency_ms': latency_summary(values),
+                'error_samples': self.samples.get(kind, []),
+            }
+        return report
+
+
+def send(connection: http.client.HTTPConnection, path: str, body: bytes) -> Optional[str]:
+    """Send one POST request, returning an error description or None."""
+    connection.request('POST', path, body, {'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    payload = response.read()
+    if response.status >= 400:
+        return f"HTTP {response.status}: {payload[:200].decode('utf-8', 'replace')}"
+    return None
+
+
+def run_load(
+    url: str,
+    factory: RequestFactory,
+    concurrency: int = 8,
+    rate: Optional[float] = None,
+    duration: float = 10.0,
+    max_requests: Optional[int] = None,
+    timeout: float = 30.0,
+) -> Dict[str, Any]:
+    """Replay requests against a running server.
+
+    Args:
+        url: Base URL of the server.
+        factory: Source of request payloads.
+        concurrency: Number of client threads (connections).
+        rate: Target requests per second; if omitted, each thread sends its
+            next request as soon as the previous one completes.
+        duration: Maximum run time in seconds.
+        max_requests: Optional total number of requests to send.
+        timeout: Socket timeout per request.
+
+    Returns:
+        Report with request and error counts, throughput and latencies.
+    """
+    parts = urlsplit(url)
+    host, port = parts.hostname or 'localhost', parts.port or 80
+    recorder = Recorder()
+    counter = itertools.count()
+    counter_lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = start + duration
+
+    def next_slot() -> Optional[float]:
+        """Claim the next request, returning its scheduled start or None."""
+        with counter_lock:
+            index = next(counter)
+        if max_requests is not None and index >= max_requests:
+            return None
+        scheduled = start + index / rate if rate else time.perf_counter()
+        return scheduled if scheduled < deadline else None
+
+    def worker() -> None:
+        connection = http.client.HTTPConnection(host, port, timeout=timeout)
+        while True:
+            scheduled = next_slot()
+            if scheduled is None:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            kind, path, body = factory.next()
+            try:
+                error = send(connection, path, body)
+            except (OSError, http.client.HTTPException) as e:
+                error = f"{type(e).__name__}: {e}"
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=timeout)
+            recorder.record(kind, time.perf_counter() - scheduled, error)
+        connection.close()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    report = recorder.report(time.perf_counter() - start)
+    report['url'] = url
+    report['concurrency'] = concurrency
+    report['target_rate'] = rate
+    return report
+
+
+def free_port() -> int:
+    """Return a TCP port that is currently free on localhost."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    """Wait until the server accepts connections.
+
+    Raises:
+        RuntimeError: If the server exits or does not start in time.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server did not start within {timeout:.0f}s")
+
+
+def start_server(command: Optional[str], env: Dict[str, str], port: int, data_dir: Path) -> subprocess.Popen:
+    """Start the server on ``port`` with its data files copied to ``data_dir``.
+
+    Args:
+        command: Server command with a ``{port}`` placeholder; defaults to
+            ``server.py`` with the Flask debugger off.
+        env: Extra environment variables.
+        port: Port to listen on.
+        data_dir: Scratch data directory, so add-variant requests do not
+            modify the real data files. The server log is written next to it.
+
+    Raises:
+        RuntimeError: If the server does not start; the message ends with
+            the last lines of its log.
+    """
+    shutil.copytree(ROOT_DIR / 'data', data_dir)
+    server_env = dict(os.environ)
+    server_env.update({
+        'HASSANIYA_PORT': str(port),
+        'HASSANIYA_DEBUG': '0',
+        'HASSANIYA_DATA_DIR': str(data_dir),
+        'PYTHONPATH': os.pathsep.join(filter(None, [str(ROOT_DIR), os.environ.get('PYTHONPATH')])),
+    })
+    server_env.update(env)
+    args = shlex.split(command.format(port=port)) if command else [sys.executable, str(SERVER_SCRIPT)]
+    log_path = data_dir.parent / 'server.log'
+    with open(log_path, 'wb') as log:
+        process = subprocess.Popen(args, cwd=str(ROOT_DIR), env=server_env,
+                                   stdout=subprocess.DEVNULL, stderr=log)
+    try:
+        wait_for_port(port, process)
+    except RuntimeError as e:
+        stop_server(process)
+        output = log_path.read_text(encoding='utf-8', errors='replace').strip().splitlines()
+        raise RuntimeError('\n'.join([str(e)] + output[-5:])) from None
+    return process
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    """Terminate a server started with ``start_server``."""
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def format_comparison(reports: List[Dict[str, Any]]) -> str:
+    """Render several reports side by side."""
+    rows = [
+        ('throughput (req/s)', lambda r: r['throughput']),
+        ('p50 (ms)', lambda r: r['latency_ms']['p50']),
+        ('p95 (ms)', lambda r: r['latency_ms']['p95']),
+        ('p99 (ms)', lambda r: r['latency_ms']['p99']),
+        ('error rate', lambda r: r['error_rate']),
+        ('requests', lambda r: r['requests']),
+    ]
+    labels = [report.get('label') or f"run {i + 1}" for i, report in enumerate(reports)]
+    width = max(12, *(len(label) for label in labels))
+    lines = [f"{'':<20}" + ''.join(f"{label:>{width + 2}}" for label in labels)]
+    for name, value in rows:
+        lines.append(f"{name:<20}" + ''.join(f"{value(report):>{width + 2}}" for report in reports))
+    return '\n'.join(lines)
+
+
+def main():
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(
+        description='Load-test the Hassaniya normalizer web API.'
+    )
+    parser.add_argument('--url', help='Target a running server instead of starting one')
+    parser.add_argument(
+        '--server-cmd',
+        help="Command starting the server, with a {port} placeholder "
+             "(e.g. 'gunicorn -w 4 -b 127.0.0.1:{port} web_ui.server:app')"
+    )
+    parser.add_argument(
+        '--env',
+        action='append',
+        default=[],
+        metavar='KEY=VALUE',
+        help='Environment variable for the started server (can be repeated)'
+    )
+    parser.add_argument('--concurrency', type=int, default=8, help='Client threads (default: 8)')
+    parser.add_argument('--rate', type=float, help='Target requests per second (default: as fast as possible)')
+    parser.add_argument('--duration', type=float, default=10.0, help='Run time in seconds (default: 10)')
+    parser.add_argument('--requests', type=int, help='Stop after this many requests')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Weighted request mix (default: {DEFAULT_MIX})')
+    parser.add_argument('--corpus', default=str(DEFAULT_CORPUS), help='Text file whose lines are sent')
+    parser.add_argument('--batch-size', type=int, default=16, help='Texts per batch request (default: 16)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the request mix')
+    parser.add_argument('--label', help='Name of this run in the report')
+    parser.add_argument('-o', '--output', help='Write the JSON report to this file')
+    parser.add_argument('--compare', nargs='+', metavar='REPORT', help='Compare saved reports and exit')
+    args = parser.parse_args()
+
+    if args.compare:
+        reports = []
+        for path in args.compare:
+            with open(path, 'r', encoding='utf-8') as f:
+                reports.append(json.load(f))
+        print(format_comparison(reports))
+        return
+
+    try:
+        mix = parse_mix(args.mix)
+        corpus = load_corpus(Path(args.corpus))
+        env = dict(item.split('=', 1) for item in args.env)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.concurrency < 1 or args.duration <= 0 or (args.rate is not None and args.rate <= 0):
+        print("Error: --concurrency, --duration and --rate must be positive.", file=sys.stderr)
+        sys.exit(1)
+
+    factory = RequestFactory(mix, corpus, args.batch_size, args.seed)
+    process = None
+    scratch = None
+    try:
+        if args.url:
+            url = args.url
+            if 'add-variant' in mix:
+                print("Warning: add-variant requests will modify the server's data files.", file=sys.stderr)
+        else:
+            scratch = tempfile.mkdtemp(prefix='hassaniya-loadtest-')
+            port = free_port()
+            process = start_server(args.server_cmd, env, port, Path(scratch) / 'data')
+            url = f"http://127.0.0.1:{port}"
+
+        report = run_load(url, factory, args.concurrency, args.rate, args.duration, args.requests)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if process is not None:
+            stop_server(process)
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    report['label'] = args.label
+    report['mix'] = mix
+    report['server'] = {'command': args.server_cmd, 'env': env} if not args.url else None
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -43,8 +43,20 @@ function updateStatus(elementId, message, type = 'info') {
     }
 }
 
+// Utility function to escape text for insertion as HTML
+function escapeHtml(text) {
+    const element = document.createElement('div');
+    element.textContent = text;
+    return element.innerHTML;
+}
+
 // Text normalization functionality
 async function normalizeText() {
+    if (document.getElementById('live-normalize').checked) {
+        clearTimeout(liveTimer);
+        return liveNormalize();
+    }
+    
     const inputText = document.getElementById('input-text').value.trim();
     const showDiff = document.getElementById('show-diff').checked;
     const outputElement = document.getElementById('output-text');
@@ -66,7 +78,8 @@ async function normalizeText() {
             },
             body: JSON.stringify({
                 text: inputText,
-                show_diff: showDiff
+                show_diff: showDiff,
+                profile: selectedProfile()
             })
         });
         
@@ -99,6 +112,228 @@ async function normalizeText() {
     }
 }
 
+// Incremental live normalization: only paragraphs (lines) the server has not
+// seen are sent; the rest are identified by their hash
+const LIVE_DELAY_MS = 400;
+const LIVE_MAX_RESULTS = 8192;
+const liveSession = Math.random().toString(36).slice(2) + Date.now().toString(36);
+let liveVersion = null;
+let liveResults = new Map();  // hash -> result of the current dictionary version
+let liveSent = new Set();     // hashes whose text the server has
+let liveShowDiff = false;
+let liveTimer = null;
+let liveRequest = 0;
+
+// 53-bit string hash (cyrb53), prefixed with the length
+function hashParagraph(str) {
+    let h1 = 0xdeadbeef, h2 = 0x41c6ce57;
+    for (let i = 0; i < str.length; i++) {
+        const ch = str.charCodeAt(i);
+        h1 = Math.imul(h1 ^ ch, 2654435761);
+        h2 = Math.imul(h2 ^ ch, 1597334677);
+    }
+    h1 = Math.imul(h1 ^ (h1 >>> 16), 2246822507);
+    h1 ^= Math.imul(h2 ^ (h2 >>> 13), 3266489909);
+    h2 = Math.imul(h2 ^ (h2 >>> 16), 2246822507);
+    h2 ^= Math.imul(h1 ^ (h1 >>> 13), 3266489909);
+    return `${str.length}:${(4294967296 * (2097151 & h2) + (h1 >>> 0)).toString(36)}`;
+}
+
+async function liveNormalize(retried = false) {
+    const inputText = document.getElementById('input-text').value;
+    const showDiff = document.getElementById('show-diff').checked;
+    const outputElement = document.getElementById('output-text');
+    const variantsElement = document.getElementById('unknown-variants');
+    
+    if (!inputText.trim()) {
+        outputElement.innerHTML = 'Normalized text will appear here...';
+        variantsElement.textContent = 'Unknown variants info will appear here...';
+        return;
+    }
+    if (showDiff !== liveShowDiff) {
+        liveResults.clear();
+        liveShowDiff = showDiff;
+    }
+    
+    const paragraphs = inputText.split('\n');
+    const hashes = paragraphs.map(hashParagraph);
+    const texts = {};
+    const want = [];
+    hashes.forEach(function(hash, i) {
+        if (liveResults.has(hash)) {
+            return;
+        }
+        if (liveSent.has(hash)) {
+            want.push(hash);
+        } else {
+            texts[hash] = paragraphs[i];
+        }
+    });
+    
+    // Ignore responses of requests superseded by newer edits
+    const requestId = ++liveRequest;
+    try {
+        const response = await fetch('/api/normalize-incremental', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                session: liveSession,
+                hashes: hashes,
+                texts: texts,
+                want: want,
+                show_diff: showDiff,
+                profile: selectedProfile()
+            })
+        });
+        
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        
+        const data = await response.json();
+        if (requestId !== liveRequest) {
+            return;
+        }
+        
+        // A new dictionary version invalidates every result kept so far
+        if (data.version !== liveVersion) {
+            if (liveVersion !== null) {
+                liveResults.clear();
+                liveSent.clear();
+            }
+            liveVersion = data.version;
+        }
+        for (const [hash, result] of Object.entries(data.results)) {
+            liveResults.set(hash, result);
+            liveSent.add(hash);
+        }
+        for (const hash of data.missing) {
+            liveSent.delete(hash);
+            liveResults.delete(hash);
+        }
+        
+        // Resend what the server lost (evicted or new version), once
+        if (!retried && hashes.some(hash => !liveResults.has(hash))) {
+            return liveNormalize(true);
+        }
+        
+        const results = hashes.map((hash, i) => liveResults.get(hash) || {normalized_text: paragraphs[i]});
+        if (showDiff) {
+            // Paragraphs without server diff markup are plain (possibly raw input) text
+            outputElement.innerHTML = results.map(result => result.diff_html || escapeHtml(result.normalized_text)).join('\n');
+        } else {
+            outputElement.textContent = results.map(result => result.normalized_text).join('\n');
+        }
+        
+        if (data.unknown_variants.length > 0) {
+            const variantsText = data.unknown_variants.slice(0, 10).join(', ');
+            const moreCount = data.unknown_variants.length - 10;
+            variantsElement.textContent = `Unknown variants found: ${variantsText}${moreCount > 0 ? ` ... and ${moreCount} more` : ''}`;
+        } else {
+            variantsElement.textContent = 'No unknown variants found.';
+        }
+        
+        // Keep only the current document's results once the map grows large
+        if (liveResults.size > LIVE_MAX_RESULTS) {
+            liveResults = new Map(hashes.filter(hash => liveResults.has(hash)).map(hash => [hash, liveResults.get(hash)]));
+        }
+        
+    } catch (error) {
+        console.error('Error normalizing text:', error);
+        outputElement.innerHTML = `<span style="color: #dc3545;">Error: ${error.message}</span>`;
+        variantsElement.textContent = 'Error occurred while processing.';
+    }
+}
+
+function scheduleLiveNormalize() {
+    if (!document.getElementById('live-normalize').checked) {
+        return;
+    }
+    clearTimeout(liveTimer);
+    liveTimer = setTimeout(() => liveNormalize(), LIVE_DELAY_MS);
+}
+
+// Background jobs for large documents
+let currentJob = null;
+let jobEvents = null;
+
+function showJobStatus(status) {
+    const percent = Math.round(status.progress * 100);
+    document.getElementById('job-progress').value = status.progress;
+    let message = `${status.name}: ${status.status} (${percent}%, ${status.lines} lines, ${status.unknown_variant_count} unknown variants)`;
+    if (status.error) {
+        message += `\nError: ${status.error}`;
+    }
+    updateStatus('job-status', message, status.status === 'failed' ? 'error' : 'info');
+}
+
+async function startJob() {
+    const file = document.getElementById('job-file').files[0];
+    if (!file) {
+        updateStatus('job-status', 'Please choose a text file.', 'error');
+        return;
+    }
+    if (jobEvents) {
+        jobEvents.close();
+    }
+    
+    const form = new FormData();
+    form.append('file', file);
+    if (selectedProfile()) {
+        form.append('profile', selectedProfile());
+    }
+    try {
+        const response = await fetch('/api/jobs', {method: 'POST', body: form});
+        const data = await response.json();
+        if (!response.ok) {
+            throw new Error(data.error || `HTTP error! status: ${response.status}`);
+        }
+        currentJob = data.id;
+        document.getElementById('job-cancel').disabled = false;
+        showJobStatus(data);
+        
+        // Follow progress with Server-Sent Events
+        jobEvents = new EventSource(`/api/jobs/${currentJob}/events`);
+        jobEvents.addEventListener('progress', function(event) {
+            const status = JSON.parse(event.data);
+            showJobStatus(status);
+            if (['done', 'failed', 'cancelled'].includes(status.status)) {
+                jobEvents.close();
+                document.getElementById('job-cancel').disabled = true;
+                if (status.status === 'done') {
+                    const element = document.getElementById('job-status');
+                    element.classList.add('success');
+                    element.append('\n');
+                    const link = document.createElement('a');
+                    link.href = `/api/jobs/${status.id}/result`;
+                    link.textContent = 'Download the normalized document';
+                    element.append(link);
+                }
+            }
+        });
+        
+    } catch (error) {
+        console.error('Error starting job:', error);
+        updateStatus('job-status', `Error: ${error.message}`, 'error');
+    }
+}
+
+async function cancelJob() {
+    if (!currentJob) {
+        return;
+    }
+    if (jobEvents) {
+        jobEvents.close();
+    }
+    await fetch(`/api/jobs/${currentJob}`, {method: 'DELETE'});
+    document.getElementById('job-cancel').disabled = true;
+    document.getElementById('job-progress').value = 0;
+    updateStatus('job-status', 'Job cancelled.', 'info');
+    currentJob = null;
+}
+
 // Add variant functionality
 async function addVariant() {
     const canonical = document.getElementById('canonical-word').value.trim();
@@ -198,8 +433,122 @@ async function addSeparation() {
     }
 }
 
+// Dictionary search functionality
+const SEARCH_PAGE_SIZE = 50;
+const SEARCH_DELAY_MS = 250;
+const TYPE_LABELS = {
+    canonical: 'Canonical',
+    variant: 'Variant',
+    separation: 'Separation',
+    exception: 'Exception'
+};
+let searchCursor = null;
+let searchTimer = null;
+let searchRequest = 0;
+
+function describeEntry(entry) {
+    if (entry.type === 'canonical') {
+        return `Variants: ${entry.variants.join(', ')}`;
+    }
+    if (entry.type === 'variant') {
+        return `→ ${entry.canonical}`;
+    }
+    if (entry.type === 'separation') {
+        return `${entry.separated} → ${entry.linked}`;
+    }
+    return 'Keeps گ/ق';
+}
+
+// Fetch the first page (reset) or the next page of search results
+async function searchDictionary(reset = true) {
+    const query = document.getElementById('search-query').value.trim();
+    const mode = document.getElementById('search-mode').value;
+    const types = Array.from(document.querySelectorAll('input[name="search-type"]:checked')).map(box => box.value);
+    const tbody = document.querySelector('#search-results tbody');
+    const statusElement = document.getElementById('search-status');
+    const moreButton = document.getElementById('search-more');
+    
+    if (types.length === 0) {
+        tbody.innerHTML = '';
+        statusElement.textContent = 'Select at least one entry type.';
+        moreButton.disabled = true;
+        return;
+    }
+    
+    if (reset) {
+        searchCursor = null;
+    }
+    // Ignore responses of searches superseded by newer input
+    const requestId = ++searchRequest;
+    const params = new URLSearchParams({q: query, mode: mode, types: types.join(','), limit: SEARCH_PAGE_SIZE});
+    if (searchCursor) {
+        params.set('cursor', searchCursor);
+    }
+    
+    try {
+        const response = await fetch(`/api/search?${params}`);
+        const data = await response.json();
+        if (!response.ok) {
+            throw new Error(data.error || `HTTP error! status: ${response.status}`);
+        }
+        if (requestId !== searchRequest) {
+            return;
+        }
+        
+        if (reset) {
+            tbody.innerHTML = '';
+        }
+        for (const entry of data.results) {
+            const row = tbody.insertRow();
+            row.insertCell().textContent = entry.form;
+            row.insertCell().textContent = TYPE_LABELS[entry.type];
+            row.insertCell().textContent = describeEntry(entry);
+        }
+        
+        searchCursor = data.next_cursor;
+        moreButton.disabled = !searchCursor;
+        const shown = tbody.rows.length;
+        statusElement.textContent = shown === 0
+            ? 'No matching entries.'
+            : `Showing ${shown} entries${searchCursor ? ' (more available)' : ''}.`;
+        
+    } catch (error) {
+        console.error('Error searching dictionary:', error);
+        statusElement.textContent = `Error: ${error.message}`;
+        moreButton.disabled = true;
+    }
+}
+
+function scheduleSearch() {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(() => searchDictionary(true), SEARCH_DELAY_MS);
+}
+
+// Dictionary profile sent with normalization requests (null for the default)
+function selectedProfile() {
+    return document.getElementById('profile').value || null;
+}
+
+async function loadProfiles() {
+    try {
+        const response = await fetch('/api/profiles');
+        const data = await response.json();
+        const select = document.getElementById('profile');
+        data.profiles.filter(profile => !profile.error).forEach(function(profile) {
+            const option = document.createElement('option');
+            option.value = profile.name;
+            option.textContent = profile.description ? `${profile.name} – ${profile.description}` : profile.name;
+            select.appendChild(option);
+        });
+    } catch (error) {
+        console.error('Could not load profiles:', error);
+    }
+}
+
 // Add Enter key support for inputs
 document.addEventListener('DOMContentLoaded', function() {
+    loadProfiles();
+    
     // Normalize text on Enter in input field
     document.getElementById('input-text').addEventListener('keydown', function(e) {
         if (e.key === 'Enter' && e.ctrlKey) {
@@ -207,6 +556,11 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
     
+    // Normalize as the user types
+    document.getElementById('input-text').addEventListener('input', scheduleLiveNormalize);
+    document.getElementById('show-diff').addEventListener('change', scheduleLiveNormalize);
+    document.getElementById('profile').addEventListener('change', scheduleLiveNormalize);
+    
     // Add variant on Enter in variant fields
     document.getElementById('canonical-word').addEventListener('keydown', function(e) {
         if (e.key === 'Enter') {
@@ -234,6 +588,13 @@ document.addEventListener('DOMContentLoaded', function() {
             addSeparation();
         }
     });
+    
+    // Search as the user types
+    document.getElementById('search-query').addEventListener('input', scheduleSearch);
+    document.getElementById('search-mode').addEventListener('change', scheduleSearch);
+    document.querySelectorAll('input[name="search-type"]').forEach(function(box) {
+        box.addEventListener('change', scheduleSearch);
+    });
 });
 
 // Error handling for fetch requests
@@ -4,18 +4,29 @@ Flask web server for the Hassaniya Text Normalizer custom UI.
 Provides API endpoints for text normalization and data management.
 """
 
+import atexit
+import io
 import os
 import sys
 import json
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Dict, List, Tuple
-from flask import Flask, request, jsonify, send_from_directory
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+from flask import Flask, Response, request, jsonify, send_file, send_from_directory
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 
 # Add parent directory to path to import normalizer
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from normalizer import normalize_text, unknown_variants, clear_unknown_variants, reload_data
+from normalizer import normalize_text, normalize_batch, clear_unknown_variants, reload_data, trace
+from normalizer.compiler import DictionaryError, compile_variants
+from normalizer.profiles import get_profile, list_profiles
+from normalizer.search import DEFAULT_PAGE_SIZE, IndexCache
+from normalizer.sketch import DEFAULT_CAPACITY, DEFAULT_FLUSH_INTERVAL, UnknownVariantTracker
+from web_ui.incremental import SessionCache
+from web_ui.jobs import DONE, JobManager, QueueFullError
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -24,9 +35,58 @@ CORS(app)  # Enable CORS for all routes
 DATA_DIR = Path(os.environ.get('HASSANIYA_DATA_DIR', Path(__file__).parent.parent / 'data'))
 VARIANTS_FILE = DATA_DIR / 'hassaniya_variants.jsonl'
 WORD_SEPARATION_FILE = DATA_DIR / 'word_separation.jsonl'
+EXCEPTIONS_FILE = DATA_DIR / 'exception_words_g_q.json'
 
 # Get port from environment variable or use default
 PORT = int(os.environ.get('HASSANIYA_PORT', 5000))
+DEBUG = os.environ.get('HASSANIYA_DEBUG', '1') != '0'
+
+# When to reload the data files: on every normalize request ('request') or
+# only after the API changes them ('change')
+RELOAD_DATA = os.environ.get('HASSANIYA_RELOAD_DATA', 'request')
+
+# Background jobs: directory each server process creates its spool in (the
+# system temporary directory when unset), worker threads, pending job limit,
+# lines per chunk and seconds finished jobs are kept
+JOB_DIR = os.environ.get('HASSANIYA_JOB_DIR') or None
+JOB_WORKERS = int(os.environ.get('HASSANIYA_JOB_WORKERS', 2))
+JOB_MAX_PENDING = int(os.environ.get('HASSANIYA_JOB_MAX_PENDING', 32))
+JOB_CHUNK_LINES = int(os.environ.get('HASSANIYA_JOB_CHUNK_LINES', 500))
+JOB_TTL = int(os.environ.get('HASSANIYA_JOB_TTL', 3600))
+
+# Largest request body (uploads included), in megabytes
+MAX_UPLOAD_MB = int(os.environ.get('HASSANIYA_MAX_UPLOAD_MB', 100))
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_MB * 1024 * 1024
+
+# Top-K unknown variant counts: shared file (in memory only when unset),
+# words kept and seconds between writes to the file
+UNKNOWN_SKETCH = os.environ.get('HASSANIYA_UNKNOWN_SKETCH', '')
+UNKNOWN_TOP_K = int(os.environ.get('HASSANIYA_UNKNOWN_TOP_K', DEFAULT_CAPACITY))
+UNKNOWN_FLUSH_INTERVAL = float(os.environ.get('HASSANIYA_UNKNOWN_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL))
+
+unknown_tracker = UnknownVariantTracker(UNKNOWN_SKETCH or None, UNKNOWN_TOP_K, UNKNOWN_FLUSH_INTERVAL)
+atexit.register(unknown_tracker.flush)
+
+# Dictionary search index, rebuilt when a data file changes
+search_index = IndexCache(str(VARIANTS_FILE), str(WORD_SEPARATION_FILE), str(EXCEPTIONS_FILE))
+
+
+def tracked_normalize_batch(texts: List[str], unknowns: List[List[str]],
+                            profile: Optional[str] = None) -> List[str]:
+    """``normalize_batch`` that also counts the unknown variants of each text."""
+    start = len(unknowns)
+    normalized = normalize_batch(texts, unknowns, profile)
+    for variants in unknowns[start:]:
+        unknown_tracker.record(variants)
+    return normalized
+
+
+jobs = JobManager(JOB_DIR, tracked_normalize_batch, JOB_WORKERS, JOB_MAX_PENDING, JOB_CHUNK_LINES, JOB_TTL)
+atexit.register(jobs.shutdown)
+
+# Paragraph caches of the live editor, and the data version last loaded for it
+editor_sessions = SessionCache()
+_loaded_version = None
 
 
 def load_variants_data() -> List[Dict[str, any]]:
@@ -71,6 +131,61 @@ def save_separation_data(separation_data: List[Dict[str, str]]) -> None:
             f.write(json.dumps(entry, ensure_ascii=False) + '\n')
 
 
+def data_version() -> str:
+    """Return a token that changes whenever a normalization data file changes."""
+    parts = []
+    for path in (VARIANTS_FILE, EXCEPTIONS_FILE):
+        try:
+            stat = path.stat()
+            parts.append(f"{stat.st_mtime_ns}-{stat.st_size}")
+        except OSError:
+            parts.append('-')
+    return ':'.join(parts)
+
+
+def request_profile(data: Optional[Dict[str, any]]) -> Optional[str]:
+    """Return the dictionary profile named by a request, checking it exists.
+    
+    Raises:
+        ValueError: If the profile is not a string or does not exist.
+    """
+    profile = (data or {}).get('profile') or None
+    if profile is not None:
+        if not isinstance(profile, str):
+            raise ValueError('Profile must be a string')
+        get_profile(profile)
+    return profile
+
+
+def request_trace(data: Optional[Dict[str, any]]) -> Optional[trace]:
+    """Return a tracer for the request if it asks for one.
+    
+    ``"trace": true`` traces every token, ``"trace": ["word", ...]`` only
+    those words.
+    
+    Raises:
+        ValueError: If ``trace`` is neither a boolean nor a list of strings.
+    """
+    words = (data or {}).get('trace')
+    if words is None or words is False:
+        return None
+    if words is True:
+        return trace()
+    if isinstance(words, list) and all(isinstance(word, str) for word in words):
+        return trace(words=words)
+    raise ValueError('Trace must be true or a list of words')
+
+
+def normalize_paragraphs(texts: List[str], profile: Optional[str] = None) -> List[Dict[str, any]]:
+    """Normalize paragraphs in one batch, with the unknown variants of each."""
+    unknowns = []
+    normalized = tracked_normalize_batch(texts, unknowns, profile)
+    return [
+        {'normalized_text': text, 'unknown_variants': variants}
+        for text, variants in zip(normalized, unknowns)
+    ]
+
+
 def create_diff_html(original: str, normalized: str) -> str:
     """Create HTML with highlighted differences between original and normalized text."""
     if original == normalized:
@@ -146,21 +261,23 @@ def api_normalize():
         show_diff = data.get('show_diff', False)
         
         # Reload data to ensure we're using the latest files
-        reload_data()
-        
-        # Clear previous unknown variants
-        clear_unknown_variants()
+        if RELOAD_DATA == 'request':
+            reload_data()
+        profile = request_profile(data)
+        tracer = request_trace(data)
         
-        # Normalize the text
-        normalized = normalize_text(text)
-        
-        # Get unknown variants
-        variants = list(unknown_variants) if unknown_variants else []
+        # Collect unknown variants for this request only
+        variants = []
+        with tracer or nullcontext():
+            normalized = normalize_text(text, variants, profile)
+        unknown_tracker.record(variants)
         
         response = {
             'normalized_text': normalized,
             'unknown_variants': variants
         }
+        if tracer:
+            response['trace'] = tracer.events
         
         # Add diff HTML if requested
         if show_diff:
@@ -168,6 +285,256 @@ def api_normalize():
         
         return jsonify(response)
     
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/normalize-batch', methods=['POST'])
+def api_normalize_batch():
+    """Normalize several texts in one request."""
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('texts'), list):
+            return jsonify({'error': 'No texts provided'}), 400
+        
+        texts = data['texts']
+        if not all(isinstance(text, str) for text in texts):
+            return jsonify({'error': 'Texts must be strings'}), 400
+        show_diff = data.get('show_diff', False)
+        
+        if RELOAD_DATA == 'request':
+            reload_data()
+        profile = request_profile(data)
+        tracer = request_trace(data)
+        
+        unknowns = []
+        results = []
+        with tracer or nullcontext():
+            normalized_texts = tracked_normalize_batch(texts, unknowns, profile)
+        for text, normalized, variants in zip(texts, normalized_texts, unknowns):
+            result = {'normalized_text': normalized, 'unknown_variants': variants}
+            if show_diff:
+                result['diff_html'] = create_diff_html(text, normalized)
+            results.append(result)
+        
+        response = {'results': results}
+        if tracer:
+            # Events carry the index of their text as 'text'
+            response['trace'] = tracer.events
+        return jsonify(response)
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/normalize-incremental', methods=['POST'])
+def api_normalize_incremental():
+    """Normalize only the paragraphs of a document that changed.
+    
+    The client sends the hashes of all paragraphs in order (``hashes``), the
+    text of paragraphs it has not sent before (``texts``, hash → text) and
+    the hashes whose results it needs again (``want``). See
+    ``web_ui/incremental.py``.
+    """
+    global _loaded_version
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('session'), str) or not data['session']:
+            return jsonify({'error': 'No session provided'}), 400
+        hashes = data.get('hashes', [])
+        texts = data.get('texts', {})
+        want = data.get('want', [])
+        if not (
+            isinstance(hashes, list) and isinstance(want, list) and isinstance(texts, dict)
+            and all(isinstance(h, str) for h in hashes + want)
+            and all(isinstance(text, str) for text in texts.values())
+        ):
+            return jsonify({'error': 'Invalid paragraphs'}), 400
+        
+        # Reload only when the data files changed, so that unchanged
+        # paragraphs stay cached
+        version = data_version()
+        if version != _loaded_version:
+            reload_data()
+            _loaded_version = version
+        profile = request_profile(data)
+        
+        # Switching profiles starts a new cache, like a data change
+        return jsonify(editor_sessions.update(
+            data['session'][:64], f"{version}:{profile or ''}", hashes, texts, want,
+            partial(normalize_paragraphs, profile=profile),
+            create_diff_html if data.get('show_diff', False) else None,
+        ))
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/jobs', methods=['POST'])
+def api_submit_job():
+    """Queue a large document: a ``file`` upload or JSON ``{"text": ...}``."""
+    try:
+        if 'file' in request.files:
+            upload = request.files['file']
+            name = Path(upload.filename or 'document.txt').name
+            source = upload.stream
+            data = request.form
+        else:
+            data = request.get_json(silent=True)
+            if not data or not isinstance(data.get('text'), str):
+                return jsonify({'error': 'No file or text provided'}), 400
+            name = Path(data.get('name') or 'document.txt').name
+            source = io.BytesIO(data['text'].encode('utf-8'))
+        
+        if RELOAD_DATA == 'request':
+            reload_data()
+        profile = request_profile(data)
+        
+        job = jobs.submit(source, name, partial(tracked_normalize_batch, profile=profile) if profile else None)
+        return jsonify(job.to_dict()), 202
+    
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 429
+    except RequestEntityTooLarge:
+        return jsonify({'error': f'Document exceeds {MAX_UPLOAD_MB} MB'}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_job_status(job_id):
+    """Return the status of a job, with the unknown variants found so far."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    return jsonify({**job.to_dict(), 'unknown_variants': jobs.unknown_variants(job)})
+
+
+@app.route('/api/jobs/<job_id>/output', methods=['GET'])
+def api_job_output(job_id):
+    """Return the output written so far, from the byte ``offset`` parameter on."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    try:
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({'error': 'Invalid offset'}), 400
+    data = jobs.read_output(job, offset)
+    return jsonify({
+        'status': job.status,
+        'text': data.decode('utf-8'),
+        'offset': offset,
+        'next_offset': offset + len(data),
+    })
+
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def api_job_result(job_id):
+    """Download the normalized document of a finished job."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    if job.status != DONE:
+        return jsonify({'error': f'Job is {job.status}'}), 409
+    return send_file(
+        job.output_path,
+        mimetype='text/plain; charset=utf-8',
+        as_attachment=True,
+        download_name=f'normalized_{job.name}',
+    )
+
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def api_job_events(job_id):
+    """Stream the job status as Server-Sent Events until it finishes."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    
+    def stream():
+        for status in jobs.events(job):
+            yield f"event: progress\ndata: {json.dumps(status)}\n\n"
+    
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def api_cancel_job(job_id):
+    """Cancel a job and delete its files."""
+    if not jobs.cancel(job_id):
+        return jsonify({'error': 'Job not found or expired'}), 404
+    return jsonify({'success': True})
+
+
+@app.route('/api/search', methods=['GET'])
+def api_search():
+    """Search canonical words, variants, separation pairs and exception words.
+    
+    Query parameters: ``q`` (text to match), ``mode`` ('prefix' or
+    'substring'), ``types`` (comma-separated entry types), ``limit`` and
+    ``cursor`` (the ``next_cursor`` of the previous page).
+    """
+    try:
+        types = request.args.get('types')
+        page = search_index.get().search(
+            query=request.args.get('q', '').strip(),
+            mode=request.args.get('mode', 'prefix'),
+            types=[t.strip() for t in types.split(',') if t.strip()] if types else None,
+            limit=int(request.args.get('limit', DEFAULT_PAGE_SIZE)),
+            cursor=request.args.get('cursor') or None,
+        )
+        return jsonify(page)
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/profiles', methods=['GET'])
+def api_profiles():
+    """List the dictionary profiles that can be passed as ``profile``."""
+    try:
+        return jsonify({'profiles': list_profiles()})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/unknown-variants/top', methods=['GET'])
+def api_unknown_variants_top():
+    """Most frequent unknown variants since the counts were last reset.
+    
+    Query parameter ``limit`` (default 50). Counts are approximate: each
+    ``count`` is an upper bound and ``count - error`` a lower bound.
+    """
+    try:
+        limit = int(request.args.get('limit', 50))
+        if limit < 1:
+            raise ValueError('limit must be positive')
+        summary = unknown_tracker.snapshot()
+        return jsonify({
+            'variants': [
+                {'word': word, 'count': count, 'error': error}
+                for word, count, error in summary.top(limit)
+            ],
+            'total': summary.total,
+            'capacity': summary.capacity,
+        })
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -203,11 +570,19 @@ def api_add_variant():
         new_entry = {'canonical': canonical, 'variants': variants}
         variants_data.append(new_entry)
         
+        # Refuse entries the normalizer could not load
+        try:
+            compile_variants(variants_data)
+        except DictionaryError as e:
+            return jsonify({'success': False, 'message': '; '.join(e.problems)})
+        
         # Save to file
         save_variants_data(variants_data)
         
         # Clear normalizer cache
         clear_unknown_variants()
+        if RELOAD_DATA == 'change':
+            reload_data()
         
         return jsonify({
             'success': True, 
@@ -270,6 +645,11 @@ def not_found(error):
     return jsonify({'error': 'Not found'}), 404
 
 
+@app.errorhandler(413)
+def too_large(error):
+    return jsonify({'error': f'Request exceeds {MAX_UPLOAD_MB} MB'}), 413
+
+
 @app.errorhandler(500)
 def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
@@ -281,7 +661,7 @@ def main():
     print(f"📱 Web interface available at: http://localhost:{PORT}")
     print("Press Ctrl+C to stop the server")
     print()
-    app.run(debug=True, host='0.0.0.0', port=PORT)
+    app.run(debug=DEBUG, host='0.0.0.0', port=PORT)
 
 
 if __name__ == '__main__':